@@ -0,0 +1,242 @@
+import math
+import os
+import sqlite3
+import time
+from datetime import date
+from typing import Iterable, Iterator, List, Optional
+
+from linea_models import RegistroSaldo, SaldoMensal, digest_saldo
+
+# Linhas gravadas por transação (cada uma é um BEGIN ... COMMIT com executemany)
+TAMANHO_TRANSACAO_PADRAO = 10_000
+
+_COLUNAS = ("hash", "mes", "condominio", "conta", "saldo", "documento_id", "origem_raw", "atualizado_em")
+
+_SQL_UPSERT = f"""
+    INSERT INTO saldos_mensais ({", ".join(_COLUNAS)})
+    VALUES ({", ".join("?" for _ in _COLUNAS)})
+    ON CONFLICT(hash) DO UPDATE SET
+        saldo = excluded.saldo,
+        documento_id = excluded.documento_id,
+        origem_raw = excluded.origem_raw,
+        atualizado_em = excluded.atualizado_em
+"""
+
+
+def _em_lotes(itens: Iterable, tamanho: int) -> Iterator[list]:
+    lote = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+class ArmazenamentoSaldos:
+    """
+    Saldos mensais (SaldoMensal) num banco SQLite local, em modo WAL.
+
+    A chave é SaldoMensal.gerar_hash() (mês + condomínio + conta): gravar de
+    novo o mesmo saldo atualiza a linha existente (upsert) em vez de
+    duplicá-la. As gravações vão em lotes de `tamanho_transacao` linhas, um
+    executemany por transação.
+    """
+
+    def __init__(self, caminho_db, tamanho_transacao=TAMANHO_TRANSACAO_PADRAO):
+        if tamanho_transacao < 1:
+            raise ValueError("tamanho_transacao deve ser pelo menos 1.")
+        self.caminho_db = caminho_db
+        self.tamanho_transacao = tamanho_transacao
+        self._conn = None
+        self._pid = None
+
+    def _conexao(self):
+        # Conexões SQLite não sobrevivem a um fork: cada processo abre a sua
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.caminho_db, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS saldos_mensais (
+                    hash TEXT PRIMARY KEY,
+                    mes TEXT NOT NULL,
+                    condominio TEXT NOT NULL,
+                    conta TEXT NOT NULL,
+                    saldo INTEGER NOT NULL,
+                    documento_id TEXT,
+                    origem_raw TEXT,
+                    atualizado_em REAL NOT NULL
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_saldos_condominio_mes ON saldos_mensais(condominio, mes)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def gravar(self, saldos: Iterable[SaldoMensal | RegistroSaldo]) -> int:
+        """
+        Grava (upsert) os saldos em lotes. Retorna o número de linhas enviadas.
+        Um lote que falha é desfeito inteiro; os lotes anteriores ficam gravados.
+        """
+        conn = self._conexao()
+        agora = time.time()
+        linhas = (
+            (s.gerar_hash(), s.mes.isoformat(), s.condominio, s.conta, s.saldo, s.documento_id, s.origem_raw, agora)
+            for s in saldos
+        )
+
+        total = 0
+        for lote in _em_lotes(linhas, self.tamanho_transacao):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(_SQL_UPSERT, lote)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            total += len(lote)
+        return total
+
+    def obter(self, hash_saldo: str) -> Optional[SaldoMensal]:
+        linha = self._conexao().execute(
+            "SELECT mes, condominio, conta, saldo, documento_id, origem_raw FROM saldos_mensais WHERE hash = ?",
+            (hash_saldo,)
+        ).fetchone()
+        return self._saldo(linha) if linha else None
+
+    def listar(self, condominio: str, mes: date = None) -> List[SaldoMensal]:
+        """Saldos de um condomínio (de um mês, se informado), por mês e conta."""
+        sql = "SELECT mes, condominio, conta, saldo, documento_id, origem_raw FROM saldos_mensais WHERE condominio = ?"
+        parametros = [condominio]
+        if mes is not None:
+            sql += " AND mes = ?"
+            parametros.append(mes.isoformat())
+        sql += " ORDER BY mes, conta"
+        return [self._saldo(linha) for linha in self._conexao().execute(sql, parametros)]
+
+    @staticmethod
+    def _saldo(linha) -> SaldoMensal:
+        mes, condominio, conta, saldo, documento_id, origem_raw = linha
+        return SaldoMensal(
+            mes=date.fromisoformat(mes), condominio=condominio, conta=conta, saldo=saldo,
+            documento_id=documento_id, origem_raw=origem_raw,
+        )
+
+    def existe(self, hash_saldo: str) -> bool:
+        return self._conexao().execute(
+            "SELECT 1 FROM saldos_mensais WHERE hash = ?", (hash_saldo,)
+        ).fetchone() is not None
+
+    def chaves(self) -> Iterator[tuple]:
+        """(hash, mes, condominio, conta) de todas as linhas, para pré-carregar um IndiceDedup."""
+        return self._conexao().execute("SELECT hash, mes, condominio, conta FROM saldos_mensais")
+
+    def contar(self) -> int:
+        return self._conexao().execute("SELECT COUNT(*) FROM saldos_mensais").fetchone()[0]
+
+    def fechar(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+        self._pid = None
+
+
+#
+# Deduplicação em memória
+#
+
+class FiltroBloom:
+    """
+    Filtro de Bloom sobre digests binários (>= 16 bytes). As k posições vêm
+    de hashing duplo sobre os próprios bytes do digest, sem hash adicional.
+    """
+
+    def __init__(self, capacidade: int, taxa_falsos_positivos: float = 0.01):
+        if capacidade < 1 or not 0 < taxa_falsos_positivos < 1:
+            raise ValueError("capacidade deve ser >= 1 e taxa_falsos_positivos entre 0 e 1.")
+        self.num_bits = max(8, int(-capacidade * math.log(taxa_falsos_positivos) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacidade * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def _posicoes(self, digest: bytes):
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def adicionar(self, digest: bytes):
+        bits = self._bits
+        for p in self._posicoes(digest):
+            bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._posicoes(digest))
+
+
+class IndiceDedup:
+    """
+    Índice em memória das chaves de saldo já conhecidas, para descartar
+    meses duplicados antes de montar/validar o SaldoMensal e de ir ao banco.
+
+    Guarda digests binários (linea_models.digest_saldo): "sha256" é o mesmo
+    valor da coluna hash do banco; "blake2b" (16 bytes) e "xxh3" são mais
+    baratos de calcular e de guardar.
+
+    Com bloom=True as chaves pré-carregadas do armazenamento vão só para um
+    FiltroBloom (~1,2 MB por milhão de chaves a 1%, contra dezenas de MB do
+    set); um positivo do filtro é confirmado com uma consulta ao banco. Vale
+    para lotes majoritariamente novos contra um histórico grande; numa
+    reingestão quase toda duplicada o set (padrão) evita essas consultas.
+    """
+
+    def __init__(self, algoritmo="sha256", bloom=False, capacidade=1_000_000, taxa_falsos_positivos=0.01):
+        digest_saldo(date.min, "", "", algoritmo)  # valida o algoritmo
+        self.algoritmo = algoritmo
+        self.bloom = FiltroBloom(capacidade, taxa_falsos_positivos) if bloom else None
+        self._chaves = set()
+        self._armazenamento = None
+        self.estatisticas = {"novos": 0, "duplicados": 0, "consultas_banco": 0, "falsos_positivos": 0}
+
+    def aquecer(self, armazenamento: ArmazenamentoSaldos) -> int:
+        """Carrega as chaves já gravadas. Retorna quantas foram lidas."""
+        self._armazenamento = armazenamento
+        destino = self.bloom.adicionar if self.bloom is not None else self._chaves.add
+        total = 0
+        for hash_hex, mes, condominio, conta in armazenamento.chaves():
+            if self.algoritmo == "sha256":
+                destino(bytes.fromhex(hash_hex))
+            else:
+                # mes vem como "YYYY-MM-DD", que é como o date é formatado na chave
+                destino(digest_saldo(mes, condominio, conta, self.algoritmo))
+            total += 1
+        return total
+
+    def registrar(self, mes, condominio: str, conta: str) -> bool:
+        """True se a chave é nova (e passa a ser conhecida); False se é duplicada."""
+        digest = digest_saldo(mes, condominio, conta, self.algoritmo)
+        if digest in self._chaves:
+            self.estatisticas["duplicados"] += 1
+            return False
+
+        if self.bloom is not None and digest in self.bloom:
+            self.estatisticas["consultas_banco"] += 1
+            if self._armazenamento.existe(digest_saldo(mes, condominio, conta).hex()):
+                self.estatisticas["duplicados"] += 1
+                return False
+            self.estatisticas["falsos_positivos"] += 1
+
+        self._chaves.add(digest)
+        self.estatisticas["novos"] += 1
+        return True
+
+    def filtrar(self, registros: Iterable[dict]) -> Iterator[dict]:
+        """Só os registros (dicts com mes, condominio e conta) cuja chave ainda não foi vista."""
+        registrar = self.registrar
+        for registro in registros:
+            if registrar(registro["mes"], registro["condominio"], registro["conta"]):
+                yield registro
+
+    def __len__(self):
+        return len(self._chaves)
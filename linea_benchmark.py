@@ -0,0 +1,966 @@
+"""
+Benchmarks de desempenho do pipeline Linea.
+
+Uso:
+    python linea_benchmark.py normalize ARQUIVO [--repeticoes N]
+    python linea_benchmark.py blocos [--contas 50 100 200 400 800]
+    python linea_benchmark.py despesas [--linhas 100 1000 10000 100000]
+    python linea_benchmark.py saldos [--documentos 100 1000 5000] [--contas 8]
+    python linea_benchmark.py armazenamento [--saldos 1000000] [--transacao 10000]
+    python linea_benchmark.py dedup [--saldos 1000000] [--algoritmos sha256 blake2b]
+    python linea_benchmark.py colunar [--saldos 1000000] [--consultas 50]
+    python linea_benchmark.py construcao [--saldos 1000000]
+    python linea_benchmark.py carga [--uploads 200] [--concorrencia 16] [--host H --porta P]
+    python linea_benchmark.py inicializacao [--repeticoes 20]
+    python linea_benchmark.py despacho [--contas 4 --despesas 300 --unidades 120]
+    python linea_benchmark.py suite [--contas 4 --despesas 300 --unidades 120]
+                                    [--baseline ARQUIVO [--salvar] [--limite 1.5]]
+
+ARQUIVO pode ser o PDF de uma prestação de contas ou o texto já extraído
+(.txt). Cada benchmark confere que a implementação atual produz o mesmo
+resultado que a anterior, compara os tempos e imprime um resumo em JSON.
+Benchmarks de escala falham (código de saída 1) se o crescimento do tempo
+passar do limite esperado.
+
+A suíte gera uma prestação sintética (linea_sintetico), cronometra cada
+parser e cada validador separadamente e grava ou compara os tempos com um
+arquivo de baseline.
+
+A carga envia PDFs sintéticos (linea_sintetico.gerar_pdf) em paralelo ao
+serviço de ingestão (linea_servico), o já em execução em --host/--porta ou
+um subido no próprio processo, e mede vazão, latência e respostas 429.
+
+A inicialização cronometra interpretadores novos importando só as funções
+de texto, o pipeline e o pypdf, para mostrar quanto um worker que não
+extrai PDFs deixa de pagar; falha se o pipeline carregar pypdf ou numpy ou
+custar mais que o próprio pypdf.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import unicodedata
+from datetime import date
+
+import linea_armazenamento
+import linea_colunar
+import linea_metricas
+import linea_models
+import linea_parser
+import linea_pipeline
+import linea_servico
+import linea_sintetico
+import linea_validador
+import vizei_utils
+
+
+def carregar_linhas(caminho):
+    """Linhas de um PDF (extraídas com vizei_utils) ou de um arquivo de texto."""
+    if caminho.lower().endswith('.pdf'):
+        texto = vizei_utils.extrair_texto_pdf(caminho)
+        if texto is None:
+            raise ValueError(f"Não foi possível extrair o texto de '{caminho}'.")
+    else:
+        with open(caminho, encoding='utf-8') as f:
+            texto = f.read()
+    return texto.split('\n')
+
+
+def cronometrar(funcao, repeticoes):
+    """Melhor tempo (segundos) entre `repeticoes` execuções de funcao()."""
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+#
+# normalize
+#
+
+def _normalize_nfd(text):
+    """Implementação anterior de vizei_utils.normalize (referência)."""
+    if not text:
+        return ""
+    text = text.upper().strip()
+    text = ''.join(
+        c for c in unicodedata.normalize('NFD', text)
+        if unicodedata.category(c) != 'Mn'
+    )
+    return " ".join(text.split())
+
+def bench_normalize(linhas, repeticoes=5):
+    """
+    Normaliza todas as linhas do documento como parse_blocos_contas faz.
+    'frio' limpa o cache a cada execução; 'quente' mede o documento repetido
+    (por exemplo, o mesmo condomínio num lote).
+    """
+    esperado = [_normalize_nfd(linha) for linha in linhas]
+    if vizei_utils.normalize_many(linhas) != esperado:
+        raise AssertionError("normalize diverge da implementação anterior")
+
+    def frio():
+        vizei_utils._normalize.cache_clear()
+        vizei_utils.normalize_many(linhas)
+
+    anterior = cronometrar(lambda: [_normalize_nfd(linha) for linha in linhas], repeticoes)
+    atual_frio = cronometrar(frio, repeticoes)
+    atual_quente = cronometrar(lambda: vizei_utils.normalize_many(linhas), repeticoes)
+
+    return {
+        "linhas": len(linhas),
+        "anterior_s": round(anterior, 6),
+        "atual_frio_s": round(atual_frio, 6),
+        "atual_quente_s": round(atual_quente, 6),
+        "ganho_frio": round(anterior / atual_frio, 2) if atual_frio else None,
+        "ganho_quente": round(anterior / atual_quente, 2) if atual_quente else None,
+    }
+
+
+#
+# parse_blocos_contas
+#
+
+def _parse_blocos_contas_anterior(texto, contas):
+    """Implementação anterior de linea_parser.parse_blocos_contas (referência)."""
+    linhas = texto.splitlines()
+
+    blocos_inicio = []
+    for i, normalized in enumerate(vizei_utils.normalize_many(linhas)):
+        for conta in contas:
+            if normalized == conta.upper():
+                blocos_inicio.append((conta, i))
+                break
+
+    if not blocos_inicio:
+        raise ValueError("Nenhum bloco encontrado.")
+
+    idx_cotas_aberto = None
+    for i, linha in enumerate(linhas):
+        if "RELAÇÃO DE COTAS EM ABERTO" in linha.upper():
+            idx_cotas_aberto = i
+            break
+
+    if idx_cotas_aberto is None:
+        raise ValueError("Linha 'RELAÇÃO DE COTAS EM ABERTO' não encontrada.")
+
+    blocos = []
+    for idx, (conta, start_idx) in enumerate(blocos_inicio):
+        if idx < len(blocos_inicio) - 1:
+            limite_busca = blocos_inicio[idx + 1][1]
+        else:
+            limite_busca = idx_cotas_aberto
+
+        end_idx = None
+        for j in range(start_idx + 1, limite_busca):
+            linha_up = linhas[j].strip().upper()
+            if "SALDO ATUAL" in linha_up:
+                end_idx = j
+                break
+            for outra_conta, _ in blocos_inicio:
+                if linha_up == outra_conta.upper():
+                    end_idx = j - 1
+                    break
+            if end_idx is not None:
+                break
+
+        if end_idx is None:
+            end_idx = limite_busca - 1
+
+        blocos.append({
+            "nome": conta,
+            "start": start_idx,
+            "end": end_idx,
+            "texto": "\n".join(linhas[start_idx:end_idx + 1])
+        })
+
+    manter = [True] * len(linhas)
+    for bloco in blocos:
+        for i in range(bloco["start"], bloco["end"] + 1):
+            manter[i] = False
+    texto_sem_blocos = "\n".join([linhas[i] for i in range(len(linhas)) if manter[i]])
+
+    blocos_unificados = {}
+    for bloco in blocos:
+        nome = bloco["nome"]
+        if nome not in blocos_unificados:
+            blocos_unificados[nome] = dict(bloco)
+        else:
+            existente = blocos_unificados[nome]
+            existente["start"] = min(existente["start"], bloco["start"])
+            existente["end"] = max(existente["end"], bloco["end"])
+            existente["texto"] += "\n" + bloco["texto"]
+
+    return {
+        "blocos": blocos_unificados,
+        "texto_sem_blocos": texto_sem_blocos
+    }
+
+def documento_blocos(num_contas, linhas_por_bloco=12):
+    """
+    Texto sintético com `num_contas` subcontas, cada uma com um bloco de
+    lançamentos; metade dos blocos termina em SALDO ATUAL e algumas contas
+    reaparecem (quebra de página), como nos documentos reais.
+    """
+    contas = [f"SUBCONTA {n:04d} RESERVA ESPECIAL" for n in range(num_contas)]
+    linhas = ["Resumo Financeiro Contábil"]
+    for n, conta in enumerate(contas):
+        linhas.append(conta.title() if n % 3 else conta)
+        for k in range(linhas_por_bloco):
+            linhas.append(f"LANÇAMENTO {k:02d} DA {conta} {k + 1},00")
+        if n % 2:
+            linhas.append("SALDO ATUAL CREDOR 1.000,00")
+        if n % 10 == 0:
+            # Continuação do bloco na página seguinte
+            linhas.append(conta)
+            linhas.append(f"CONTINUAÇÃO {conta} 1,00")
+    linhas.append("RELAÇÃO DE COTAS EM ABERTO")
+    linhas.append("150,00 01 023 01/10/2024 a 31/12/2024A")
+    return "\n".join(linhas), contas
+
+def bench_blocos(tamanhos, repeticoes=3):
+    """parse_blocos_contas atual x anterior para documentos com cada número de contas."""
+    resultados = []
+    for num_contas in tamanhos:
+        texto, contas = documento_blocos(num_contas)
+        if linea_parser.parse_blocos_contas(texto, contas) != _parse_blocos_contas_anterior(texto, contas):
+            raise AssertionError(f"parse_blocos_contas diverge da implementação anterior ({num_contas} contas)")
+
+        anterior = cronometrar(lambda: _parse_blocos_contas_anterior(texto, contas), repeticoes)
+        atual = cronometrar(lambda: linea_parser.parse_blocos_contas(texto, contas), repeticoes)
+        resultados.append({
+            "contas": num_contas,
+            "linhas": texto.count("\n") + 1,
+            "anterior_s": round(anterior, 6),
+            "atual_s": round(atual, 6),
+            "ganho": round(anterior / atual, 2) if atual else None,
+        })
+    return resultados
+
+
+#
+# parsear_despesas_ordinarias
+#
+
+# Expoente máximo aceito para tempo ~ linhas^k (quadrático seria 2)
+EXPOENTE_MAXIMO_LINEAR = 1.25
+
+def documento_despesas(num_linhas, linhas_por_categoria=20):
+    """
+    Seção ORDINÁRIA (CONTA CORRENTE) sintética com cerca de `num_linhas`
+    lançamentos. Retorna (texto, total em centavos, número de lançamentos).
+    """
+    linhas = ["ORDINÁRIA (CONTA CORRENTE)", "Demonstrativo de Despesas", "HISTÓRICO TOTALVALOR"]
+    total = 0
+    lancamentos = 0
+    categoria = 0
+    while lancamentos < num_linhas:
+        # Só letras no nome: o parser descarta maiúsculas com dígitos como categoria
+        linhas.append(linea_sintetico.nome_sequencial("DESPESAS", categoria))
+        subtotal = 0
+        quantidade = min(linhas_por_categoria, num_linhas - lancamentos)
+        for k in range(quantidade):
+            valor = 1000 + (lancamentos * 37) % 90000
+            subtotal += valor
+            lancamentos += 1
+            if k == quantidade - 1:
+                linhas.append(f"{linea_sintetico.formatar_centavos(valor)} {linea_sintetico.formatar_centavos(subtotal)} 1,00%SERVIÇO {k}")
+            else:
+                linhas.append(f"{linea_sintetico.formatar_centavos(valor)}SERVIÇO {k}")
+        total += subtotal
+        categoria += 1
+    linhas.append(f"TOTAL DAS DESPESAS {linea_sintetico.formatar_centavos(total)}")
+    return "\n".join(linhas), total, lancamentos
+
+def expoente_escala(pontos):
+    """Inclinação da reta de mínimos quadrados de log(tempo) x log(tamanho)."""
+    xs = [math.log(n) for n, _ in pontos]
+    ys = [math.log(t) for _, t in pontos]
+    media_x = sum(xs) / len(xs)
+    media_y = sum(ys) / len(ys)
+    numerador = sum((x - media_x) * (y - media_y) for x, y in zip(xs, ys))
+    denominador = sum((x - media_x) ** 2 for x in xs)
+    return numerador / denominador
+
+def bench_despesas(tamanhos, repeticoes=3, expoente_maximo=EXPOENTE_MAXIMO_LINEAR):
+    """
+    parsear_despesas_ordinarias com a seção crescendo de tamanho. Confere o
+    total e a quantidade de lançamentos e exige crescimento quase linear.
+    """
+    resultados = []
+    pontos = []
+    for num_linhas in tamanhos:
+        texto, total, lancamentos = documento_despesas(num_linhas)
+        saida, _ = linea_parser.parsear_despesas_ordinarias(texto)
+        encontrados = sum(len(saida[c]['despesas']) for c in saida["CATEGORIAS"])
+        if saida["TOTAL_DESPESAS"] != total or encontrados != lancamentos:
+            raise AssertionError(f"parsear_despesas_ordinarias perdeu lançamentos ({num_linhas} linhas)")
+
+        tempo = cronometrar(lambda: linea_parser.parsear_despesas_ordinarias(texto), repeticoes)
+        pontos.append((num_linhas, tempo))
+        resultados.append({
+            "linhas": num_linhas,
+            "tempo_s": round(tempo, 6),
+            "us_por_linha": round(tempo / num_linhas * 1e6, 3),
+        })
+
+    expoente = expoente_escala(pontos)
+    if expoente > expoente_maximo:
+        raise AssertionError(
+            f"parsear_despesas_ordinarias cresce como linhas^{expoente:.2f} (máximo {expoente_maximo})"
+        )
+    return {"expoente": round(expoente, 3), "tamanhos": resultados}
+
+
+#
+# validar_saldos_lote
+#
+
+def documentos_saldos(num_documentos, contas, divergentes_a_cada=50):
+    """
+    Saldos de `num_documentos` prestações sintéticas (parsear_bloco_saldos),
+    com o saldo atual da primeira conta alterado em um a cada
+    `divergentes_a_cada` documentos. Retorna (documentos, divergências esperadas).
+    """
+    documentos = {}
+    esperadas = set()
+    for n in range(num_documentos):
+        prestacao = linea_sintetico.gerar_prestacao(contas=contas, despesas=1, unidades=0, semente=n)
+        texto = linea_parser.remover_headers(prestacao["texto"], prestacao["string_identificadora"])
+        saldos, _ = linea_parser.parsear_bloco_saldos(texto)
+        if n % divergentes_a_cada == 0:
+            conta = saldos["contas"][0]
+            saldos[conta]["atual"] += 1
+            esperadas.add((f"doc{n:05d}", conta))
+        documentos[f"doc{n:05d}"] = saldos
+    return documentos, esperadas
+
+def bench_saldos(tamanhos, contas, repeticoes=3):
+    """validar_saldos documento a documento x validar_saldos_lote (que devolve todas as divergências)."""
+    resultados = []
+    for num_documentos in tamanhos:
+        documentos, esperadas = documentos_saldos(num_documentos, contas)
+        encontradas = {(d["documento"], d["conta"]) for d in linea_validador.validar_saldos_lote(documentos)}
+        if encontradas != esperadas:
+            raise AssertionError(f"validar_saldos_lote não encontrou as divergências esperadas ({num_documentos} documentos)")
+
+        colunas = linea_validador.empacotar_saldos(documentos)
+        por_documento = cronometrar(
+            lambda: [linea_validador.validar_saldos(s, verbosidade="nenhum") for s in documentos.values()], repeticoes
+        )
+        empacotar = cronometrar(lambda: linea_validador.empacotar_saldos(documentos), repeticoes)
+        lote = cronometrar(lambda: linea_validador.validar_saldos_lote(colunas), repeticoes)
+        resultados.append({
+            "documentos": num_documentos,
+            "contas": len(colunas),
+            "numpy": linea_validador._numpy() is not None,
+            "por_documento_s": round(por_documento, 6),
+            "empacotar_s": round(empacotar, 6),
+            "lote_s": round(lote, 6),
+            "ganho_validacao": round(por_documento / lote, 2) if lote else None,
+        })
+    return resultados
+
+
+#
+# ArmazenamentoSaldos
+#
+
+def saldos_mensais(num_saldos, contas_por_condominio=8, meses=12):
+    """`num_saldos` SaldoMensal distintos: contas x meses x quantos condomínios forem precisos."""
+    saldos = []
+    for n in range(num_saldos):
+        resto, conta = divmod(n, contas_por_condominio)
+        mes, condominio = resto % meses, resto // meses
+        ano, mes = 2024 + mes // 12, mes % 12
+        saldos.append(linea_models.SaldoMensal(
+            mes=date(ano, mes + 1, 1),
+            condominio=f"{condominio:05d}",
+            conta=linea_sintetico.nome_sequencial("CONTA", conta),
+            saldo=(n * 7919) % 10_000_000,
+            documento_id=f"{condominio:05d}-{ano}-{mes + 1:02d}",
+        ))
+    return saldos
+
+def bench_armazenamento(num_saldos, tamanho_transacao):
+    """
+    Linhas por segundo ao gravar `num_saldos` saldos novos num banco vazio e
+    ao regravar os mesmos (todas as linhas caem no ON CONFLICT).
+    """
+    inicio = time.perf_counter()
+    saldos = saldos_mensais(num_saldos)
+    construcao = time.perf_counter() - inicio
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazenamento = linea_armazenamento.ArmazenamentoSaldos(
+            os.path.join(diretorio, "saldos.db"), tamanho_transacao=tamanho_transacao
+        )
+        inicio = time.perf_counter()
+        armazenamento.gravar(saldos)
+        insercao = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        armazenamento.gravar(saldos)
+        upsert = time.perf_counter() - inicio
+
+        if armazenamento.contar() != num_saldos:
+            raise AssertionError("o upsert duplicou ou perdeu saldos")
+        armazenamento.fechar()
+
+    return {
+        "saldos": num_saldos,
+        "tamanho_transacao": tamanho_transacao,
+        "construcao_s": round(construcao, 3),
+        "insercao_s": round(insercao, 3),
+        "insercao_linhas_por_s": round(num_saldos / insercao),
+        "upsert_s": round(upsert, 3),
+        "upsert_linhas_por_s": round(num_saldos / upsert),
+    }
+
+def bench_dedup(num_saldos, algoritmos, bloom):
+    """
+    Reingestão de `num_saldos` registros brutos (metade já gravada, metade
+    nova) contra um banco com `num_saldos` saldos: consulta linha a linha ao
+    banco x IndiceDedup pré-carregado, para cada algoritmo de digest.
+    """
+    gravados = saldos_mensais(num_saldos)
+    registros = [
+        {"mes": s.mes if n % 2 else s.mes.replace(year=2025), "condominio": s.condominio, "conta": s.conta}
+        for n, s in enumerate(gravados)
+    ]
+    novos_esperados = sum(1 for n in range(num_saldos) if not n % 2)
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazenamento = linea_armazenamento.ArmazenamentoSaldos(os.path.join(diretorio, "saldos.db"))
+        armazenamento.gravar(gravados)
+
+        inicio = time.perf_counter()
+        novos = sum(
+            1 for r in registros
+            if not armazenamento.existe(linea_models.digest_saldo(r["mes"], r["condominio"], r["conta"]).hex())
+        )
+        banco = time.perf_counter() - inicio
+        resultados.append({"modo": "banco", "filtrar_s": round(banco, 3), "novos": novos})
+
+        for algoritmo in algoritmos:
+            for com_bloom in ([False, True] if bloom else [False]):
+                indice = linea_armazenamento.IndiceDedup(algoritmo, bloom=com_bloom, capacidade=num_saldos)
+                inicio = time.perf_counter()
+                indice.aquecer(armazenamento)
+                aquecer = time.perf_counter() - inicio
+
+                inicio = time.perf_counter()
+                novos = sum(1 for _ in indice.filtrar(registros))
+                filtrar = time.perf_counter() - inicio
+
+                if novos != novos_esperados:
+                    raise AssertionError(f"{algoritmo}/bloom={com_bloom}: {novos} novos, esperado {novos_esperados}")
+                resultados.append({
+                    "modo": f"{algoritmo}{'+bloom' if com_bloom else ''}",
+                    "aquecer_s": round(aquecer, 3),
+                    "filtrar_s": round(filtrar, 3),
+                    "ganho_filtrar": round(banco / filtrar, 2) if filtrar else None,
+                    "novos": novos,
+                    "consultas_banco": indice.estatisticas["consultas_banco"],
+                })
+        armazenamento.fechar()
+    return resultados
+
+def bench_colunar(num_saldos, consultas, meses=120):
+    """
+    Histórico de uma conta (`meses` meses) num acervo de `num_saldos` saldos:
+    ArmazenamentoSaldos.listar (SaldoMensal do SQLite, filtrado pela conta)
+    x ArmazenamentoColunar.historico, em média de `consultas` contas.
+    """
+    saldos = saldos_mensais(num_saldos, meses=meses)
+    alvos = sorted({(s.condominio, s.conta) for s in saldos[::max(1, num_saldos // consultas)]})[:consultas]
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        armazenamento = linea_armazenamento.ArmazenamentoSaldos(os.path.join(diretorio, "saldos.db"))
+        armazenamento.gravar(saldos)
+        colunar = linea_colunar.ArmazenamentoColunar(os.path.join(diretorio, "colunar"))
+        inicio = time.perf_counter()
+        colunar.acrescentar(saldos)
+        colunar.compactar()
+        gravacao_colunar = time.perf_counter() - inicio
+        del saldos
+
+        inicio = time.perf_counter()
+        esperado = [[s.saldo for s in armazenamento.listar(condominio) if s.conta == conta] for condominio, conta in alvos]
+        sqlite = (time.perf_counter() - inicio) / len(alvos)
+
+        colunar = linea_colunar.ArmazenamentoColunar(colunar.diretorio)
+        inicio = time.perf_counter()
+        obtido = [colunar.historico(condominio, conta)["saldo"].tolist() for condominio, conta in alvos]
+        consulta = (time.perf_counter() - inicio) / len(alvos)
+
+        if obtido != esperado:
+            raise AssertionError("historico() divergiu do SQLite")
+        armazenamento.fechar()
+
+    return {
+        "saldos": num_saldos,
+        "meses": meses,
+        "consultas": len(alvos),
+        "gravacao_colunar_s": round(gravacao_colunar, 3),
+        "sqlite_pydantic_ms": round(sqlite * 1000, 3),
+        "colunar_ms": round(consulta * 1000, 3),
+        "ganho": round(sqlite / consulta, 1) if consulta else None,
+    }
+
+def bench_construcao(num_saldos):
+    """
+    Registros por segundo e bytes por registro ao montar `num_saldos` saldos
+    a partir de dicts já tipados: SaldoMensal(**d) x validar_saldos (lote
+    com TypeAdapter) x construir_saldos_confiaveis x RegistroSaldo.
+    """
+    dados = [s.__dict__.copy() for s in saldos_mensais(num_saldos)]
+    caminhos = {
+        "modelo": lambda: [linea_models.SaldoMensal(**d) for d in dados],
+        "validar_lote": lambda: linea_models.validar_saldos(dados),
+        "confiavel": lambda: linea_models.construir_saldos_confiaveis(dados),
+        "registro": lambda: [
+            linea_models.RegistroSaldo(d["mes"], d["condominio"], d["conta"], d["saldo"], d["documento_id"], d["origem_raw"])
+            for d in dados
+        ],
+    }
+
+    resultados = {}
+    referencia = None
+    for nome, construir in caminhos.items():
+        inicio = time.perf_counter()
+        saldos = construir()
+        tempo = time.perf_counter() - inicio
+        del saldos
+
+        # Memória medida numa segunda rodada, para o tracemalloc não distorcer o tempo
+        tracemalloc.start()
+        saldos = construir()
+        memoria = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        hashes = [s.gerar_hash() for s in saldos[:1000]]
+        if referencia is None:
+            referencia = hashes
+        elif hashes != referencia:
+            raise AssertionError(f"{nome}: saldos diferentes do modelo")
+        del saldos
+
+        resultados[nome] = {
+            "registros_por_s": round(num_saldos / tempo),
+            "bytes_por_registro": round(memoria / num_saldos),
+        }
+    return {"saldos": num_saldos, "caminhos": resultados}
+
+
+#
+# Carga no serviço de ingestão (linea_servico)
+#
+
+async def _enviar_upload(host, porta, pdf):
+    """Um POST /processar. Retorna (status HTTP, último evento JSON ou None)."""
+    reader, writer = await asyncio.open_connection(host, porta)
+    try:
+        writer.write(
+            f"POST /processar HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/pdf\r\n"
+            f"Content-Length: {len(pdf)}\r\n\r\n".encode("latin-1") + pdf
+        )
+        await writer.drain()
+        cabecalho = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        status = int(cabecalho.split(" ", 2)[1])
+        if "Transfer-Encoding: chunked" not in cabecalho:
+            await reader.read()
+            return status, None
+
+        corpo = bytearray()
+        while True:
+            tamanho = int((await reader.readline()).strip(), 16)
+            if tamanho == 0:
+                break
+            corpo += await reader.readexactly(tamanho)
+            await reader.readexactly(2)
+        return status, json.loads(corpo.decode("utf-8").splitlines()[-1])
+    finally:
+        writer.close()
+
+async def _carga(host, porta, pdfs, uploads, concorrencia, espera_429):
+    latencias, status = [], {}
+    proximo = iter(range(uploads))
+
+    async def cliente():
+        for n in proximo:
+            # Latência do upload inteiro, incluindo as novas tentativas depois de um 429
+            inicio = time.perf_counter()
+            while True:
+                try:
+                    codigo, evento = await _enviar_upload(host, porta, pdfs[n % len(pdfs)])
+                except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+                    codigo, evento = "conexao", None
+                if codigo == 200 and evento["evento"] != "resultado":
+                    codigo = "erro"
+                status[codigo] = status.get(codigo, 0) + 1
+                if codigo != 429:
+                    break
+                await asyncio.sleep(espera_429)
+            if codigo == 200:
+                latencias.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(concorrencia)))
+    return time.perf_counter() - inicio, latencias, status
+
+def bench_carga(uploads, concorrencia, despesas, host=None, porta=None, workers=None, fila=None, espera_429=0.1):
+    """
+    `uploads` PDFs sintéticos enviados por `concorrencia` clientes simultâneos
+    ao serviço. Sem host/porta sobe um ServicoIngestao no próprio processo.
+    Um upload recusado (429) é reenviado após `espera_429` segundos. Mede
+    vazão, latência (p50/p95/máx) e quantas respostas foram 429.
+    """
+    pdfs = [
+        linea_sintetico.gerar_pdf(linea_sintetico.gerar_prestacao(despesas=despesas, unidades=despesas // 3, semente=semente)["paginas"])
+        for semente in range(8)
+    ]
+
+    async def executar():
+        if host is not None:
+            return await _carga(host, porta, pdfs, uploads, concorrencia, espera_429)
+        servico = linea_servico.ServicoIngestao(workers=workers, tamanho_fila=fila or linea_servico.TAMANHO_FILA_PADRAO)
+        porta_local = await servico.iniciar("127.0.0.1", 0)
+        try:
+            return await _carga("127.0.0.1", porta_local, pdfs, uploads, concorrencia, espera_429)
+        finally:
+            await servico.encerrar()
+
+    duracao, latencias, status = asyncio.run(executar())
+    latencias.sort()
+
+    def percentil(p):
+        return round(latencias[min(len(latencias) - 1, int(p * len(latencias)))] * 1000, 1) if latencias else None
+
+    return {
+        "uploads": uploads,
+        "concorrencia": concorrencia,
+        "bytes_por_pdf": round(statistics.mean(len(p) for p in pdfs)),
+        "status": {str(codigo): total for codigo, total in sorted(status.items(), key=str)},
+        "duracao_s": round(duracao, 3),
+        "documentos_por_s": round(status.get(200, 0) / duracao, 2),
+        "latencia_p50_ms": percentil(0.5),
+        "latencia_p95_ms": percentil(0.95),
+        "latencia_max_ms": percentil(1.0),
+    }
+
+
+#
+# Despacho de regex por linha (linea_parser.despachar_linha)
+#
+
+def bench_despacho(contas, despesas, unidades, semente=0):
+    """
+    Tentativas de regex por linha despachada nos parsers de uma prestação
+    sintética: com o pré-filtro por literal x a busca sequencial de todos os
+    padrões (contadas pelo despacho, que só conta com linea_metricas ligado).
+    """
+    prestacao = linea_sintetico.gerar_prestacao(contas=contas, despesas=despesas, unidades=unidades, semente=semente)
+    texto = linea_parser.remover_headers(prestacao["texto"], prestacao["string_identificadora"])
+
+    ativo = linea_metricas.ATIVO
+    linea_metricas.ativar()
+    linea_parser.zerar_estatisticas_despacho()
+    try:
+        linea_parser.parsear_secoes(texto)
+        estatisticas = dict(linea_parser.ESTATISTICAS_DESPACHO)
+    finally:
+        linea_metricas.coletar()
+        if not ativo:
+            linea_metricas.desativar()
+
+    linhas = estatisticas["linhas"] or 1
+    return {
+        "linhas_despachadas": estatisticas["linhas"],
+        "tentativas": estatisticas["tentativas"],
+        "acertos": estatisticas["acertos"],
+        "tentativas_sequenciais": estatisticas["tentativas_sequenciais"],
+        "tentativas_por_linha": round(estatisticas["tentativas"] / linhas, 2),
+        "tentativas_sequenciais_por_linha": round(estatisticas["tentativas_sequenciais"] / linhas, 2),
+    }
+
+
+#
+# Tempo de inicialização (imports)
+#
+
+# Código executado em cada interpretador novo
+_CENARIOS_INICIALIZACAO = {
+    "interpretador": "pass",
+    "vizei_utils": "import vizei_utils",
+    # Chave do cache de texto (o que um acerto no cache custa)
+    "vizei_utils_versao": "import vizei_utils; vizei_utils.versao_extrator()",
+    "linea_pipeline": "import linea_pipeline",
+    "pypdf": "import pypdf",
+    "vizei_utils_extracao": "import vizei_utils; vizei_utils._pypdf()",
+}
+# Cenários que só tratam texto: não podem carregar estes módulos
+_SEM_EXTRACAO = ("interpretador", "vizei_utils", "vizei_utils_versao", "linea_pipeline")
+# (subprocess, zipfile, shutil e inspect: só os backends, origens em zip e versao_parser os usam)
+_MODULOS_PESADOS = ("pypdf", "numpy", "subprocess", "zipfile", "shutil", "inspect")
+
+def bench_inicializacao(repeticoes=20):
+    """
+    Mediana (ms) de `repeticoes` execuções de `python -c` para cada cenário,
+    e o custo de cada um além do interpretador vazio. Falha se um cenário só
+    de texto carregar algum de _MODULOS_PESADOS, ou se importar linea_pipeline
+    custar mais que importar o pypdf.
+    """
+    diretorio = os.path.dirname(os.path.abspath(__file__))
+    verificacao = f"import sys; print(*[m for m in {_MODULOS_PESADOS!r} if m in sys.modules])"
+    tempos = {}
+    for nome, codigo in _CENARIOS_INICIALIZACAO.items():
+        comando = [sys.executable, "-c", f"{codigo}; {verificacao}"]
+        medidas = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            saida = subprocess.run(comando, cwd=diretorio, capture_output=True, text=True, check=True)
+            medidas.append(time.perf_counter() - inicio)
+        carregados = saida.stdout.split()
+        if nome in _SEM_EXTRACAO and carregados:
+            raise AssertionError(f"{nome}: {', '.join(carregados)} importado sem extração")
+        tempos[nome] = statistics.median(medidas) * 1000
+
+    if tempos["linea_pipeline"] >= tempos["pypdf"]:
+        raise AssertionError(
+            f"import linea_pipeline ({tempos['linea_pipeline']:.1f} ms) não é mais barato que import pypdf "
+            f"({tempos['pypdf']:.1f} ms)"
+        )
+
+    base = tempos["interpretador"]
+    return {
+        "repeticoes": repeticoes,
+        "mediana_ms": {nome: round(t, 1) for nome, t in tempos.items()},
+        "alem_do_interpretador_ms": {nome: round(t - base, 1) for nome, t in tempos.items() if nome != "interpretador"},
+    }
+
+
+#
+# Suíte: cada parser e validador sobre uma prestação sintética
+#
+
+def _parsers():
+    return {
+        "saldos": linea_parser.parsear_bloco_saldos,
+        "despesas_ordinarias": linea_parser.parsear_despesas_ordinarias,
+        "resumo_emissoes": linea_parser.parsear_resumo_emissoes_colunado,
+        "posicao_financeira": linea_parser.parsear_posicao_financeira,
+        "fundo_de_reserva": linea_parser.parsear_fundo_de_reserva,
+        "sabesp_comgas": linea_parser.parsear_sabesp_comgas,
+        "salao_de_festas": linea_parser.parsear_salao_de_festas,
+        "cotas_em_aberto": linea_parser.parsear_cotas_em_aberto,
+    }
+
+def _validadores(secoes):
+    """Chamada de cada validador com os mesmos argumentos de linea_pipeline."""
+    return {
+        "validar_saldos": lambda: linea_validador.validar_saldos(secoes["saldos"]),
+        "validar_posicao_financeira": lambda: linea_validador.validar_posicao_financeira(
+            secoes["posicao_financeira"], secoes["despesas_ordinarias"].get("CATEGORIAS", [])
+        ),
+        "validar_despesas_ordinarias": lambda: linea_validador.validar_despesas_ordinarias(secoes["despesas_ordinarias"]),
+        "validar_fundo_de_reserva": lambda: linea_validador.validar_fundo_de_reserva(secoes["fundo_de_reserva"]),
+        "validar_sabesp_comgas": lambda: linea_validador.validar_sabesp_comgas(secoes["sabesp_comgas"]),
+        "validar_salao_de_festas": lambda: linea_validador.validar_salao_de_festas(secoes["salao_de_festas"]),
+        "validar_cotas_em_aberto": lambda: linea_validador.validar_cotas_em_aberto(secoes["cotas_em_aberto"]),
+    }
+
+def bench_suite(contas, despesas, unidades, repeticoes=5, semente=0):
+    """
+    Tempos (segundos) da remoção de cabeçalhos, da segmentação, de cada
+    parser sobre a sua seção, de cada validador e do pipeline completo.
+    Falha se algum validador rejeitar o documento gerado.
+    """
+    prestacao = linea_sintetico.gerar_prestacao(contas=contas, despesas=despesas, unidades=unidades, semente=semente)
+    texto_bruto = prestacao["texto"]
+    string_identificadora = prestacao["string_identificadora"]
+
+    tempos = {}
+    tempos["remover_headers"] = cronometrar(
+        lambda: linea_parser.remover_headers(texto_bruto, string_identificadora), repeticoes
+    )
+    linhas = linea_parser.remover_headers(texto_bruto, string_identificadora).split('\n')
+    tempos["segmentar_secoes"] = cronometrar(lambda: linea_parser.segmentar_secoes(linhas), repeticoes)
+    intervalos = linea_parser.segmentar_secoes(linhas)
+
+    secoes = {}
+    for nome, parser in _parsers().items():
+        inicio, fim = intervalos.get(nome, (0, 0))
+        secao = linhas[inicio:fim]
+        secoes[nome], _ = parser(linea_parser.VisaoLinhas(secao))
+        tempos[parser.__name__] = cronometrar(lambda: parser(linea_parser.VisaoLinhas(secao)), repeticoes)
+
+    for nome, validar in _validadores(secoes).items():
+        resultado = validar()
+        valido = resultado if isinstance(resultado, bool) else resultado["valido"]
+        if not valido:
+            raise AssertionError(f"{nome} rejeitou a prestação sintética")
+        tempos[nome] = cronometrar(validar, repeticoes)
+
+    tempos["processar_paginas"] = cronometrar(
+        lambda: linea_pipeline.processar_paginas(prestacao["paginas"]), repeticoes
+    )
+
+    return {
+        "documento": {
+            "contas": contas,
+            "despesas": despesas,
+            "unidades": unidades,
+            "semente": semente,
+            "paginas": len(prestacao["paginas"]),
+            "linhas": len(linhas),
+        },
+        "tempos_s": {nome: round(t, 6) for nome, t in tempos.items()},
+    }
+
+def comparar_baseline(resultado, baseline, limite=None):
+    """
+    Razão atual/baseline de cada tempo. Com `limite`, falha se alguma etapa
+    ficou mais de `limite` vezes mais lenta.
+    """
+    if baseline["documento"] != resultado["documento"]:
+        raise AssertionError("a baseline foi gerada com outro documento; grave uma nova com --salvar")
+
+    comparacao = {}
+    lentas = []
+    for nome, atual in resultado["tempos_s"].items():
+        anterior = baseline["tempos_s"].get(nome)
+        if not anterior:
+            continue
+        razao = round(atual / anterior, 2)
+        comparacao[nome] = {"baseline_s": anterior, "atual_s": atual, "razao": razao}
+        if limite is not None and razao > limite:
+            lentas.append(f"{nome} ({razao}x)")
+
+    if lentas:
+        raise AssertionError(f"mais lentas que a baseline além de {limite}x: {', '.join(lentas)}")
+    return comparacao
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline Linea.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    p_normalize = subparsers.add_parser("normalize", help="vizei_utils.normalize x implementação NFD anterior")
+    p_normalize.add_argument("arquivo", help="PDF ou texto extraído de uma prestação de contas")
+    p_normalize.add_argument("--repeticoes", type=int, default=5)
+
+    p_blocos = subparsers.add_parser("blocos", help="parse_blocos_contas com centenas de subcontas")
+    p_blocos.add_argument("--contas", type=int, nargs="+", default=[50, 100, 200, 400, 800])
+    p_blocos.add_argument("--repeticoes", type=int, default=3)
+
+    p_despesas = subparsers.add_parser("despesas", help="escala de parsear_despesas_ordinarias")
+    p_despesas.add_argument("--linhas", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    p_despesas.add_argument("--repeticoes", type=int, default=3)
+    p_despesas.add_argument("--expoente-maximo", type=float, default=EXPOENTE_MAXIMO_LINEAR)
+
+    p_saldos = subparsers.add_parser("saldos", help="validar_saldos x validar_saldos_lote")
+    p_saldos.add_argument("--documentos", type=int, nargs="+", default=[100, 1000, 5000])
+    p_saldos.add_argument("--contas", type=int, default=8)
+    p_saldos.add_argument("--repeticoes", type=int, default=3)
+
+    p_armazenamento = subparsers.add_parser("armazenamento", help="gravação em lote de SaldoMensal no SQLite")
+    p_armazenamento.add_argument("--saldos", type=int, default=1_000_000)
+    p_armazenamento.add_argument("--transacao", type=int, default=linea_armazenamento.TAMANHO_TRANSACAO_PADRAO)
+
+    p_dedup = subparsers.add_parser("dedup", help="IndiceDedup x consulta linha a linha ao banco")
+    p_dedup.add_argument("--saldos", type=int, default=1_000_000)
+    p_dedup.add_argument("--algoritmos", nargs="+", default=list(linea_models.ALGORITMOS_DIGEST),
+                         choices=linea_models.ALGORITMOS_DIGEST)
+    p_dedup.add_argument("--sem-bloom", action="store_true", help="não mede a variante com filtro de Bloom")
+
+    p_colunar = subparsers.add_parser("colunar", help="histórico de uma conta: SQLite/pydantic x colunar")
+    p_colunar.add_argument("--saldos", type=int, default=1_000_000)
+    p_colunar.add_argument("--consultas", type=int, default=50)
+
+    p_construcao = subparsers.add_parser("construcao", help="SaldoMensal x caminhos de construção em lote")
+    p_construcao.add_argument("--saldos", type=int, default=1_000_000)
+
+    p_carga = subparsers.add_parser("carga", help="uploads concorrentes de PDFs sintéticos no linea_servico")
+    p_carga.add_argument("--uploads", type=int, default=200)
+    p_carga.add_argument("--concorrencia", type=int, default=16)
+    p_carga.add_argument("--despesas", type=int, default=150, help="linhas de despesa por prestação")
+    p_carga.add_argument("--host", help="serviço já em execução (padrão: sobe um no próprio processo)")
+    p_carga.add_argument("--porta", type=int, default=linea_servico.PORTA_PADRAO)
+    p_carga.add_argument("--workers", type=int, help="workers do serviço local")
+    p_carga.add_argument("--fila", type=int, help="tamanho da fila do serviço local")
+    p_carga.add_argument("--espera-429", type=float, default=0.1, help="segundos até reenviar um upload recusado")
+
+    p_despacho = subparsers.add_parser("despacho", help="tentativas de regex por linha: pré-filtro x busca sequencial")
+    p_despacho.add_argument("--contas", type=int, default=4)
+    p_despacho.add_argument("--despesas", type=int, default=300)
+    p_despacho.add_argument("--unidades", type=int, default=120)
+    p_despacho.add_argument("--semente", type=int, default=0)
+
+    p_inicializacao = subparsers.add_parser("inicializacao", help="custo de import: só texto x pypdf")
+    p_inicializacao.add_argument("--repeticoes", type=int, default=20)
+
+    p_suite = subparsers.add_parser("suite", help="cada parser e validador sobre uma prestação sintética")
+    p_suite.add_argument("--contas", type=int, default=4)
+    p_suite.add_argument("--despesas", type=int, default=300)
+    p_suite.add_argument("--unidades", type=int, default=120)
+    p_suite.add_argument("--semente", type=int, default=0)
+    p_suite.add_argument("--repeticoes", type=int, default=5)
+    p_suite.add_argument("--baseline", help="arquivo JSON com os tempos de referência")
+    p_suite.add_argument("--salvar", action="store_true", help="grava os tempos atuais como baseline")
+    p_suite.add_argument("--limite", type=float, help="razão atual/baseline máxima aceita por etapa")
+
+    args = parser.parse_args(argv)
+
+    try:
+        if args.benchmark == "normalize":
+            resultado = bench_normalize(carregar_linhas(args.arquivo), args.repeticoes)
+        elif args.benchmark == "blocos":
+            resultado = bench_blocos(args.contas, args.repeticoes)
+        elif args.benchmark == "despesas":
+            resultado = bench_despesas(args.linhas, args.repeticoes, args.expoente_maximo)
+        elif args.benchmark == "saldos":
+            resultado = bench_saldos(args.documentos, args.contas, args.repeticoes)
+        elif args.benchmark == "armazenamento":
+            resultado = bench_armazenamento(args.saldos, args.transacao)
+        elif args.benchmark == "colunar":
+            resultado = bench_colunar(args.saldos, args.consultas)
+        elif args.benchmark == "construcao":
+            resultado = bench_construcao(args.saldos)
+        elif args.benchmark == "carga":
+            resultado = bench_carga(args.uploads, args.concorrencia, args.despesas,
+                                    args.host, args.porta, args.workers, args.fila, args.espera_429)
+        elif args.benchmark == "despacho":
+            resultado = bench_despacho(args.contas, args.despesas, args.unidades, args.semente)
+        elif args.benchmark == "inicializacao":
+            resultado = bench_inicializacao(args.repeticoes)
+        elif args.benchmark == "dedup":
+            resultado = bench_dedup(args.saldos, args.algoritmos, not args.sem_bloom)
+        elif args.benchmark == "suite":
+            resultado = bench_suite(args.contas, args.despesas, args.unidades, args.repeticoes, args.semente)
+            if args.baseline and args.salvar:
+                with open(args.baseline, "w", encoding="utf-8") as f:
+                    json.dump(resultado, f, ensure_ascii=False, indent=2)
+            elif args.baseline and os.path.exists(args.baseline):
+                with open(args.baseline, encoding="utf-8") as f:
+                    resultado["comparacao"] = comparar_baseline(resultado, json.load(f), args.limite)
+    except AssertionError as e:
+        print(f"FALHA: {e}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
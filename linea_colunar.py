@@ -0,0 +1,278 @@
+"""
+Armazenamento colunar dos saldos mensais (SaldoMensal), em arquivos
+mapeados em memória com NumPy.
+
+Um diretório com uma coluna por arquivo, largura fixa:
+
+    mes.u2          mês como ordinal (ano * 12 + mês - 1)
+    condominio.u4   código no dicionário de condomínios
+    conta.u4        código no dicionário de contas
+    saldo.i8        centavos
+    meta.json       dicionários, número de linhas, tamanho da região ordenada e geração
+
+Cada compactar() grava as colunas numa nova geração (mes.g1.u2, mes.g2.u2...)
+e só então troca a geração em meta.json: os leitores veem as colunas antigas
+ou as novas, nunca uma mistura.
+
+As linhas [0, ordenadas) estão ordenadas por (condominio, conta, mes) e são
+consultadas por busca binária: uma consulta de histórico lê só as fatias da
+conta pedida. As linhas acrescentadas depois disso (a cauda) são varridas
+até o próximo compactar(), que as incorpora à região ordenada e descarta
+duplicatas (vale a última gravada).
+
+Uso:
+    colunar = ArmazenamentoColunar("saldos/")
+    colunar.acrescentar(saldos)
+    colunar.compactar()
+    historico = colunar.historico("00042", "FUNDO DE RESERVA", inicio=date(2020, 1, 1))
+"""
+import json
+import os
+from datetime import date
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from linea_models import RegistroSaldo, SaldoMensal
+
+# Nome do arquivo e tipo de cada coluna
+COLUNAS = {
+    "mes": np.dtype("<u2"),
+    "condominio": np.dtype("<u4"),
+    "conta": np.dtype("<u4"),
+    "saldo": np.dtype("<i8"),
+}
+VERSAO = 1
+
+
+def ordinal_mes(mes: date) -> int:
+    return mes.year * 12 + mes.month - 1
+
+
+class ArmazenamentoColunar:
+    """
+    Saldos mensais em colunas de largura fixa. Condomínios e contas são
+    codificados por dicionário; o mês é guardado como ordinal, que já é um
+    código denso e preserva a ordem (permite intervalos por busca binária).
+
+    Só acrescenta: acrescentar() grava no fim dos arquivos e só então
+    atualiza meta.json, de modo que uma gravação interrompida não aparece
+    para os leitores e é descartada na próxima.
+    """
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        self._carregar_meta()
+
+    def _caminho(self, nome):
+        return os.path.join(self.diretorio, nome)
+
+    def _carregar_meta(self):
+        try:
+            with open(self._caminho("meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = {"versao": VERSAO, "linhas": 0, "ordenadas": 0, "condominios": [], "contas": []}
+        if meta["versao"] != VERSAO:
+            raise ValueError(f"Versão do armazenamento colunar não suportada: {meta['versao']}.")
+        self.linhas = meta["linhas"]
+        self.ordenadas = meta["ordenadas"]
+        # Diretórios anteriores às gerações só têm a geração 0
+        self.geracao = meta.get("geracao", 0)
+        self.condominios = meta["condominios"]
+        self.contas = meta["contas"]
+        self._codigo_condominio = {v: i for i, v in enumerate(self.condominios)}
+        self._codigo_conta = {v: i for i, v in enumerate(self.contas)}
+        self._mapas = None
+
+    def _gravar_meta(self):
+        meta = {
+            "versao": VERSAO,
+            "linhas": self.linhas,
+            "ordenadas": self.ordenadas,
+            "geracao": self.geracao,
+            "condominios": self.condominios,
+            "contas": self.contas,
+        }
+        temporario = self._caminho(f"meta.json.{os.getpid()}.tmp")
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(temporario, self._caminho("meta.json"))
+        self._mapas = None
+
+    def _arquivo(self, nome, geracao=None):
+        """Caminho do arquivo da coluna `nome` na geração informada (padrão: a atual)."""
+        geracao = self.geracao if geracao is None else geracao
+        sufixo = COLUNAS[nome].str[1:]
+        return self._caminho(f"{nome}.g{geracao}.{sufixo}" if geracao else f"{nome}.{sufixo}")
+
+    def _colunas(self):
+        """Colunas mapeadas em memória (só leitura), limitadas às linhas confirmadas em meta.json."""
+        if self._mapas is None:
+            if self.linhas == 0:
+                self._mapas = {nome: np.empty(0, dtype) for nome, dtype in COLUNAS.items()}
+            else:
+                self._mapas = {
+                    nome: np.memmap(self._arquivo(nome), dtype=dtype, mode="r", shape=(self.linhas,))
+                    for nome, dtype in COLUNAS.items()
+                }
+        return self._mapas
+
+    def _codificar(self, valor, dicionario, codigos):
+        codigo = codigos.get(valor)
+        if codigo is None:
+            codigo = codigos[valor] = len(dicionario)
+            dicionario.append(valor)
+        return codigo
+
+    #
+    # Gravação
+    #
+
+    def acrescentar_colunas(self, meses: Sequence[date], condominios: Sequence[str],
+                            contas: Sequence[str], saldos: Sequence[int]) -> int:
+        """Acrescenta saldos já separados por coluna. Retorna o número de linhas gravadas."""
+        if not len(meses) == len(condominios) == len(contas) == len(saldos):
+            raise ValueError("As colunas devem ter o mesmo tamanho.")
+        if not len(meses):
+            return 0
+
+        codigos_condominio, codigos_conta = self._codigo_condominio, self._codigo_conta
+        novas = {
+            "mes": np.fromiter((ordinal_mes(m) for m in meses), COLUNAS["mes"], len(meses)),
+            "condominio": np.fromiter(
+                (self._codificar(c, self.condominios, codigos_condominio) for c in condominios),
+                COLUNAS["condominio"], len(condominios)),
+            "conta": np.fromiter(
+                (self._codificar(c, self.contas, codigos_conta) for c in contas),
+                COLUNAS["conta"], len(contas)),
+            "saldo": np.asarray(saldos, dtype=COLUNAS["saldo"]),
+        }
+
+        self._mapas = None
+        for nome, dtype in COLUNAS.items():
+            with open(self._arquivo(nome), "ab") as f:
+                # Descarta o que uma gravação interrompida tenha deixado além de meta.json
+                f.truncate(self.linhas * dtype.itemsize)
+                novas[nome].tofile(f)
+        self.linhas += len(meses)
+        self._gravar_meta()
+        return len(meses)
+
+    def acrescentar(self, saldos: Iterable[SaldoMensal | RegistroSaldo]) -> int:
+        saldos = list(saldos)
+        return self.acrescentar_colunas(
+            [s.mes for s in saldos], [s.condominio for s in saldos],
+            [s.conta for s in saldos], [s.saldo for s in saldos],
+        )
+
+    def compactar(self):
+        """
+        Ordena todas as linhas por (condominio, conta, mes) e mantém só a
+        última gravação de cada chave. As colunas são reescritas numa nova
+        geração e meta.json passa a apontá-la de uma vez; os arquivos da
+        geração anterior são apagados em seguida. Não deve rodar junto com
+        outra gravação.
+        """
+        if self.ordenadas == self.linhas:
+            return
+        colunas = {nome: np.array(coluna) for nome, coluna in self._colunas().items()}
+        self._mapas = None
+
+        # lexsort é estável: entre chaves iguais, a ordem de gravação se mantém
+        ordem = np.lexsort((colunas["mes"], colunas["conta"], colunas["condominio"]))
+        chave = [colunas[nome][ordem] for nome in ("condominio", "conta", "mes")]
+        ultima = np.ones(len(ordem), dtype=bool)
+        ultima[:-1] = (chave[0][1:] != chave[0][:-1]) | (chave[1][1:] != chave[1][:-1]) | (chave[2][1:] != chave[2][:-1])
+        ordem = ordem[ultima]
+
+        # Arquivos que ninguém lê até meta.json apontar a nova geração (restos
+        # de um compactar() interrompido são sobrescritos)
+        anterior, nova = self.geracao, self.geracao + 1
+        for nome in COLUNAS:
+            colunas[nome][ordem].tofile(self._arquivo(nome, nova))
+        self.linhas = self.ordenadas = len(ordem)
+        self.geracao = nova
+        self._gravar_meta()
+
+        for nome in COLUNAS:
+            try:
+                os.remove(self._arquivo(nome, anterior))
+            except FileNotFoundError:
+                pass
+
+    #
+    # Consulta
+    #
+
+    def historico(self, condominio: str, conta: Optional[str] = None,
+                  inicio: Optional[date] = None, fim: Optional[date] = None) -> dict:
+        """
+        Saldos de um condomínio (de uma conta, se informada) entre os meses
+        `inicio` e `fim`, inclusive. Retorna colunas NumPy ordenadas por
+        conta e mês: {"mes": datetime64[M], "conta": str, "saldo": int64 (centavos)}.
+        """
+        vazio = {"mes": np.empty(0, "datetime64[M]"), "conta": np.empty(0, object), "saldo": np.empty(0, np.int64)}
+        codigo_condominio = self._codigo_condominio.get(condominio)
+        codigo_conta = self._codigo_conta.get(conta) if conta is not None else None
+        if codigo_condominio is None or (conta is not None and codigo_conta is None):
+            return vazio
+        tipo_mes = COLUNAS["mes"].type
+        mes_inicio = tipo_mes(ordinal_mes(inicio) if inicio else 0)
+        mes_fim = tipo_mes(ordinal_mes(fim) if fim else np.iinfo(tipo_mes).max)
+
+        colunas = self._colunas()
+        k = self.ordenadas
+
+        # Região ordenada: três buscas binárias encaixadas, sem varrer a coluna
+        inicio_fatia, fim_fatia = _intervalo(colunas["condominio"], 0, k, codigo_condominio)
+        if codigo_conta is not None:
+            inicio_fatia, fim_fatia = _intervalo(colunas["conta"], inicio_fatia, fim_fatia, codigo_conta)
+            meses = colunas["mes"][inicio_fatia:fim_fatia]
+            a = inicio_fatia + int(np.searchsorted(meses, mes_inicio, "left"))
+            b = inicio_fatia + int(np.searchsorted(meses, mes_fim, "right"))
+            indices = np.arange(a, b)
+        else:
+            meses = colunas["mes"][inicio_fatia:fim_fatia]
+            indices = inicio_fatia + np.flatnonzero((meses >= mes_inicio) & (meses <= mes_fim))
+
+        # Cauda ainda não compactada: varredura
+        if self.linhas > k:
+            mascara = colunas["condominio"][k:] == codigo_condominio
+            if codigo_conta is not None:
+                mascara &= colunas["conta"][k:] == codigo_conta
+            meses_cauda = colunas["mes"][k:]
+            mascara &= (meses_cauda >= mes_inicio) & (meses_cauda <= mes_fim)
+            indices = np.concatenate([indices, k + np.flatnonzero(mascara)])
+
+        if not len(indices):
+            return vazio
+
+        contas = colunas["conta"][indices]
+        meses = colunas["mes"][indices].astype(np.int64)
+        saldos = colunas["saldo"][indices]
+        if self.linhas > k:
+            # Vale a última gravação de cada (conta, mes); depois ordena por conta e mês
+            chave = contas.astype(np.int64) << 16 | meses
+            _, ultimos = np.unique(chave[::-1], return_index=True)
+            selecao = len(chave) - 1 - ultimos
+            contas, meses, saldos = contas[selecao], meses[selecao], saldos[selecao]
+
+        return {
+            "mes": (meses - ordinal_mes(date(1970, 1, 1))).astype("datetime64[M]"),
+            "conta": np.array(self.contas, dtype=object)[contas],
+            "saldo": np.asarray(saldos, dtype=np.int64),
+        }
+
+    def __len__(self):
+        return self.linhas
+
+
+def _intervalo(coluna, inicio, fim, valor):
+    """Fatia [a, b) de coluna[inicio:fim] (ordenada) com os elementos iguais a valor."""
+    fatia = coluna[inicio:fim]
+    # O valor no dtype da coluna: com um int do Python o searchsorted converteria a coluna inteira
+    valor = coluna.dtype.type(valor)
+    return (inicio + int(np.searchsorted(fatia, valor, "left")),
+            inicio + int(np.searchsorted(fatia, valor, "right")))
@@ -0,0 +1,283 @@
+"""
+Processamento em lote de prestações de contas Linea.
+
+Uso:
+    python linea_lote.py ENTRADA SAIDA [--workers N] [--cache cache.db]
+                         [--metricas-jsonl metricas.jsonl] [--metricas-prometheus linea.prom]
+
+Percorre ENTRADA recursivamente, executa o pipeline completo (extração,
+parsers e validadores) para cada PDF e grava um JSON por documento em SAIDA,
+espelhando a árvore de diretórios. O manifesto de checkpoint (JSON lines)
+registra cada documento concluído; rodar de novo com o mesmo manifesto
+retoma de onde parou, pulando os documentos que não mudaram.
+
+Cada registro guarda também o manifesto de conteúdo do documento (hash do
+PDF -> hash do texto -> versão do parser e hashes de entrada/saída de cada
+seção; ver linea_pipeline.processar_pdf_incremental). Quando um parser muda,
+só os documentos afetados são reabertos e, neles, só as seções daquele
+parser rodam de novo, sem re-extrair o PDF: o texto por página fica em
+SAIDA ao lado do JSON (.paginas.json.gz), com ou sem --cache. Registros de
+versões anteriores, sem manifesto de conteúdo, são reprocessados uma vez.
+
+Com --metricas-jsonl/--metricas-prometheus, cada worker mede as etapas de
+cada documento (linea_metricas) e o processo principal acrescenta os
+registros ao arquivo JSON lines e regrava o snapshot Prometheus a cada
+documento concluído.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import linea_metricas
+import linea_pipeline
+import linea_validador
+
+NOME_MANIFESTO = "checkpoint.jsonl"
+# Texto extraído de cada documento, ao lado do JSON (reaproveitado quando um parser muda)
+EXTENSAO_PAGINAS = ".paginas.json.gz"
+
+
+def listar_pdfs(diretorio):
+    """Caminhos relativos de todos os PDFs da árvore, em ordem estável."""
+    encontrados = []
+    for raiz, subdirs, arquivos in os.walk(diretorio):
+        subdirs.sort()
+        for nome in sorted(arquivos):
+            if nome.lower().endswith('.pdf'):
+                encontrados.append(os.path.relpath(os.path.join(raiz, nome), diretorio))
+    return encontrados
+
+
+def assinatura_arquivo(caminho):
+    """Tamanho + mtime: um arquivo substituído é reprocessado."""
+    info = os.stat(caminho)
+    return f"{info.st_size}:{info.st_mtime_ns}"
+
+
+def carregar_manifesto(caminho_manifesto):
+    """Último registro de cada arquivo no manifesto (linhas truncadas por queda são ignoradas)."""
+    registros = {}
+    if not os.path.exists(caminho_manifesto):
+        return registros
+
+    with open(caminho_manifesto, encoding='utf-8') as f:
+        for linha in f:
+            try:
+                registro = json.loads(linha)
+            except json.JSONDecodeError:
+                continue
+            registros[registro["arquivo"]] = registro
+    return registros
+
+
+def _gravar_json_atomico(caminho, dados):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2, default=linea_validador.serializar_diagnosticos)
+    os.replace(temporario, caminho)
+
+
+# Cache de texto de cada worker (aberto uma vez por processo)
+_CACHE_WORKER = None
+
+def _inicializar_worker(caminho_cache, metricas=False, verbosidade="completo"):
+    global _CACHE_WORKER
+    linea_validador.definir_verbosidade(verbosidade)
+    if metricas:
+        linea_metricas.ativar(memoria=True)
+    if caminho_cache:
+        import vizei_cache
+        _CACHE_WORKER = vizei_cache.CacheTextoPdf(caminho_cache)
+
+
+def _carregar_anterior(saida, anterior):
+    """Manifesto de conteúdo e resultado gravado de um registro concluído, ou None."""
+    if not anterior or anterior.get("status") != "ok" or not anterior.get("manifesto"):
+        return None
+    try:
+        with open(os.path.join(saida, anterior["saida"]), encoding='utf-8') as f:
+            return {"manifesto": anterior["manifesto"], "resultado": json.load(f)}
+    except (OSError, ValueError):
+        return None
+
+
+def processar_arquivo(entrada, saida, relativo, anterior=None):
+    """
+    Processa um PDF e grava o resultado. Retorna o registro para o manifesto.
+    Com `anterior` (o registro da execução passada) refaz só as etapas cujas
+    entradas ou versões mudaram.
+    """
+    inicio = time.perf_counter()
+    caminho_pdf = os.path.join(entrada, relativo)
+    registro = {
+        "arquivo": relativo,
+        "assinatura": assinatura_arquivo(caminho_pdf),
+    }
+
+    try:
+        previo = _carregar_anterior(saida, anterior)
+        base_saida = os.path.join(saida, os.path.splitext(relativo)[0])
+        with linea_metricas.documento(relativo):
+            resultado, manifesto = linea_pipeline.processar_pdf_incremental(
+                caminho_pdf, cache=_CACHE_WORKER, anterior=previo, caminho_paginas=base_saida + EXTENSAO_PAGINAS
+            )
+        caminho_saida = base_saida + ".json"
+        if previo is None or resultado is not previo["resultado"]:
+            _gravar_json_atomico(caminho_saida, resultado)
+        registro.update(status="ok", valido=resultado["valido"], saida=os.path.relpath(caminho_saida, saida),
+                        manifesto=manifesto)
+    except Exception as e:
+        registro.update(status="erro", erro=f"{type(e).__name__}: {e}")
+
+    registro["duracao"] = round(time.perf_counter() - inicio, 4)
+    return registro
+
+
+def _processar_arquivo_worker(entrada, saida, relativo, anterior=None):
+    """processar_arquivo no pool: as métricas do worker voltam junto com o registro."""
+    registro = processar_arquivo(entrada, saida, relativo, anterior)
+    if linea_metricas.ATIVO:
+        registro["metricas"] = linea_metricas.coletar()
+    return registro
+
+
+class Progresso:
+    """Linha de progresso com vazão e ETA, reescrita no stderr."""
+
+    def __init__(self, total, saida=sys.stderr):
+        self.total = total
+        self.saida = saida
+        self.concluidos = 0
+        self.erros = 0
+        self.inicio = time.monotonic()
+
+    def atualizar(self, registro):
+        self.concluidos += 1
+        if registro["status"] != "ok":
+            self.erros += 1
+
+        decorrido = time.monotonic() - self.inicio
+        vazao = self.concluidos / decorrido if decorrido > 0 else 0.0
+        restantes = self.total - self.concluidos
+        eta = restantes / vazao if vazao > 0 else 0
+        self.saida.write(
+            f"\r[{self.concluidos}/{self.total}] {vazao:.2f} docs/s "
+            f"ETA {time.strftime('%H:%M:%S', time.gmtime(eta))} erros: {self.erros}"
+        )
+        self.saida.flush()
+
+    def finalizar(self):
+        self.saida.write("\n")
+        self.saida.flush()
+
+
+def executar_lote(entrada, saida, workers=None, caminho_manifesto=None, caminho_cache=None, refazer_erros=False,
+                  metricas_jsonl=None, metricas_prometheus=None, verbosidade="completo"):
+    """
+    Processa todos os PDFs de `entrada` que ainda não constam como concluídos
+    no manifesto, ou cujo manifesto de conteúdo é de versões anteriores dos
+    parsers, validadores ou extrator. Retorna um resumo da execução.
+    """
+    metricas = bool(metricas_jsonl or metricas_prometheus)
+    os.makedirs(saida, exist_ok=True)
+    caminho_manifesto = caminho_manifesto or os.path.join(saida, NOME_MANIFESTO)
+    workers = workers or os.cpu_count() or 1
+
+    anteriores = carregar_manifesto(caminho_manifesto)
+    pendentes = []
+    for relativo in listar_pdfs(entrada):
+        anterior = anteriores.get(relativo)
+        if anterior is not None and anterior["assinatura"] == assinatura_arquivo(os.path.join(entrada, relativo)):
+            if anterior["status"] == "ok" and linea_pipeline.manifesto_atualizado(anterior.get("manifesto")):
+                continue
+            if anterior["status"] != "ok" and not refazer_erros:
+                continue
+        pendentes.append(relativo)
+
+    progresso = Progresso(len(pendentes))
+    resumo = {"pendentes": len(pendentes), "ok": 0, "erro": 0, "invalidos": 0,
+              "secoes_refeitas": 0, "secoes_reaproveitadas": 0}
+
+    with open(caminho_manifesto, 'a', encoding='utf-8') as manifesto:
+
+        def registrar(registro):
+            medicoes = registro.pop("metricas", None)
+            if medicoes is not None and metricas:
+                linea_metricas.incorporar(medicoes)
+            if metricas:
+                if metricas_jsonl:
+                    linea_metricas.exportar_jsonl(metricas_jsonl)
+                else:
+                    linea_metricas.coletar()
+                if metricas_prometheus:
+                    linea_metricas.exportar_prometheus(metricas_prometheus)
+
+            # Uma linha completa por documento: uma queda perde no máximo o documento em andamento
+            manifesto.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            manifesto.flush()
+            resumo[registro["status"]] += 1
+            if registro["status"] == "ok" and not registro["valido"]:
+                resumo["invalidos"] += 1
+            for secao in registro.get("manifesto", {}).get("secoes", {}).values():
+                resumo["secoes_reaproveitadas" if secao["reaproveitado"] else "secoes_refeitas"] += 1
+            progresso.atualizar(registro)
+
+        if workers == 1:
+            _inicializar_worker(caminho_cache, metricas, verbosidade)
+            for relativo in pendentes:
+                registrar(processar_arquivo(entrada, saida, relativo, anteriores.get(relativo)))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker, initargs=(caminho_cache, metricas, verbosidade)) as executor:
+                # Janela limitada de tarefas em voo: não enfileira milhares de futures de uma vez
+                fila = iter(pendentes)
+                em_voo = set()
+                while True:
+                    for relativo in fila:
+                        em_voo.add(executor.submit(_processar_arquivo_worker, entrada, saida, relativo, anteriores.get(relativo)))
+                        if len(em_voo) >= workers * 2:
+                            break
+                    if not em_voo:
+                        break
+                    prontos, em_voo = wait(em_voo, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        registrar(futuro.result())
+
+    progresso.finalizar()
+    resumo["duracao"] = round(time.monotonic() - progresso.inicio, 2)
+    return resumo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processa em lote prestações de contas Linea (PDF).")
+    parser.add_argument("entrada", help="diretório com os PDFs (percorrido recursivamente)")
+    parser.add_argument("saida", help="diretório onde os JSONs e o manifesto são gravados")
+    parser.add_argument("--workers", type=int, default=None, help="processos no pool (padrão: núcleos da máquina)")
+    parser.add_argument("--manifesto", default=None, help=f"manifesto de checkpoint (padrão: SAIDA/{NOME_MANIFESTO})")
+    parser.add_argument("--cache", default=None, help="banco SQLite do cache de texto extraído (vizei_cache)")
+    parser.add_argument("--refazer-erros", action="store_true", help="reprocessa documentos que falharam antes")
+    parser.add_argument("--verbosidade", choices=linea_validador.VERBOSIDADES, default="completo",
+                        help="logs dos validadores gravados nos JSONs (padrão: completo)")
+    parser.add_argument("--metricas-jsonl", default=None, help="acrescenta as métricas por etapa e documento (JSON lines)")
+    parser.add_argument("--metricas-prometheus", default=None, help="snapshot das métricas no formato texto do Prometheus")
+    args = parser.parse_args(argv)
+
+    resumo = executar_lote(
+        args.entrada, args.saida,
+        workers=args.workers,
+        caminho_manifesto=args.manifesto,
+        caminho_cache=args.cache,
+        refazer_erros=args.refazer_erros,
+        metricas_jsonl=args.metricas_jsonl,
+        metricas_prometheus=args.metricas_prometheus,
+        verbosidade=args.verbosidade,
+    )
+    print(json.dumps(resumo, ensure_ascii=False))
+    return 0 if resumo["erro"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
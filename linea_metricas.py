@@ -0,0 +1,214 @@
+"""
+Instrumentação do pipeline Linea.
+
+Registra, por etapa (extração, remoção de cabeçalhos, cada parsear_*, cada
+validar_*) e por documento: tempo de parede, linhas percorridas, tentativas
+e acertos de regex (via linea_parser.despachar_linha, com as tentativas que
+a busca sequencial de todos os padrões teria feito) e bytes alocados
+(pico do tracemalloc durante a etapa, só com memoria=True).
+
+Desligada por padrão: etapa() devolve um contexto vazio compartilhado e o
+custo é o de uma chamada de função. Ligue com ativar() ou com a variável
+de ambiente LINEA_METRICAS=1.
+
+Uso:
+    linea_metricas.ativar(memoria=True)
+    with linea_metricas.documento("predio.pdf"):
+        linea_pipeline.processar_pdf("predio.pdf")
+    linea_metricas.exportar_jsonl("metricas.jsonl")
+    linea_metricas.exportar_prometheus("metricas.prom")
+"""
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ATIVO = os.environ.get("LINEA_METRICAS", "") not in ("", "0")
+MEMORIA = False
+
+CAMPOS = ("tempo_s", "linhas", "regex_tentativas", "regex_acertos", "regex_tentativas_sequenciais", "bytes_alocados")
+
+# Registros ainda não exportados (um por etapa de cada documento, mais o total do documento)
+REGISTROS = []
+# Somas por etapa desde o início do processo (base do snapshot Prometheus)
+AGREGADO = {}
+
+_documento_atual = None
+_etapas_documento = None
+
+
+def ativar(memoria=False):
+    """Liga a coleta. Com memoria=True mede também os bytes alocados (tracemalloc, mais lento)."""
+    global ATIVO, MEMORIA
+    ATIVO = True
+    MEMORIA = memoria
+    if memoria and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def desativar():
+    global ATIVO, MEMORIA
+    ATIVO = False
+    if MEMORIA and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    MEMORIA = False
+
+def zerar():
+    """Descarta registros e agregados."""
+    REGISTROS.clear()
+    AGREGADO.clear()
+
+
+def _contadores_regex():
+    # Lido de sys.modules para não importar linea_parser (que importa este módulo)
+    parser = sys.modules.get("linea_parser")
+    if parser is None:
+        return (0, 0, 0)
+    estatisticas = parser.ESTATISTICAS_DESPACHO
+    return (estatisticas["tentativas"], estatisticas["acertos"], estatisticas["tentativas_sequenciais"])
+
+def _agregar(registro):
+    soma = AGREGADO.setdefault(registro["etapa"], dict.fromkeys(("execucoes",) + CAMPOS, 0))
+    soma["execucoes"] += 1
+    for campo in CAMPOS:
+        soma[campo] += registro[campo]
+
+
+class _EtapaNula:
+    """Contexto sem efeito devolvido por etapa() com a coleta desligada."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULA = _EtapaNula()
+
+
+class _Etapa:
+    __slots__ = ("nome", "linhas", "_inicio", "_regex", "_memoria")
+
+    def __init__(self, nome, linhas):
+        self.nome = nome
+        self.linhas = linhas
+
+    def __enter__(self):
+        self._regex = _contadores_regex()
+        if MEMORIA:
+            tracemalloc.reset_peak()
+            self._memoria = tracemalloc.get_traced_memory()[0]
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        tempo = time.perf_counter() - self._inicio
+        bytes_alocados = 0
+        if MEMORIA:
+            bytes_alocados = max(0, tracemalloc.get_traced_memory()[1] - self._memoria)
+        tentativas, acertos, sequenciais = _contadores_regex()
+
+        registro = {
+            "documento": _documento_atual,
+            "etapa": self.nome,
+            "tempo_s": tempo,
+            "linhas": self.linhas,
+            "regex_tentativas": tentativas - self._regex[0],
+            "regex_acertos": acertos - self._regex[1],
+            "regex_tentativas_sequenciais": sequenciais - self._regex[2],
+            "bytes_alocados": bytes_alocados,
+        }
+        REGISTROS.append(registro)
+        _agregar(registro)
+        if _etapas_documento is not None:
+            _etapas_documento.append(registro)
+        return False
+
+def etapa(nome, linhas=0):
+    """
+    Contexto que mede uma etapa. As etapas não devem ser aninhadas: o pico
+    de memória é reiniciado na entrada de cada uma.
+    """
+    if not ATIVO:
+        return _NULA
+    return _Etapa(nome, linhas)
+
+
+@contextlib.contextmanager
+def documento(identificador):
+    """
+    Associa as etapas medidas dentro do bloco a `identificador` e, na saída,
+    registra a etapa "documento" com a soma delas e o tempo total.
+    """
+    global _documento_atual, _etapas_documento
+    if not ATIVO:
+        yield
+        return
+
+    anterior = (_documento_atual, _etapas_documento)
+    _documento_atual = identificador
+    _etapas_documento = etapas = []
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        _documento_atual, _etapas_documento = anterior
+        registro = {"documento": identificador, "etapa": "documento"}
+        for campo in CAMPOS:
+            registro[campo] = sum(r[campo] for r in etapas)
+        registro["tempo_s"] = time.perf_counter() - inicio
+        registro["bytes_alocados"] = max((r["bytes_alocados"] for r in etapas), default=0)
+        REGISTROS.append(registro)
+        _agregar(registro)
+
+
+def coletar():
+    """Entrega e esvazia os registros pendentes (por exemplo, para devolver de um worker)."""
+    registros = list(REGISTROS)
+    REGISTROS.clear()
+    return registros
+
+def incorporar(registros):
+    """Acrescenta registros coletados em outro processo."""
+    for registro in registros:
+        REGISTROS.append(registro)
+        _agregar(registro)
+
+
+def exportar_jsonl(caminho):
+    """Acrescenta os registros pendentes ao arquivo, um JSON por linha, e os esvazia."""
+    with open(caminho, "a", encoding="utf-8") as f:
+        for registro in coletar():
+            f.write(json.dumps(registro, ensure_ascii=False) + "\n")
+
+def _rotulo(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def formatar_prometheus():
+    """Agregados por etapa no formato texto do Prometheus (contadores)."""
+    metricas = (
+        ("linea_etapa_execucoes_total", "execucoes", "Execuções da etapa."),
+        ("linea_etapa_segundos_total", "tempo_s", "Tempo de parede acumulado da etapa, em segundos."),
+        ("linea_etapa_linhas_total", "linhas", "Linhas percorridas pela etapa."),
+        ("linea_etapa_regex_tentativas_total", "regex_tentativas", "Tentativas de regex na etapa."),
+        ("linea_etapa_regex_acertos_total", "regex_acertos", "Regex que casaram na etapa."),
+        ("linea_etapa_regex_tentativas_sequenciais_total", "regex_tentativas_sequenciais",
+         "Tentativas de regex que a busca sequencial, sem o pré-filtro, teria feito na etapa."),
+        ("linea_etapa_bytes_alocados_total", "bytes_alocados", "Pico de bytes alocados, somado entre execuções."),
+    )
+    linhas = []
+    for nome, campo, ajuda in metricas:
+        linhas.append(f"# HELP {nome} {ajuda}")
+        linhas.append(f"# TYPE {nome} counter")
+        for etapa_nome in sorted(AGREGADO):
+            linhas.append(f'{nome}{{etapa="{_rotulo(etapa_nome)}"}} {AGREGADO[etapa_nome][campo]}')
+    return "\n".join(linhas) + "\n"
+
+def exportar_prometheus(caminho):
+    """Grava o snapshot (substituição atômica, para o textfile collector do node_exporter)."""
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        f.write(formatar_prometheus())
+    os.replace(temporario, caminho)
@@ -1,16 +1,107 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, StrictInt, TypeAdapter
 from datetime import date
+from typing import Iterable, NamedTuple
 import hashlib
 
+try:
+    import xxhash
+except ImportError:  # xxhash é opcional: sem ele o digest mais rápido é o blake2b
+    xxhash = None
+
+# Digests binários da chave (mês + condomínio + conta). "sha256" é o mesmo
+# valor de gerar_hash(), em bytes; os outros servem só para deduplicar em memória.
+ALGORITMOS_DIGEST = ("sha256", "blake2b") + (("xxh3",) if xxhash is not None else ())
+
+def digest_saldo(mes: date, condominio: str, conta: str, algoritmo: str = "sha256") -> bytes:
+    """Digest binário da chave de um saldo, sem precisar montar o SaldoMensal."""
+    base = f"{mes}-{condominio}-{conta}".encode()
+    if algoritmo == "sha256":
+        return hashlib.sha256(base).digest()
+    if algoritmo == "blake2b":
+        return hashlib.blake2b(base, digest_size=16).digest()
+    if algoritmo == "xxh3" and xxhash is not None:
+        return xxhash.xxh3_128_digest(base)
+    raise ValueError(f"Algoritmo de digest não suportado: {algoritmo}. Opções: {', '.join(ALGORITMOS_DIGEST)}.")
+
 class SaldoMensal(BaseModel):
+    """
+    Saldo de uma conta num mês. `saldo` é em centavos (int) e estrito: antes
+    era em reais, e um float legado como 1234.0 seria aceito como 12,34.
+    """
     mes: date                  # YYYY-MM-01
     condominio: str
     conta: str
-    saldo: float
+    saldo: StrictInt           # centavos; float (reais) é rejeitado
     documento_id: str | None = None
     origem_raw: str | None = None
 
     def gerar_hash(self) -> str:
         """Hash único para evitar duplicidade"""
-        base = f"{self.mes}-{self.condominio}-{self.conta}"
-        return hashlib.sha256(base.encode()).hexdigest()
\ No newline at end of file
+        return digest_saldo(self.mes, self.condominio, self.conta).hex()
+
+    def gerar_digest(self, algoritmo: str = "sha256") -> bytes:
+        """Mesma chave de gerar_hash(), em bytes (ver ALGORITMOS_DIGEST)"""
+        return digest_saldo(self.mes, self.condominio, self.conta, algoritmo)
+
+#
+# Construção em lote
+#
+
+_ADAPTADOR_SALDOS = TypeAdapter(list[SaldoMensal])
+_CAMPOS_SALDO = set(SaldoMensal.model_fields)
+
+def validar_saldos(dados: Iterable[dict]) -> list[SaldoMensal]:
+    """Valida a lista inteira numa chamada só; os erros de todos os itens vêm num único ValidationError."""
+    return _ADAPTADOR_SALDOS.validate_python(list(dados))
+
+def construir_saldos_confiaveis(dados: Iterable[dict]) -> list[SaldoMensal]:
+    """
+    Monta SaldoMensal sem validar campo a campo, para dados já tipados (ex.:
+    saídas do parser). Tipos errados passam sem erro: não use com entrada externa.
+    Mais rápido que model_construct(), que ainda trata defaults e aliases.
+    """
+    novo = SaldoMensal.__new__
+    definir = object.__setattr__
+    saldos = []
+    for d in dados:
+        saldo = novo(SaldoMensal)
+        definir(saldo, "__dict__", {
+            "mes": d["mes"],
+            "condominio": d["condominio"],
+            "conta": d["conta"],
+            "saldo": d["saldo"],
+            "documento_id": d.get("documento_id"),
+            "origem_raw": d.get("origem_raw"),
+        })
+        # Conjunto compartilhado: já tem todos os campos, então o add() do __setattr__ não o altera
+        definir(saldo, "__pydantic_fields_set__", _CAMPOS_SALDO)
+        definir(saldo, "__pydantic_extra__", None)
+        definir(saldo, "__pydantic_private__", None)
+        saldos.append(saldo)
+    return saldos
+
+class RegistroSaldo(NamedTuple):
+    """Saldo mensal como tupla, sem validação, para pipelines internos (ArmazenamentoSaldos e ArmazenamentoColunar aceitam)"""
+    mes: date
+    condominio: str
+    conta: str
+    saldo: int                 # centavos
+    documento_id: str | None = None
+    origem_raw: str | None = None
+
+    def gerar_hash(self) -> str:
+        return digest_saldo(self.mes, self.condominio, self.conta).hex()
+
+    def gerar_digest(self, algoritmo: str = "sha256") -> bytes:
+        return digest_saldo(self.mes, self.condominio, self.conta, algoritmo)
+
+    def para_saldo(self) -> SaldoMensal:
+        return SaldoMensal(**self._asdict())
+
+def registros_do_resumo(dados_saldos: dict, mes: date, condominio: str, documento_id: str | None = None) -> list[RegistroSaldo]:
+    """Um RegistroSaldo (saldo atual) por conta do resultado de linea_parser.parsear_bloco_saldos."""
+    return [
+        RegistroSaldo(mes, condominio, conta, dados_saldos[conta]["atual"], documento_id)
+        for conta in dados_saldos.get("contas", [])
+        if conta in dados_saldos
+    ]
\ No newline at end of file
@@ -1,6 +1,222 @@
+import functools
+import hashlib
+import itertools
 import re
+import sys
+import types
+from collections import OrderedDict
+import linea_metricas
 import vizei_utils
-from typing import Tuple, Dict, Any, List
+from typing import Tuple, Dict, Any, List, Iterable, Iterator
+
+
+# Inverte o bitmap de linhas consumidas (0 <-> 1)
+_INVERTE_BITMAP = bytes.maketrans(b'\x00\x01', b'\x01\x00')
+
+class VisaoLinhas:
+    """
+    Visão sobre a lista de linhas de um documento com um bitmap das linhas já
+    consumidas pelos parsers.
+
+    Os parsear_* aceitam uma visão no lugar do texto e, em vez de montar o
+    texto restante, devolvem uma nova visão sobre a mesma lista com o trecho
+    extraído marcado como consumido. Os índices usados pelos parsers são
+    relativos às linhas ainda não consumidas: a visão se comporta como uma
+    sequência dessas linhas (len, índice, fatia, iteração) sem copiá-las.
+    texto() monta o texto restante quando ele for mesmo necessário.
+    """
+    __slots__ = ("linhas", "_consumidas", "_indices")
+
+    def __init__(self, linhas, consumidas=None):
+        if isinstance(linhas, str):
+            linhas = linhas.split('\n')
+        self.linhas = linhas
+        self._consumidas = consumidas if consumidas is not None else bytearray(len(linhas))
+        self._indices = None
+
+    def indices(self) -> List[int]:
+        """Índices (na lista original) das linhas ainda não consumidas."""
+        if self._indices is None:
+            livres = self._consumidas.translate(_INVERTE_BITMAP)
+            self._indices = list(itertools.compress(range(len(self.linhas)), livres))
+        return self._indices
+
+    def restantes(self) -> List[str]:
+        return list(map(self.linhas.__getitem__, self.indices()))
+
+    def __iter__(self):
+        return map(self.linhas.__getitem__, self.indices())
+
+    def __len__(self):
+        return len(self.indices())
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return list(map(self.linhas.__getitem__, self.indices()[i]))
+        return self.linhas[self.indices()[i]]
+
+    def consumir(self, intervalos) -> "VisaoLinhas":
+        """Nova visão com os intervalos [inicio, fim) (relativos às restantes) consumidos."""
+        indices = self.indices()
+        consumidas = bytearray(self._consumidas)
+        for inicio, fim in intervalos:
+            for i in indices[inicio:fim]:
+                consumidas[i] = 1
+        return VisaoLinhas(self.linhas, consumidas)
+
+    def manter(self, mantidas) -> "VisaoLinhas":
+        """Nova visão em que só as linhas `mantidas` (índices relativos, em ordem) continuam livres."""
+        indices = self.indices()
+        consumidas = bytearray(b'\x01') * len(self.linhas)
+        for i in mantidas:
+            consumidas[indices[i]] = 0
+        return VisaoLinhas(self.linhas, consumidas)
+
+    def texto(self) -> str:
+        """Texto das linhas não consumidas, como os parsers devolvem sem a visão."""
+        return "\n".join(self.restantes()).strip()
+
+
+def _iter_linhas(texto) -> Iterable[str]:
+    """
+    Os parsers aceitam o texto completo, uma VisaoLinhas ou um iterável de
+    linhas (por exemplo vizei_utils.iterar_linhas_pdf), consumido sob demanda
+    quando possível.
+    """
+    if isinstance(texto, str):
+        return texto.split('\n')
+    return texto
+
+def _lista_linhas(texto) -> List[str]:
+    """
+    Como _iter_linhas, para parsers que precisam de acesso por índice. Uma
+    VisaoLinhas já é uma sequência e é usada diretamente, sem cópia.
+    """
+    if isinstance(texto, str):
+        return texto.split('\n')
+    if isinstance(texto, VisaoLinhas):
+        return texto
+    return list(texto)
+
+def _texto(texto_bruto, linhas: List[str]) -> str:
+    """Texto original de volta, para os retornos de erro dos parsers."""
+    if isinstance(texto_bruto, (str, VisaoLinhas)):
+        return texto_bruto
+    return "\n".join(linhas)
+
+def _restante_sem_intervalo(texto_bruto, linhas: List[str], inicio: int, fim: int):
+    """
+    Texto restante sem as linhas [inicio, fim). Para uma VisaoLinhas o
+    intervalo só é marcado como consumido, sem montar texto.
+    """
+    if isinstance(texto_bruto, VisaoLinhas):
+        return texto_bruto.consumir([(inicio, fim)])
+
+    linhas_antes = "\n".join(linhas[:inicio])
+    linhas_depois = "\n".join(linhas[fim:])
+    return (linhas_antes + "\n" + linhas_depois).strip()
+
+def _restante_mantidas(texto_bruto, linhas_mantidas: List[str], indices_mantidos: List[int]):
+    """Texto restante formado pelas linhas mantidas (ou a visão com só elas livres)."""
+    if isinstance(texto_bruto, VisaoLinhas):
+        return texto_bruto.manter(indices_mantidos)
+    return "\n".join(linhas_mantidas)
+
+
+#
+# Registro central dos padrões
+#
+
+# Valor no formato brasileiro (1.234,56)
+_VALOR_BR = r'\d{1,3}(?:\.\d{3})*,\d{2}'
+
+# Compilados uma única vez, na importação do módulo
+PADROES = {
+    "condominio": re.compile(r'^(.*Condomínio:\s*(\d+)\s*-\s*CONDOMINIO\s*(.*))$', re.MULTILINE),
+    # 4 valores (opcionalmente negativos) no final da linha do Resumo Financeiro Contábil
+    "saldos_valores": re.compile(r'([\-]?\s*\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s+([\-]?\s*\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s+([\-]?\s*\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s+([\-]?\s*\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s*$'),
+    "despesa_valor_colado": re.compile(rf'^\s*({_VALOR_BR})(.*)$'),
+    "despesa_subtotal": re.compile(rf'^\s*({_VALOR_BR})\s+({_VALOR_BR})\s+([\d,.]+%)(.*)$'),
+    "despesa_total_final": re.compile(rf'^\s*TOTAL DAS DESPESAS\s*({_VALOR_BR})\s*$'),
+    # Dois valores colados (Realizado/Previsto ou Crédito/Débito)
+    "dois_valores_colados": re.compile(rf'^\s*({_VALOR_BR})({_VALOR_BR})\s*$'),
+    "item_colunado": re.compile(rf'^(.*?)\s*({_VALOR_BR})({_VALOR_BR})\s*$'),
+    "item_simples": re.compile(rf'^(.*?)\s*({_VALOR_BR})\s*$'),
+    "totais": re.compile(rf'^\s*TOTAIS\s*({_VALOR_BR})({_VALOR_BR})\s*$'),
+    "saldo_atual": re.compile(rf'^\s*SALDO ATUAL\s*(CREDOR|DEVEDOR|)\s*({_VALOR_BR})\s*$'),
+    "data_final": re.compile(r'(\d{2}/\d{2}/\d{4})$'),
+    "sufixo_em_data": re.compile(r'\s+EM\s+\d{2}/\d{2}/\d{4}$'),
+    "salao_item_colunado": re.compile(rf'^(.*?)\s*(-?{_VALOR_BR})(?:\s*(-?{_VALOR_BR}))?\s*$'),
+    "salao_item_unico": re.compile(rf'^(.*?)\s*(\d{{2}}/\d{{2}}/\d{{4}})\s*({_VALOR_BR})\s*$'),
+    "salao_valor_isolado": re.compile(rf'^-?{_VALOR_BR}$'),
+    "salao_descricao_data": re.compile(r'(.*?)(\d{2}/\d{2}/\d{4})$'),
+    "cotas_unidade": re.compile(rf'^\s*({_VALOR_BR})\s*(\d{{2}}\s*\d{{3}})\s*(\d{{2}}/\d{{2}}/\d{{4}}\s*a\s*\d{{2}}/\d{{2}}/\d{{4}})([AJP])?\s*$'),
+    "cotas_total_bloco": re.compile(rf'^\s*({_VALOR_BR})\s*Total do Bloco:\s*(\w+)\s*$'),
+    "cotas_total_geral": re.compile(rf'^\s*({_VALOR_BR})\s*Total geral:\s*$'),
+}
+
+# Despacho por linha: (literal, padrão) na ordem em que os parsers tentavam
+# os padrões. Cada padrão só casa com linhas que contêm o seu literal, então
+# uma busca de substring descarta os demais sem custo de regex.
+DESPACHO_POSICAO = (("SALDO ATUAL", "saldo_atual"), ("TOTAIS", "totais"))
+DESPACHO_DESPESAS = (("%", "despesa_subtotal"),)
+DESPACHO_COTAS = (("Total do Bloco", "cotas_total_bloco"), ("Total geral", "cotas_total_geral"))
+
+# Contadores do despacho: tentativas feitas x tentativas da busca sequencial.
+# Só contam com linea_metricas ligado; os totais de cada worker de um lote
+# chegam ao processo principal nos registros de linea_metricas.
+ESTATISTICAS_DESPACHO = {"linhas": 0, "tentativas": 0, "acertos": 0, "tentativas_sequenciais": 0}
+
+def despachar_linha(linha_limpa: str, despacho, geral: str = None):
+    """
+    Tenta na linha só os padrões de `despacho` cujo literal aparece nela (na
+    prática no máximo um) e, se nenhum casar, o padrão `geral`.
+
+    Retorna (nome do padrão, match) ou (None, None). O resultado é o mesmo da
+    tentativa sequencial de todos os padrões, na ordem de `despacho`.
+    """
+    if linea_metricas.ATIVO:
+        return _despachar_linha_contando(linha_limpa, despacho, geral)
+
+    for literal, nome in despacho:
+        if literal in linha_limpa:
+            match = PADROES[nome].search(linha_limpa)
+            if match:
+                return (nome, match)
+    if geral:
+        match = PADROES[geral].search(linha_limpa)
+        if match:
+            return (geral, match)
+    return (None, None)
+
+def _despachar_linha_contando(linha_limpa: str, despacho, geral: str = None):
+    """despachar_linha atualizando ESTATISTICAS_DESPACHO."""
+    estatisticas = ESTATISTICAS_DESPACHO
+    estatisticas["linhas"] += 1
+    total_padroes = len(despacho) + (1 if geral else 0)
+
+    for posicao, (literal, nome) in enumerate(despacho):
+        if literal in linha_limpa:
+            estatisticas["tentativas"] += 1
+            match = PADROES[nome].search(linha_limpa)
+            if match:
+                estatisticas["acertos"] += 1
+                estatisticas["tentativas_sequenciais"] += posicao + 1
+                return (nome, match)
+
+    estatisticas["tentativas_sequenciais"] += total_padroes
+    if geral:
+        estatisticas["tentativas"] += 1
+        match = PADROES[geral].search(linha_limpa)
+        if match:
+            estatisticas["acertos"] += 1
+            return (geral, match)
+    return (None, None)
+
+def zerar_estatisticas_despacho():
+    for chave in ESTATISTICAS_DESPACHO:
+        ESTATISTICAS_DESPACHO[chave] = 0
+
 
 def parsear_identificacao_condominio(texto_bruto: str) -> dict:    
     # 1. Definir a Expressão Regular (Regex)
@@ -8,11 +224,11 @@ def parsear_identificacao_condominio(texto_bruto: str) -> dict:
     # Condomínio:\s*(\d+) (Grupo 1: Captura o código, que é composto por números (\d+))
     # \s*-\s*CONDOMINIO\s* (Separador literal)
     # (.*) (Grupo 2: Captura o restante da string como o nome do condomínio)
-    regex_condominio = r'^(.*Condomínio:\s*(\d+)\s*-\s*CONDOMINIO\s*(.*))$'
+    # (PADROES["condominio"], compilado com re.MULTILINE)
     
     # 2. Buscar o padrão no texto
     # Usamos re.MULTILINE (re.M) para que o ^ e $ funcionem para cada linha
-    match = re.search(regex_condominio, texto_bruto, re.MULTILINE)
+    match = PADROES["condominio"].search(texto_bruto)
     
     if match:
         # Grupo 1 (match.group(1)): A string completa de identificação
@@ -38,17 +254,42 @@ def parsear_identificacao_condominio(texto_bruto: str) -> dict:
             'string_identificadora': None
         }
     
-def remover_headers(texto_bruto: str, string_identificadora:str) -> str:
+def identificar_e_remover_headers(linhas: Iterable[str]) -> Tuple[dict, Iterator[str]]:
     """
-    Remove blocos de cabeçalho que se repetem no início de cada 'página' 
-    do texto extraído.
+    Versão em fluxo de parsear_identificacao_condominio + remover_headers.
+
+    Consome linhas só até encontrar a identificação do condomínio e devolve
+    (identificação, gerador das linhas já sem cabeçalho). As linhas seguintes
+    continuam sendo lidas sob demanda.
+    """
+    linhas = iter(linhas)
+    lidas = []
+    identificacao = parsear_identificacao_condominio("")
+
+    for linha in linhas:
+        lidas.append(linha)
+        identificacao = parsear_identificacao_condominio(linha)
+        if identificacao['string_identificadora'] is not None:
+            break
+
+    if identificacao['string_identificadora'] is None:
+        # Sem identificação não há marcador de fim de cabeçalho para procurar
+        return (identificacao, iter(lidas))
+
+    return (identificacao, remover_headers_linhas(itertools.chain(lidas, linhas), identificacao['string_identificadora']))
+
+# Marcadores de início do bloco de cabeçalho de cada página
+MARCADOR_INICIO_CABECALHO = "RelatDemonCroAntes"
+MARCADOR_INICIO_CABECALHO_2 = "PRESTAÇÃO DE CONTAS"
+
+def remover_headers_linhas(linhas: Iterable[str], string_identificadora: str) -> Iterator[str]:
+    """
+    Gera as linhas não vazias que não fazem parte do bloco de cabeçalho
+    repetido no início de cada 'página'.
     """
-    linhas = texto_bruto.split('\n')
-    texto_filtrado = []
-    
     # Marcador de início do bloco de cabeçalho
-    MARCADOR_INICIO = "RelatDemonCroAntes" 
-    MARCADOR_INICIO_2 = "PRESTAÇÃO DE CONTAS"
+    MARCADOR_INICIO = MARCADOR_INICIO_CABECALHO
+    MARCADOR_INICIO_2 = MARCADOR_INICIO_CABECALHO_2
     # Marcador de fim do bloco de cabeçalho
     MARCADOR_FIM = string_identificadora 
     
@@ -69,9 +310,137 @@ def remover_headers(texto_bruto: str, string_identificadora:str) -> str:
             
         # 3. Adiciona a linha APENAS se não for um cabeçalho
         if not dentro_header and linha_limpa:
-            texto_filtrado.append(linha)
-            
-    return "\n".join(texto_filtrado)
+            yield linha
+
+def remover_headers(texto_bruto: str, string_identificadora:str) -> str:
+    """
+    Remove blocos de cabeçalho que se repetem no início de cada 'página' 
+    do texto extraído.
+    """
+    return "\n".join(remover_headers_linhas(_iter_linhas(texto_bruto), string_identificadora))
+
+#
+# Remoção de cabeçalhos por página, com modelo aprendido por condomínio
+#
+
+# Linhas além da altura aprendida em que a identificação ainda é procurada
+MARGEM_CABECALHO = 3
+# Condomínios com modelo guardado por processo (os menos usados saem primeiro)
+TAMANHO_CACHE_MODELOS = 1024
+
+class ModeloCabecalho:
+    """
+    Cabeçalho de página de um condomínio: as linhas exatas que se repetem em
+    todos os cabeçalhos e a altura máxima do bloco (da primeira linha da
+    página até a identificação do condomínio).
+    """
+
+    def __init__(self, linhas, altura):
+        self.linhas = frozenset(linhas)
+        self.altura = altura
+
+    def valido(self) -> bool:
+        """False se nenhum bloco de cabeçalho foi reconhecido (não deve ser reaproveitado)."""
+        return self.altura > 0
+
+    def cobre(self, paginas: Iterable[str], string_identificadora: str) -> bool:
+        """True se em toda página a identificação, quando existe, está dentro de altura + MARGEM_CABECALHO."""
+        limite = self.altura + MARGEM_CABECALHO
+        for pagina in paginas:
+            posicao = pagina.find(string_identificadora)
+            if posicao >= 0 and pagina.count('\n', 0, posicao) >= limite:
+                return False
+        return True
+
+    def combinar(self, outro: "ModeloCabecalho") -> "ModeloCabecalho":
+        """Modelo que serve aos dois: só as linhas comuns, com a maior altura."""
+        return ModeloCabecalho(self.linhas & outro.linhas, max(self.altura, outro.altura))
+
+# Modelos já aprendidos, por código do condomínio (reaproveitados entre documentos), em ordem de uso
+_MODELOS_CABECALHO: "OrderedDict[str, ModeloCabecalho]" = OrderedDict()
+
+def aprender_modelo_cabecalho(paginas: Iterable[str], string_identificadora: str) -> ModeloCabecalho:
+    """
+    Localiza em cada página o bloco de cabeçalho pelos mesmos marcadores de
+    remover_headers_linhas (só blocos que terminam na identificação) e guarda
+    as linhas comuns a todos eles.
+    """
+    blocos = []
+    altura = 0
+
+    for pagina in paginas:
+        linhas = pagina.split('\n')
+        inicio = None
+        for i, linha in enumerate(linhas):
+            linha_limpa = linha.strip()
+            if inicio is None:
+                if MARCADOR_INICIO_CABECALHO in linha_limpa or MARCADOR_INICIO_CABECALHO_2 in linha_limpa:
+                    inicio = i
+            elif string_identificadora in linha_limpa:
+                blocos.append({l.strip() for l in linhas[inicio:i + 1] if l.strip()})
+                altura = max(altura, i + 1)
+                break
+
+    comuns = set.intersection(*blocos) if blocos else set()
+    comuns.add(string_identificadora)
+    return ModeloCabecalho(comuns, altura)
+
+def obter_modelo_cabecalho(codigo_condominio: str, paginas: List[str], string_identificadora: str) -> ModeloCabecalho:
+    """
+    Modelo do condomínio, aprendido das `paginas` na primeira vez que o código
+    aparece. Um modelo sem bloco reconhecido não é guardado. Se a identificação
+    de alguma página cair abaixo da altura guardada, o modelo é reaprendido
+    com este documento e combinado com o anterior.
+    """
+    modelo = _MODELOS_CABECALHO.get(codigo_condominio)
+    if modelo is not None:
+        _MODELOS_CABECALHO.move_to_end(codigo_condominio)
+        if modelo.cobre(paginas, string_identificadora):
+            return modelo
+
+    novo = aprender_modelo_cabecalho(paginas, string_identificadora)
+    if not novo.valido():
+        return modelo if modelo is not None else novo
+    if modelo is not None:
+        novo = modelo.combinar(novo)
+    if codigo_condominio is not None:
+        _MODELOS_CABECALHO[codigo_condominio] = novo
+        if len(_MODELOS_CABECALHO) > TAMANHO_CACHE_MODELOS:
+            _MODELOS_CABECALHO.popitem(last=False)
+    return novo
+
+def remover_headers_paginas_linhas(paginas: Iterable[str], string_identificadora: str, modelo: ModeloCabecalho) -> Iterator[str]:
+    """
+    Gera as linhas não vazias de cada página sem o cabeçalho.
+
+    O topo da página até a identificação do condomínio é descartado se a
+    identificação aparecer dentro da altura do modelo (+ MARGEM_CABECALHO);
+    isso cobre linhas variáveis como data e número da página. No restante
+    dessa faixa do topo, uma linha só é descartada se for idêntica a uma
+    linha do modelo, de modo que uma página sem a identificação nunca é
+    perdida inteira; abaixo dela nada é descartado.
+    """
+    limite = modelo.altura + MARGEM_CABECALHO
+    linhas_modelo = modelo.linhas
+
+    for pagina in paginas:
+        linhas = pagina.split('\n')
+
+        inicio_corpo = 0
+        for i in range(min(limite, len(linhas))):
+            if string_identificadora in linhas[i]:
+                inicio_corpo = i + 1
+                break
+
+        for i in range(inicio_corpo, len(linhas)):
+            linha = linhas[i]
+            linha_limpa = linha.strip()
+            if linha_limpa and (i >= limite or linha_limpa not in linhas_modelo):
+                yield linha
+
+def remover_headers_paginas(paginas: Iterable[str], string_identificadora: str, modelo: ModeloCabecalho) -> str:
+    """Como remover_headers, mas página a página (ver remover_headers_paginas_linhas)."""
+    return "\n".join(remover_headers_paginas_linhas(paginas, string_identificadora, modelo))
 
 
 # extrai saldos
@@ -79,9 +448,10 @@ def parsear_bloco_saldos(texto_bruto: str) -> list[dict]:
     """
     Extrai o Resumo Financeiro Contábil e estrutura os saldos das contas.
     """
-    linhas = texto_bruto.split('\n')
+    linhas = _iter_linhas(texto_bruto)
     dados_saldos = {}
     texto_filtrado = []
+    indices_filtrados = []
     contas = [] 
 
     MARCADOR_INICIO = "Resumo Financeiro Contábil"
@@ -90,11 +460,11 @@ def parsear_bloco_saldos(texto_bruto: str) -> list[dict]:
     # Regex para capturar os 4 valores no formato BR (opcionalmente negativo) no final da linha
     # Ex: -1.822,42 282.666,22 286.671,27 -5.827,47
     # Padrão: 4 grupos de números com formatação BR e opcionalmente sinal de menos (com espaços ao redor) no final da string ($)
-    REGEX_VALORES = r'([\-]?\s*\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s+([\-]?\s*\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s+([\-]?\s*\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s+([\-]?\s*\d{1,3}(?:\.\d{3})*(?:,\d{2})?)\s*$'
+    REGEX_VALORES = PADROES["saldos_valores"]
 
     dentro_bloco = False
     
-    for linha in linhas:
+    for i, linha in enumerate(linhas):
         linha_limpa = linha.strip()
         
         if MARCADOR_INICIO in linha_limpa:
@@ -102,7 +472,7 @@ def parsear_bloco_saldos(texto_bruto: str) -> list[dict]:
             continue # Ignora a linha do cabeçalho da tabela
                     
         if dentro_bloco and linha_limpa:
-            match = re.search(REGEX_VALORES, linha_limpa)
+            match = REGEX_VALORES.search(linha_limpa)
             
             if match:
                 # Os 4 valores são capturados pelos grupos do regex
@@ -111,15 +481,15 @@ def parsear_bloco_saldos(texto_bruto: str) -> list[dict]:
                 # A chave (nome da conta) é o restante da linha
                 nome_conta = vizei_utils.normalize(linha_limpa[:match.start()].strip())
                 
-                # Converte os 4 valores para float
-                valores_float = [vizei_utils.str_br_to_float(v) for v in valores_str]
+                # Converte os 4 valores para centavos
+                valores_centavos = vizei_utils.str_br_to_centavos_lote(valores_str)
 
                 # Adiciona ao resultado no formato solicitado
                 dados_saldos[nome_conta]= {
-                        'anterior': valores_float[0],
-                        'credito': valores_float[1],
-                        'debito': valores_float[2],
-                        'atual': valores_float[3]
+                        'anterior': valores_centavos[0],
+                        'credito': valores_centavos[1],
+                        'debito': valores_centavos[2],
+                        'atual': valores_centavos[3]
                     }
                 
                 contas.append(nome_conta)
@@ -127,6 +497,7 @@ def parsear_bloco_saldos(texto_bruto: str) -> list[dict]:
         # 3. Adiciona a linha APENAS se não for um cabeçalho
         if not dentro_bloco and linha_limpa:
             texto_filtrado.append(linha)
+            indices_filtrados.append(i)
 
         if MARCADOR_FIM in linha_limpa:
             # Encerra o parsing quando encontra o Total (conforme solicitado)
@@ -136,7 +507,7 @@ def parsear_bloco_saldos(texto_bruto: str) -> list[dict]:
             continue 
         
                 
-    return (dados_saldos, "\n".join(texto_filtrado))
+    return (dados_saldos, _restante_mantidas(texto_bruto, texto_filtrado, indices_filtrados))
 
 
 #
@@ -144,36 +515,38 @@ def parsear_bloco_saldos(texto_bruto: str) -> list[dict]:
 #
 
 def parse_blocos_contas(texto, contas):
-    CONTAS = contas
-
     linhas = texto.splitlines()
 
+    # Nome da conta em maiúsculas → conta (vale a primeira da lista, como na
+    # comparação linha a linha com cada conta)
+    indice_contas = {}
+    for conta in contas:
+        indice_contas.setdefault(conta.upper(), conta)
+
     blocos_inicio = []
+    idx_cotas_aberto = None
 
-    # Encontrar inícios de blocos
-    for i, linha in enumerate(linhas):
-        normalized = vizei_utils.normalize(linha.strip().upper())
-        for conta in CONTAS:
-            if normalized == conta.upper():
-                blocos_inicio.append((conta, i))
-                break
+    # Uma passada: inícios de blocos e linha da seção de cotas em aberto
+    for i, (linha, normalized) in enumerate(zip(linhas, vizei_utils.normalize_many(linhas))):
+        conta = indice_contas.get(normalized)
+        if conta is not None:
+            blocos_inicio.append((conta, i))
+        if idx_cotas_aberto is None and "RELAÇÃO DE COTAS EM ABERTO" in linha.upper():
+            idx_cotas_aberto = i
 
     if not blocos_inicio:
         raise ValueError("Nenhum bloco encontrado.")
 
-    # Encontrar linha da seção de cotas em aberto
-    idx_cotas_aberto = None
-    for i, linha in enumerate(linhas):
-        if "RELAÇÃO DE COTAS EM ABERTO" in linha.upper():
-            idx_cotas_aberto = i
-            break
-
     if idx_cotas_aberto is None:
         raise ValueError("Linha 'RELAÇÃO DE COTAS EM ABERTO' não encontrada.")
 
+    # Contas que abrem algum bloco: uma delas encerra o bloco anterior
+    nomes_blocos = {conta.upper() for conta, _ in blocos_inicio}
+
     blocos = []
 
-    # Processar cada bloco
+    # Processar cada bloco. Cada um só olha as linhas até o início do próximo,
+    # então o conjunto dos blocos é uma única varredura do documento.
     for idx, (conta, start_idx) in enumerate(blocos_inicio):
         if idx < len(blocos_inicio) - 1:
             limite_busca = blocos_inicio[idx + 1][1]
@@ -190,11 +563,8 @@ def parse_blocos_contas(texto, contas):
                 break
         
             # 2) Se achar outra conta → encerra imediatamente antes dessa linha
-            for outra_conta, _ in blocos_inicio:
-                if linha_up == outra_conta.upper():
-                    end_idx = j - 1
-                    break
-            if end_idx is not None:
+            if linha_up in nomes_blocos:
+                end_idx = j - 1
                 break
         
         # 3) Se não encontrou nada, encerra no limite - 1
@@ -259,26 +629,26 @@ def parse_blocos_contas(texto, contas):
 def parsear_despesas_ordinarias(texto_bruto: str) -> dict:
     """
     Extrai as despesas da seção ORDINÁRIA (CONTA CORRENTE), incluindo o total das despesas.
+
+    Linear no número de linhas: cada linha é visitada uma vez e só olha a seguinte.
     """
-    linhas = texto_bruto.split('\n')
+    linhas = _lista_linhas(texto_bruto)
+    total_linhas = len(linhas)
     despesas_estruturadas = {}
     total_despesas = None
     texto_filtrado = []
+    indices_filtrados = []
     categorias = []
+    categorias_vistas = set()
     
     # Marcadores de Início e Fim (para delimitar a seção)
     MARCADOR_INICIO = "ORDINÁRIA (CONTA CORRENTE)"
     MARCADOR_FIM_SECAO = "TOTAL DAS DESPESAS"
     
-    # 1. Regex para identificar um valor colado ao início do texto (Linha Normal)
-    REGEX_VALOR_COLADO = r'^\s*(\d{1,3}(?:\.\d{3})*,\d{2})(.*)$'
-
-    # 2. Regex para identificar a linha de Subtotal (3 valores colados) - ÚLTIMA LINHA
-    REGEX_SUBTOTAL = r'^\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s+(\d{1,3}(?:\.\d{3})*,\d{2})\s+([\d,.]+%)(.*)$'
-    
-    # 3. Novo Regex para capturar o Total das Despesas
-    # Ex: "TOTAL DAS DESPESAS 277.442,27"
-    REGEX_TOTAL_FINAL = r'^\s*TOTAL DAS DESPESAS\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
+    # Padrões (PADROES):
+    # 1. despesa_valor_colado: valor colado ao início do texto (Linha Normal)
+    # 2. despesa_subtotal: linha de Subtotal (3 valores colados) - ÚLTIMA LINHA
+    # 3. despesa_total_final: Total das Despesas, ex: "TOTAL DAS DESPESAS 277.442,27"
     
     dentro_bloco = False
     categoria_atual = None
@@ -289,30 +659,32 @@ def parsear_despesas_ordinarias(texto_bruto: str) -> dict:
         # A. Início do bloco de despesas
         if MARCADOR_INICIO in linha_limpa:
             # Verifica se a próxima linha contém o "Demonstrativo de Despesas"
-            if linhas.index(linha) + 1 < len(linhas) and "Demonstrativo de Despesas" in linhas[linhas.index(linha) + 1]:
+            if i + 1 < total_linhas and "Demonstrativo de Despesas" in linhas[i + 1]:
                 dentro_bloco = True
                 continue
         
         if not dentro_bloco:
             # Se não estamos no bloco de despesas, passamos para a próxima linha
             texto_filtrado.append(linha)
+            indices_filtrados.append(i)
             continue
         
         # B. Fim do bloco de despesas e captura do Total
         if MARCADOR_FIM_SECAO in linha_limpa:
-            match_total = re.search(REGEX_TOTAL_FINAL, linha_limpa)
+            match_total = PADROES["despesa_total_final"].search(linha_limpa)
             if match_total:
-                total_despesas = vizei_utils.str_br_to_float(match_total.group(1))
+                total_despesas = vizei_utils.str_br_to_centavos(match_total.group(1))
             texto_filtrado.extend(linhas[i + 1:])
+            indices_filtrados.extend(range(i + 1, total_linhas))
             dentro_bloco = False
             break # Interrompe o loop após encontrar o total final
             
         # C. Identificação da Categoria
-        if linha_limpa.isupper() and not any(char.isdigit() for char in linha_limpa):
+        if linha_limpa.isupper() and not any(map(str.isdigit, linha_limpa)):
             if linha_limpa not in ("HISTÓRICO TOTALVALOR", "ORDINÁRIA (CONTA CORRENTE)", "DEMONSTRATIVO DE DESPESAS"):
                 categoria_atual = linha_limpa
                 despesas_estruturadas[categoria_atual] = {
-                    'subtotal': 0.0,
+                    'subtotal': 0,
                     'despesas': []
                 }
                 continue
@@ -321,16 +693,19 @@ def parsear_despesas_ordinarias(texto_bruto: str) -> dict:
         if categoria_atual:
             
             # adiciona categoria na lista de categorias
-            if categoria_atual not in categorias:
+            if categoria_atual not in categorias_vistas:
+                categorias_vistas.add(categoria_atual)
                 categorias.append(categoria_atual)
 
-            # Tenta o Regex de Subtotal (3 valores)
-            match_subtotal = re.search(REGEX_SUBTOTAL, linha_limpa)
-            if match_subtotal:
-                subtotal_valor = vizei_utils.str_br_to_float(match_subtotal.group(2))
+            # Subtotal (3 valores, com '%') ou valor colado (Linha Normal)
+            nome_padrao, match = despachar_linha(linha_limpa, DESPACHO_DESPESAS, "despesa_valor_colado")
+
+            if nome_padrao == "despesa_subtotal":
+                match_subtotal = match
+                subtotal_valor = vizei_utils.str_br_to_centavos(match_subtotal.group(2))
                 despesas_estruturadas[categoria_atual]['subtotal'] = subtotal_valor
                 
-                valor_despesa = vizei_utils.str_br_to_float(match_subtotal.group(1))
+                valor_despesa = vizei_utils.str_br_to_centavos(match_subtotal.group(1))
                 historico_despesa = match_subtotal.group(4).strip()
                 
                 if valor_despesa > 0:
@@ -342,10 +717,9 @@ def parsear_despesas_ordinarias(texto_bruto: str) -> dict:
                 categoria_atual = None # Encerra a categoria
                 continue
 
-            # Tenta o Regex de Valor Colado (Linha Normal)
-            match_normal = re.search(REGEX_VALOR_COLADO, linha_limpa)
-            if match_normal:
-                valor = vizei_utils.str_br_to_float(match_normal.group(1))
+            if nome_padrao == "despesa_valor_colado":
+                match_normal = match
+                valor = vizei_utils.str_br_to_centavos(match_normal.group(1))
                 historico = match_normal.group(2).strip()
                 
                 if valor > 0:
@@ -363,7 +737,7 @@ def parsear_despesas_ordinarias(texto_bruto: str) -> dict:
                   "CATEGORIAS": categorias,
                   **despesas_estruturadas}
         
-    return (output, "\n".join(texto_filtrado))
+    return (output, _restante_mantidas(texto_bruto, texto_filtrado, indices_filtrados))
 
 def parsear_resumo_emissoes_colunado(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
     """
@@ -376,7 +750,7 @@ def parsear_resumo_emissoes_colunado(texto_bruto: str) -> Tuple[Dict[str, Any],
         Uma tupla contendo o objeto de resumo parseado e o texto restante.
     """
     
-    linhas = texto_bruto.split('\n')
+    linhas = _lista_linhas(texto_bruto)
     
     # --- Marcadores e Regex ---
     
@@ -384,15 +758,15 @@ def parsear_resumo_emissoes_colunado(texto_bruto: str) -> Tuple[Dict[str, Any],
     MARCADOR_FIM_KEY = "COTAS REC. DE COBRANÇA"
     
     # Regex para a linha Total (dois valores colados) - Ex: 274.733,71418.878,75
-    REGEX_LINHA_TOTAL = r'^\s*(\d{1,3}(?:\.\d{3})*,\d{2})(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
+    REGEX_LINHA_TOTAL = PADROES["dois_valores_colados"]
     
     # Regex para a linha de Fim (COTAS REC. DE COBRANÇA com um único valor)
     # A linha que define o FIM deve ser "COTAS REC. DE COBRANÇA         EM 31/12/2024 144.145,04"
-    REGEX_LINHA_FIM_SIMPLES = r'^(.*?)\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
+    REGEX_LINHA_FIM_SIMPLES = PADROES["item_simples"]
     
     # Regex para linhas de item normal (descrição + 2 valores colados)
     # Ex: COTAS REC. DE COBRANÇA EM 30/11/2024 19.870,83141.032,88
-    REGEX_ITEM_COLUNADO = r'^(.*?)\s*(\d{1,3}(?:\.\d{3})*,\d{2})(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
+    REGEX_ITEM_COLUNADO = PADROES["item_colunado"]
 
     # --- Estrutura de Retorno (Baseada no Output Desejado) ---
     resumo_emissao: Dict[str, Any] = {
@@ -421,17 +795,17 @@ def parsear_resumo_emissoes_colunado(texto_bruto: str) -> Tuple[Dict[str, Any],
         if linha_limpa.startswith(MARCADOR_FIM_KEY):
             
             # Checa se é a linha de FIM (Regra: linha que possui APENAS um valor, logo após o total)
-            match_fim = re.search(REGEX_LINHA_FIM_SIMPLES, linha_limpa)
+            match_fim = REGEX_LINHA_FIM_SIMPLES.search(linha_limpa)
             
             # Se a linha de total já foi processada (ver C) E se é uma linha com apenas um valor
             if resumo_emissao['total']['previsto'] is not None and match_fim:
                 
                 # Captura dados da linha de FIM
                 descricao_completa = match_fim.group(1).strip()
-                valor_realizado = vizei_utils.str_br_to_float(match_fim.group(2))
+                valor_realizado = vizei_utils.str_br_to_centavos(match_fim.group(2))
                 
                 # Extrai a data da descrição
-                match_data = re.search(r'(\d{2}/\d{2}/\d{4})$', descricao_completa)
+                match_data = PADROES["data_final"].search(descricao_completa)
                 data_fim = match_data.group(1) if match_data else None
 
                 # Adiciona o item de Fim ao resumo
@@ -444,30 +818,30 @@ def parsear_resumo_emissoes_colunado(texto_bruto: str) -> Tuple[Dict[str, Any],
                 dentro_bloco = False
                 break
         
-        # C. Linha de Total (dois valores colados)
-        match_total = re.search(REGEX_LINHA_TOTAL, linha_limpa)
+        # C. Linha de Total (dois valores colados): só linhas que começam com dígito
+        match_total = REGEX_LINHA_TOTAL.match(linha_limpa) if linha_limpa[:1].isdigit() else None
         if match_total:
             # Captura os valores totais
             realizado_str = match_total.group(1)
             previsto_str = match_total.group(2)
             
-            resumo_emissao["total"]["realizado"] = vizei_utils.str_br_to_float(realizado_str)
-            resumo_emissao["total"]["previsto"] = vizei_utils.str_br_to_float(previsto_str)
+            resumo_emissao["total"]["realizado"] = vizei_utils.str_br_to_centavos(realizado_str)
+            resumo_emissao["total"]["previsto"] = vizei_utils.str_br_to_centavos(previsto_str)
             continue # Não adiciona a linha total como item, apenas atualiza o objeto total
             
         # D. Linhas de Itens (Descrições)
-        match_item = re.search(REGEX_ITEM_COLUNADO, linha_limpa)
+        match_item = REGEX_ITEM_COLUNADO.search(linha_limpa)
         if match_item:
             descricao_completa = match_item.group(1).strip()
-            realizado = vizei_utils.str_br_to_float(match_item.group(2))
-            previsto = vizei_utils.str_br_to_float(match_item.group(3))
+            realizado = vizei_utils.str_br_to_centavos(match_item.group(2))
+            previsto = vizei_utils.str_br_to_centavos(match_item.group(3))
             
             # Tenta extrair a data se o item for 'COTAS REC. DE COBRANÇA'
             data_item = None
             chave_resumo = descricao_completa
             if descricao_completa.startswith(MARCADOR_FIM_KEY):
                 chave_resumo = MARCADOR_FIM_KEY + f" {i}" # Chave única para o dicionário de saída
-                match_data = re.search(r'(\d{2}/\d{2}/\d{4})$', descricao_completa)
+                match_data = PADROES["data_final"].search(descricao_completa)
                 data_item = match_data.group(1) if match_data else None
             
             resumo_emissao[chave_resumo] = {
@@ -478,30 +852,22 @@ def parsear_resumo_emissoes_colunado(texto_bruto: str) -> Tuple[Dict[str, Any],
             continue
 
     if not bloco_encontrado:
-        return ({"erro": "Bloco de Resumo de Emissões Colunado não encontrado."}, texto_bruto)
+        return ({"erro": "Bloco de Resumo de Emissões Colunado não encontrado."}, _texto(texto_bruto, linhas))
     
     if end_index == -1:
-        return ({"erro": "Linha de FIM (COTAS REC. DE COBRANÇA com 1 valor) não foi localizada após o Total."}, texto_bruto)
+        return ({"erro": "Linha de FIM (COTAS REC. DE COBRANÇA com 1 valor) não foi localizada após o Total."}, _texto(texto_bruto, linhas))
 
     # 4. Montar o texto restante (linhas antes do início + linhas depois do fim)
     
     # O bloco extraído vai de start_index até end_index - 1
-    linhas_antes = "\n".join(linhas[:start_index])
-    linhas_depois = "\n".join(linhas[end_index:])
-    
-    texto_restante = (linhas_antes + "\n" + linhas_depois).strip()
+    texto_restante = _restante_sem_intervalo(texto_bruto, linhas, start_index, end_index)
 
     return (resumo_emissao, texto_restante)
 
 def parsear_posicao_financeira(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
-    import re
-    
-    linhas = texto_bruto.split('\n')
+    linhas = _lista_linhas(texto_bruto)
     
     MARCADOR_INICIO = "Posição Financeira CréditoDébito"
-    REGEX_LINHA_TOTAL = r'^\s*TOTAIS\s*(\d{1,3}(?:\.\d{3})*,\d{2})(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-    REGEX_LINHA_SALDO_ATUAL = r'^\s*SALDO ATUAL\s*(CREDOR|DEVEDOR|)\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-    REGEX_ITEM_SIMPLES = r'^(.*?)\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
 
     posicao_financeira: Dict[str, Any] = {
         'total': {'credito': None, 'debito': None},
@@ -526,38 +892,40 @@ def parsear_posicao_financeira(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
         if not dentro_bloco:
             continue
         
+        nome_padrao, match = despachar_linha(linha_limpa, DESPACHO_POSICAO, "item_simples")
+
         # B. Saldo Atual
-        match_saldo_atual = re.search(REGEX_LINHA_SALDO_ATUAL, linha_limpa)
-        if match_saldo_atual:
+        if nome_padrao == "saldo_atual":
+            match_saldo_atual = match
             tipo_saldo = match_saldo_atual.group(1).strip()
             valor_saldo_str = match_saldo_atual.group(2)
-            valor_float = vizei_utils.str_br_to_float(valor_saldo_str)
+            valor_centavos = vizei_utils.str_br_to_centavos(valor_saldo_str)
             chave = f"SALDO ATUAL {tipo_saldo}".strip()
 
             # SUPORTE A DUPLICIDADES
             posicao_financeira['itens'].setdefault(chave, [])
-            posicao_financeira['itens'][chave].append({"valor": valor_float})
+            posicao_financeira['itens'][chave].append({"valor": valor_centavos})
 
             end_index = i + 1
             dentro_bloco = False
             break
             
         # C. Totais
-        match_total = re.search(REGEX_LINHA_TOTAL, linha_limpa)
-        if match_total:
-            posicao_financeira["total"]["credito"] = vizei_utils.str_br_to_float(match_total.group(1))
-            posicao_financeira["total"]["debito"]  = vizei_utils.str_br_to_float(match_total.group(2))
+        if nome_padrao == "totais":
+            match_total = match
+            posicao_financeira["total"]["credito"] = vizei_utils.str_br_to_centavos(match_total.group(1))
+            posicao_financeira["total"]["debito"]  = vizei_utils.str_br_to_centavos(match_total.group(2))
             continue
             
         # D. Itens normais
-        match_item = re.search(REGEX_ITEM_SIMPLES, linha_limpa)
-        if match_item:
+        if nome_padrao == "item_simples":
+            match_item = match
             descricao = match_item.group(1).strip()
-            valor = vizei_utils.str_br_to_float(match_item.group(2))
+            valor = vizei_utils.str_br_to_centavos(match_item.group(2))
             item = {"valor": valor}
 
             # Extrair data se existir
-            match_data = re.search(r'(\d{2}/\d{2}/\d{4})$', descricao)
+            match_data = PADROES["data_final"].search(descricao)
             if match_data:
                 item["date"] = match_data.group(1)
                 descricao = descricao.replace(match_data.group(1), "").strip()
@@ -574,15 +942,13 @@ def parsear_posicao_financeira(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             continue
 
     if not bloco_encontrado:
-        return ({"erro": "Bloco de Posição Financeira não encontrado."}, texto_bruto)
+        return ({"erro": "Bloco de Posição Financeira não encontrado."}, _texto(texto_bruto, linhas))
     
     if end_index == -1:
-        return ({"erro": "Linha de FIM (SALDO ATUAL) não foi localizada."}, texto_bruto)
+        return ({"erro": "Linha de FIM (SALDO ATUAL) não foi localizada."}, _texto(texto_bruto, linhas))
 
     # Texto restante
-    linhas_antes = "\n".join(linhas[:start_index])
-    linhas_depois = "\n".join(linhas[end_index:])
-    texto_restante = (linhas_antes + "\n" + linhas_depois).strip()
+    texto_restante = _restante_sem_intervalo(texto_bruto, linhas, start_index, end_index)
 
     # Se só existir 1 item por chave → manter formato original
     itens_normalizados = {}
@@ -613,24 +979,17 @@ def parsear_fundo_de_reserva(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
         Uma tupla contendo o objeto de fundo de reserva parseado e o texto restante.
     """
     
-    linhas = texto_bruto.split('\n')
+    linhas = _lista_linhas(texto_bruto)
     
     # --- Marcadores e Regex ---
     
     MARCADOR_INICIO_1 = "FUNDO DE RESERVA"
     MARCADOR_INICIO_2 = "Posição Financeira CréditoDébito" # Segunda linha do início
     
-    # Regex para a linha Total (dois valores colados: Crédito e Débito)
-    # Ex: TOTAIS 168.280,3730.077,83
-    REGEX_LINHA_TOTAL = r'^\s*TOTAIS\s*(\d{1,3}(?:\.\d{3})*,\d{2})(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-    
-    # Regex para a linha de Fim (Saldo Atual)
-    # Ex: SALDO ATUAL CREDOR 138.202,54
-    REGEX_LINHA_SALDO_ATUAL = r'^\s*SALDO ATUAL\s*(CREDOR|DEVEDOR|)\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-    
-    # Regex para linhas de item normal (descrição + 1 valor no final)
-    # Ex: APLICAÇÃO 9.229,00
-    REGEX_ITEM_SIMPLES = r'^(.*?)\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
+    # Padrões (PADROES, escolhidos por DESPACHO_POSICAO):
+    # totais: linha Total (dois valores colados: Crédito e Débito). Ex: TOTAIS 168.280,3730.077,83
+    # saldo_atual: linha de Fim (Saldo Atual). Ex: SALDO ATUAL CREDOR 138.202,54
+    # item_simples: item normal (descrição + 1 valor no final). Ex: APLICAÇÃO 9.229,00
 
 
     # --- Estrutura de Retorno ---
@@ -660,9 +1019,11 @@ def parsear_fundo_de_reserva(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
         if not dentro_bloco:
             continue
         
+        nome_padrao, match = despachar_linha(linha_limpa, DESPACHO_POSICAO, "item_simples")
+
         # B. Linha de Fim (Saldo Atual)
-        match_saldo_atual = re.search(REGEX_LINHA_SALDO_ATUAL, linha_limpa)
-        if match_saldo_atual:
+        if nome_padrao == "saldo_atual":
+            match_saldo_atual = match
             # Captura o saldo atual e termina
             tipo_saldo = match_saldo_atual.group(1).strip() if match_saldo_atual.group(1) else ""
             valor_saldo_str = match_saldo_atual.group(2)
@@ -671,7 +1032,7 @@ def parsear_fundo_de_reserva(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             
             # Adiciona ao objeto principal (nível 1, como os demais itens)
             fundo_reserva[chave_saldo] = {
-                'valor': vizei_utils.str_br_to_float(valor_saldo_str)
+                'valor': vizei_utils.str_br_to_centavos(valor_saldo_str)
             }
             
             end_index = i + 1 # Próxima linha é o fim do bloco de extração
@@ -679,27 +1040,27 @@ def parsear_fundo_de_reserva(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             break
             
         # C. Linha de Total (Crédito e Débito)
-        match_total = re.search(REGEX_LINHA_TOTAL, linha_limpa)
-        if match_total:
+        if nome_padrao == "totais":
+            match_total = match
             # Captura os valores totais
             credito_str = match_total.group(1)
             debito_str = match_total.group(2)
             
-            fundo_reserva["total"]["credito"] = vizei_utils.str_br_to_float(credito_str)
-            fundo_reserva["total"]["debito"] = vizei_utils.str_br_to_float(debito_str)
+            fundo_reserva["total"]["credito"] = vizei_utils.str_br_to_centavos(credito_str)
+            fundo_reserva["total"]["debito"] = vizei_utils.str_br_to_centavos(debito_str)
             continue 
             
         # D. Linhas de Itens (Descrições e valores)
-        match_item = re.search(REGEX_ITEM_SIMPLES, linha_limpa)
-        if match_item:
+        if nome_padrao == "item_simples":
+            match_item = match
             descricao_completa = match_item.group(1).strip()
-            valor = vizei_utils.str_br_to_float(match_item.group(2))
+            valor = vizei_utils.str_br_to_centavos(match_item.group(2))
             
             item_data: Dict[str, Any] = {"valor": valor}
             
             # Tenta extrair a data se for uma linha de SALDO ANTERIOR
             if descricao_completa.startswith("SALDO ANTERIOR"):
-                match_data = re.search(r'(\d{2}/\d{2}/\d{4})$', descricao_completa)
+                match_data = PADROES["data_final"].search(descricao_completa)
                 if match_data:
                     item_data['date'] = match_data.group(1)
             
@@ -708,18 +1069,15 @@ def parsear_fundo_de_reserva(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             continue
 
     if not bloco_encontrado:
-        return ({"erro": "Bloco de Fundo de Reserva não encontrado."}, texto_bruto)
+        return ({"erro": "Bloco de Fundo de Reserva não encontrado."}, _texto(texto_bruto, linhas))
     
     if end_index == -1:
-        return ({"erro": "Linha de FIM (SALDO ATUAL) não foi localizada."}, texto_bruto)
+        return ({"erro": "Linha de FIM (SALDO ATUAL) não foi localizada."}, _texto(texto_bruto, linhas))
 
     # 4. Montar o texto restante (linhas antes do início + linhas depois do fim)
     
     # O bloco extraído vai de start_index até end_index - 1
-    linhas_antes = "\n".join(linhas[:start_index])
-    linhas_depois = "\n".join(linhas[end_index:])
-    
-    texto_restante = (linhas_antes + "\n" + linhas_depois).strip()
+    texto_restante = _restante_sem_intervalo(texto_bruto, linhas, start_index, end_index)
 
     # Formata a saída para o padrão solicitado (envolvido por "fundo_de_reserva")
     final_output = {
@@ -739,7 +1097,7 @@ def parsear_sabesp_comgas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
         Uma tupla contendo o objeto parseado e o texto restante.
     """
     
-    linhas = texto_bruto.split('\n')
+    linhas = _lista_linhas(texto_bruto)
     
     # --- Funções Auxiliares (Lógica herdada dos parsers anteriores) ---
 
@@ -753,8 +1111,8 @@ def parsear_sabesp_comgas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             'itens': {}
         }
         
-        REGEX_LINHA_TOTAL = r'^\s*(\d{1,3}(?:\.\d{3})*,\d{2})(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-        REGEX_ITEM_COLUNADO = r'^(.*?)\s*(\d{1,3}(?:\.\d{3})*,\d{2})(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
+        REGEX_LINHA_TOTAL = PADROES["dois_valores_colados"]
+        REGEX_ITEM_COLUNADO = PADROES["item_colunado"]
         MARCADOR_FIM_KEY = "COTAS REC. DE COBRANÇA"
         
         # O parse começa após "Resumo de Emissões Colunado RealizadoPrevisto" (índice 0)
@@ -764,23 +1122,22 @@ def parsear_sabesp_comgas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
         while i < len(sub_linhas):
             linha_limpa = sub_linhas[i].strip()
 
-            # 1. Linha de Total (dois valores colados)
-            match_total = re.search(REGEX_LINHA_TOTAL, linha_limpa)
+            # 1. Linha de Total (dois valores colados): só linhas que começam com dígito
+            match_total = REGEX_LINHA_TOTAL.match(linha_limpa) if linha_limpa[:1].isdigit() else None
             if match_total:
-                resumo_emissao["total"]["realizado"] = vizei_utils.str_br_to_float(match_total.group(1))
-                resumo_emissao["total"]["previsto"] = vizei_utils.str_br_to_float(match_total.group(2))
+                resumo_emissao["total"]["realizado"] = vizei_utils.str_br_to_centavos(match_total.group(1))
+                resumo_emissao["total"]["previsto"] = vizei_utils.str_br_to_centavos(match_total.group(2))
                 i += 1
                 ultima_linha_consumida = i - 1
                 continue
             
             # 2. Linha de Fim (COTAS REC. DE COBRANÇA com 1 valor, logo após o total)
             if linha_limpa.startswith(MARCADOR_FIM_KEY) and resumo_emissao["total"]["realizado"] is not None:
-                REGEX_LINHA_FIM_SIMPLES = r'^(.*?)\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-                match_fim = re.search(REGEX_LINHA_FIM_SIMPLES, linha_limpa)
+                match_fim = PADROES["item_simples"].search(linha_limpa)
                 if match_fim:
                     descricao_completa = match_fim.group(1).strip()
-                    valor_realizado = vizei_utils.str_br_to_float(match_fim.group(2))
-                    match_data = re.search(r'(\d{2}/\d{2}/\d{4})$', descricao_completa)
+                    valor_realizado = vizei_utils.str_br_to_centavos(match_fim.group(2))
+                    match_data = PADROES["data_final"].search(descricao_completa)
                     data_fim = match_data.group(1) if match_data else None
 
                     resumo_emissao[MARCADOR_FIM_KEY] = {
@@ -791,20 +1148,20 @@ def parsear_sabesp_comgas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
                     return (resumo_emissao, ultima_linha_consumida) # FIM do sub-bloco
                 
             # 3. Linhas de Itens
-            match_item = re.search(REGEX_ITEM_COLUNADO, linha_limpa)
+            match_item = REGEX_ITEM_COLUNADO.search(linha_limpa)
             if match_item:
                 descricao_completa = match_item.group(1).strip()
-                realizado = vizei_utils.str_br_to_float(match_item.group(2))
-                previsto = vizei_utils.str_br_to_float(match_item.group(3))
+                realizado = vizei_utils.str_br_to_centavos(match_item.group(2))
+                previsto = vizei_utils.str_br_to_centavos(match_item.group(3))
                 
                 item_data: Dict[str, Any] = {"realizado": realizado, "previsto": previsto}
                 
                 if descricao_completa.startswith(MARCADOR_FIM_KEY):
-                    match_data = re.search(r'(\d{2}/\d{2}/\d{4})$', descricao_completa)
+                    match_data = PADROES["data_final"].search(descricao_completa)
                     item_data['date'] = match_data.group(1) if match_data else None
                 
                 # Usa a descrição limpa como chave, ignorando a data
-                chave = re.sub(r'\s+EM\s+\d{2}/\d{2}/\d{4}$', '', descricao_completa).strip()
+                chave = PADROES["sufixo_em_data"].sub('', descricao_completa).strip()
                 resumo_emissao['itens'][chave] = item_data
                 
             i += 1
@@ -818,10 +1175,6 @@ def parsear_sabesp_comgas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
         posicao_financeira: Dict[str, Any] = {
             'total': {'credito': None, 'debito': None},
         }
-        
-        REGEX_LINHA_TOTAL = r'^\s*TOTAIS\s*(\d{1,3}(?:\.\d{3})*,\d{2})(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-        REGEX_LINHA_SALDO_ATUAL = r'^\s*SALDO ATUAL\s*(CREDOR|DEVEDOR|)\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-        REGEX_ITEM_SIMPLES = r'^(.*?)\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
 
         # O parse começa após "Posição Financeira CréditoDébito" (índice 0)
         i = 1 
@@ -830,37 +1183,39 @@ def parsear_sabesp_comgas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
         while i < len(sub_linhas):
             linha_limpa = sub_linhas[i].strip()
 
+            nome_padrao, match = despachar_linha(linha_limpa, DESPACHO_POSICAO, "item_simples")
+
             # 1. Linha de Fim (Saldo Atual)
-            match_saldo_atual = re.search(REGEX_LINHA_SALDO_ATUAL, linha_limpa)
-            if match_saldo_atual:
+            if nome_padrao == "saldo_atual":
+                match_saldo_atual = match
                 tipo_saldo = match_saldo_atual.group(1).strip() if match_saldo_atual.group(1) else ""
                 valor_saldo_str = match_saldo_atual.group(2)
                 chave_saldo = f"SALDO ATUAL {tipo_saldo}".strip()
                 
-                posicao_financeira[chave_saldo] = {'valor': vizei_utils.str_br_to_float(valor_saldo_str)}
+                posicao_financeira[chave_saldo] = {'valor': vizei_utils.str_br_to_centavos(valor_saldo_str)}
                 
                 ultima_linha_consumida = i
                 return (posicao_financeira, ultima_linha_consumida) # FIM do sub-bloco
             
             # 2. Linha de Total
-            match_total = re.search(REGEX_LINHA_TOTAL, linha_limpa)
-            if match_total:
-                posicao_financeira["total"]["credito"] = vizei_utils.str_br_to_float(match_total.group(1))
-                posicao_financeira["total"]["debito"] = vizei_utils.str_br_to_float(match_total.group(2))
+            if nome_padrao == "totais":
+                match_total = match
+                posicao_financeira["total"]["credito"] = vizei_utils.str_br_to_centavos(match_total.group(1))
+                posicao_financeira["total"]["debito"] = vizei_utils.str_br_to_centavos(match_total.group(2))
                 i += 1
                 ultima_linha_consumida = i - 1
                 continue 
                 
             # 3. Linhas de Itens
-            match_item = re.search(REGEX_ITEM_SIMPLES, linha_limpa)
-            if match_item:
+            if nome_padrao == "item_simples":
+                match_item = match
                 descricao_completa = match_item.group(1).strip()
-                valor = vizei_utils.str_br_to_float(match_item.group(2))
+                valor = vizei_utils.str_br_to_centavos(match_item.group(2))
                 
                 item_data: Dict[str, Any] = {"valor": valor}
                 
                 if descricao_completa.startswith("SALDO ANTERIOR"):
-                    match_data = re.search(r'(\d{2}/\d{2}/\d{4})$', descricao_completa)
+                    match_data = PADROES["data_final"].search(descricao_completa)
                     if match_data:
                         item_data['date'] = match_data.group(1)
                 
@@ -886,7 +1241,7 @@ def parsear_sabesp_comgas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
                 break
             
     if start_index == -1:
-        return ({"erro": "Bloco SABESP/COMGAS não encontrado."}, texto_bruto)
+        return ({"erro": "Bloco SABESP/COMGAS não encontrado."}, _texto(texto_bruto, linhas))
 
     # 2. Preparar sub-linhas para o Resumo de Emissões (começa no Resumo de Emissões Colunado)
     start_resumo_index = start_index + 1
@@ -920,7 +1275,7 @@ def parsear_sabesp_comgas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             break
             
     if start_posicao_index == -1:
-         return ({"erro": "Bloco de Posição Financeira (SABESP/COMGAS) não encontrado."}, texto_bruto)
+         return ({"erro": "Bloco de Posição Financeira (SABESP/COMGAS) não encontrado."}, _texto(texto_bruto, linhas))
          
     # O bloco de Posição Financeira vai até o fim do texto ou até o próximo bloco (SALÃO DE FESTAS)
     end_posicao_index = len(linhas) 
@@ -956,10 +1311,7 @@ def parsear_sabesp_comgas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
     # 5. Montar o texto restante (tudo que vem antes do início + tudo que vem após o fim da Posição Financeira)
     
     # O bloco extraído vai de start_index até start_posicao_index + ultima_linha_posicao
-    linhas_antes = "\n".join(linhas[:start_index])
-    linhas_depois = "\n".join(linhas[start_posicao_index + ultima_linha_posicao + 1:])
-    
-    texto_restante = (linhas_antes + "\n" + linhas_depois).strip()
+    texto_restante = _restante_sem_intervalo(texto_bruto, linhas, start_index, start_posicao_index + ultima_linha_posicao + 1)
 
     return (final_output, texto_restante)
 
@@ -976,7 +1328,7 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
         Uma tupla contendo o objeto parseado e o texto restante.
     """
     
-    linhas = texto_bruto.split('\n')
+    linhas = _lista_linhas(texto_bruto)
 
     # --- Funções Auxiliares (Lógicas adaptadas) ---
 
@@ -986,13 +1338,9 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             'itens': {}
         }
         
-        REGEX_LINHA_TOTAL = r'^\s*(\d{1,3}(?:\.\d{3})*,\d{2})(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-        REGEX_ITEM_COLUNADO = (
-            r'^(.*?)\s*'
-            r'(-?\d{1,3}(?:\.\d{3})*,\d{2})'
-            r'(?:\s*(-?\d{1,3}(?:\.\d{3})*,\d{2}))?\s*$'
-        )
-        REGEX_ITEM_UNICO = r'^(.*?)\s*(\d{2}/\d{2}/\d{4})\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
+        REGEX_LINHA_TOTAL = PADROES["dois_valores_colados"]
+        REGEX_ITEM_COLUNADO = PADROES["salao_item_colunado"]
+        REGEX_ITEM_UNICO = PADROES["salao_item_unico"]
 
         MARCADOR_DEVEDORES = "DEVEDORES"
         MARCADOR_INICIO_KEY = "DEVEDORES_INICIAL"
@@ -1010,8 +1358,8 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             # 1) Caso especial: DEVEDORES_FINAL quebrado em 2 linhas
             # ---------------------------------------------------------
             if aguardando_dev_final:
-                if re.match(r'^-?\d{1,3}(?:\.\d{3})*,\d{2}$', linha_limpa):
-                    valor_realizado = vizei_utils.str_br_to_float(linha_limpa)
+                if PADROES["salao_valor_isolado"].match(linha_limpa):
+                    valor_realizado = vizei_utils.str_br_to_centavos(linha_limpa)
                     resumo_emissao[MARCADOR_FIM_KEY] = {
                         "date": aguardando_dev_final["date"],
                         "realizado": valor_realizado,
@@ -1026,10 +1374,10 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             # ---------------------------------------------------------
             # 2) Linha TOTAL → ativa lógica "após o total"
             # ---------------------------------------------------------
-            match_total = re.search(REGEX_LINHA_TOTAL, linha_limpa)
+            match_total = REGEX_LINHA_TOTAL.match(linha_limpa) if linha_limpa[:1].isdigit() else None
             if match_total:
-                resumo_emissao["total"]["realizado"] = vizei_utils.str_br_to_float(match_total.group(1))
-                resumo_emissao["total"]["previsto"] = vizei_utils.str_br_to_float(match_total.group(2))
+                resumo_emissao["total"]["realizado"] = vizei_utils.str_br_to_centavos(match_total.group(1))
+                resumo_emissao["total"]["previsto"] = vizei_utils.str_br_to_centavos(match_total.group(2))
                 apos_total = True
                 ultima_linha_consumida = i
                 i += 1
@@ -1038,10 +1386,11 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             # ---------------------------------------------------------
             # 3) DEVEDORES_INICIAL (primeira ocorrência)
             # ---------------------------------------------------------
-            match_unico = re.search(REGEX_ITEM_UNICO, linha_limpa)
-            if linha_limpa.startswith(MARCADOR_DEVEDORES) and resumo_emissao["total"]["previsto"] is None and match_unico:
+            eh_devedores = linha_limpa.startswith(MARCADOR_DEVEDORES)
+            match_unico = REGEX_ITEM_UNICO.search(linha_limpa) if eh_devedores and resumo_emissao["total"]["previsto"] is None else None
+            if match_unico:
                 data = match_unico.group(2)
-                valor_previsto = vizei_utils.str_br_to_float(match_unico.group(3))
+                valor_previsto = vizei_utils.str_br_to_centavos(match_unico.group(3))
                 resumo_emissao[MARCADOR_INICIO_KEY] = {
                     "date": data,
                     "previsto": valor_previsto
@@ -1052,14 +1401,14 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             # ---------------------------------------------------------
             # 4) DEVEDORES_FINAL – pode vir inteiro ou quebrado em 2 linhas
             # ---------------------------------------------------------
-            if linha_limpa.startswith(MARCADOR_DEVEDORES) and apos_total:
+            if eh_devedores and apos_total:
 
                 # Caso 1: tudo na mesma linha → descricao + data + valor
-                match_unico_fim = re.search(REGEX_ITEM_UNICO, linha_limpa)
+                match_unico_fim = REGEX_ITEM_UNICO.search(linha_limpa)
                 if match_unico_fim:
                     descricao = match_unico_fim.group(1).strip()
                     data_fim = match_unico_fim.group(2)
-                    valor_realizado = vizei_utils.str_br_to_float(match_unico_fim.group(3))
+                    valor_realizado = vizei_utils.str_br_to_centavos(match_unico_fim.group(3))
 
                     resumo_emissao[MARCADOR_FIM_KEY] = {
                         "date": data_fim,
@@ -1072,7 +1421,7 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
                     continue
 
                 # Caso 2: linha contém descrição + data, e valor aparece na linha seguinte
-                match_data = re.search(r'(.*?)(\d{2}/\d{2}/\d{4})$', linha_limpa)
+                match_data = PADROES["salao_descricao_data"].search(linha_limpa)
                 if match_data:
                     aguardando_dev_final = {
                         "descricao": match_data.group(1).strip(),
@@ -1084,15 +1433,15 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             # ---------------------------------------------------------
             # 5) Itens gerais
             # ---------------------------------------------------------
-            match_item = re.search(REGEX_ITEM_COLUNADO, linha_limpa)
+            match_item = REGEX_ITEM_COLUNADO.search(linha_limpa)
             if match_item:
                 descricao = match_item.group(1).strip()
-                valor1 = vizei_utils.str_br_to_float(match_item.group(2))
+                valor1 = vizei_utils.str_br_to_centavos(match_item.group(2))
                 valor2_raw = match_item.group(3)
 
                 if valor2_raw:
                     realizado = valor1
-                    previsto = vizei_utils.str_br_to_float(valor2_raw)
+                    previsto = vizei_utils.str_br_to_centavos(valor2_raw)
                 else:
                     # LÓGICA CORRIGIDA:
                     # antes do total → PREVISTO
@@ -1124,10 +1473,6 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
         posicao_financeira: Dict[str, Any] = {
             'total': {'credito': None, 'debito': None},
         }
-        
-        REGEX_LINHA_TOTAL = r'^\s*TOTAIS\s*(\d{1,3}(?:\.\d{3})*,\d{2})(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-        REGEX_LINHA_SALDO_ATUAL = r'^\s*SALDO ATUAL\s*(CREDOR|DEVEDOR|)\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
-        REGEX_ITEM_SIMPLES = r'^(.*?)\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*$'
 
         i = 1 
         ultima_linha_consumida = -1
@@ -1135,37 +1480,39 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
         while i < len(sub_linhas):
             linha_limpa = sub_linhas[i].strip()
 
+            nome_padrao, match = despachar_linha(linha_limpa, DESPACHO_POSICAO, "item_simples")
+
             # 1. Linha de Fim (Saldo Atual)
-            match_saldo_atual = re.search(REGEX_LINHA_SALDO_ATUAL, linha_limpa)
-            if match_saldo_atual:
+            if nome_padrao == "saldo_atual":
+                match_saldo_atual = match
                 tipo_saldo = match_saldo_atual.group(1).strip() if match_saldo_atual.group(1) else ""
                 valor_saldo_str = match_saldo_atual.group(2)
                 chave_saldo = f"SALDO ATUAL {tipo_saldo}".strip()
                 
-                posicao_financeira[chave_saldo] = {'valor': vizei_utils.str_br_to_float(valor_saldo_str)}
+                posicao_financeira[chave_saldo] = {'valor': vizei_utils.str_br_to_centavos(valor_saldo_str)}
                 
                 ultima_linha_consumida = i
                 return (posicao_financeira, ultima_linha_consumida) # FIM do sub-bloco
             
             # 2. Linha de Total
-            match_total = re.search(REGEX_LINHA_TOTAL, linha_limpa)
-            if match_total:
-                posicao_financeira["total"]["credito"] = vizei_utils.str_br_to_float(match_total.group(1))
-                posicao_financeira["total"]["debito"] = vizei_utils.str_br_to_float(match_total.group(2))
+            if nome_padrao == "totais":
+                match_total = match
+                posicao_financeira["total"]["credito"] = vizei_utils.str_br_to_centavos(match_total.group(1))
+                posicao_financeira["total"]["debito"] = vizei_utils.str_br_to_centavos(match_total.group(2))
                 i += 1
                 ultima_linha_consumida = i - 1
                 continue 
                 
             # 3. Linhas de Itens
-            match_item = re.search(REGEX_ITEM_SIMPLES, linha_limpa)
-            if match_item:
+            if nome_padrao == "item_simples":
+                match_item = match
                 descricao_completa = match_item.group(1).strip()
-                valor = vizei_utils.str_br_to_float(match_item.group(2))
+                valor = vizei_utils.str_br_to_centavos(match_item.group(2))
                 
                 item_data: Dict[str, Any] = {"valor": valor}
                 
                 if descricao_completa.startswith("SALDO ANTERIOR"):
-                    match_data = re.search(r'(\d{2}/\d{2}/\d{4})$', descricao_completa)
+                    match_data = PADROES["data_final"].search(descricao_completa)
                     if match_data:
                         item_data['date'] = match_data.group(1)
                 
@@ -1189,7 +1536,7 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             break
             
     if start_index == -1:
-        return ({"erro": "Bloco SALÃO DE FESTAS não encontrado."}, texto_bruto)
+        return ({"erro": "Bloco SALÃO DE FESTAS não encontrado."}, _texto(texto_bruto, linhas))
 
     # 2. Resumo de Emissões
     start_resumo_index = start_index + 1
@@ -1217,7 +1564,7 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
             break
             
     if start_posicao_index == -1:
-         return ({"erro": "Bloco de Posição Financeira (SALÃO DE FESTAS) não encontrado."}, texto_bruto)
+         return ({"erro": "Bloco de Posição Financeira (SALÃO DE FESTAS) não encontrado."}, _texto(texto_bruto, linhas))
          
     # O bloco de Posição Financeira vai até o próximo bloco (RELAÇÃO DE COTAS EM ABERTO)
     end_posicao_index = len(linhas) 
@@ -1258,10 +1605,7 @@ def parsear_salao_de_festas(texto_bruto: str) -> Tuple[Dict[str, Any], str]:
     # 5. Montar o texto restante 
     
     # O bloco extraído vai de start_index até start_posicao_index + ultima_linha_posicao
-    linhas_antes = "\n".join(linhas[:start_index])
-    linhas_depois = "\n".join(linhas[start_posicao_index + ultima_linha_posicao + 1:])
-    
-    texto_restante = (linhas_antes + "\n" + linhas_depois).strip()
+    texto_restante = _restante_sem_intervalo(texto_bruto, linhas, start_index, start_posicao_index + ultima_linha_posicao + 1)
 
     return (final_output, texto_restante)
 
@@ -1270,21 +1614,20 @@ def parsear_cotas_em_aberto(texto_bruto: str) -> Dict[str, Any]:
     Extrai o bloco "RELAÇÃO DE COTAS EM ABERTO", separando por bloco (BLANC, GRIS).
     """
     
-    linhas = texto_bruto.split('\n')
+    linhas = _iter_linhas(texto_bruto)
     
     texto_filtrado = []
+    indices_filtrados = []
     # Regex para linha de Unidade: 1. Total (float BR), 2. Unidade (01 023), 3. Período, 4. Status (Opcional, AJP)
     # Regex para linha de Total do Bloco 1. Total do Bloco (float BR), 2. Nome do Bloco (BLANC/GRIS)
     # Regex para linha de Total Geral 1. Total Geral (float BR)
-    REGEX_LINHA_UNIDADE = r'^\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*(\d{2}\s*\d{3})\s*(\d{2}/\d{2}/\d{4}\s*a\s*\d{2}/\d{2}/\d{4})([AJP])?\s*$'
-    REGEX_LINHA_TOTAL_BLOCO = r'^\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*Total do Bloco:\s*(\w+)\s*$'    
-    REGEX_LINHA_TOTAL_GERAL = r'^\s*(\d{1,3}(?:\.\d{3})*,\d{2})\s*Total geral:\s*$'
+    # (PADROES: cotas_unidade, cotas_total_bloco e cotas_total_geral, escolhidos por DESPACHO_COTAS)
 
     cotas_em_aberto: Dict[str, Any] = {'total': None}
     dentro_bloco = False
     #bloco_atual_nome: Optional[str] = None
     lista_blocos = []
-    for linha in linhas:
+    for i, linha in enumerate(linhas):
         
         linha_limpa = linha.strip()
         
@@ -1295,15 +1638,18 @@ def parsear_cotas_em_aberto(texto_bruto: str) -> Dict[str, Any]:
 
         if not dentro_bloco:
             texto_filtrado.append(linha)
+            indices_filtrados.append(i)
             continue
         elif linha_limpa.startswith("Unidade Período Total"):
             continue
         
 
+        nome_padrao, match = despachar_linha(linha_limpa, DESPACHO_COTAS, "cotas_unidade")
+
         # 1. Linha de Unidade (Item devedor)
-        match_unidade = re.search(REGEX_LINHA_UNIDADE, linha_limpa)        
-        if match_unidade:
-            valor_total = vizei_utils.str_br_to_float(match_unidade.group(1))
+        if nome_padrao == "cotas_unidade":
+            match_unidade = match
+            valor_total = vizei_utils.str_br_to_centavos(match_unidade.group(1))
             unidade = match_unidade.group(2).replace(' ', '')
             periodo = match_unidade.group(3).strip()
             status = match_unidade.group(4)
@@ -1315,9 +1661,9 @@ def parsear_cotas_em_aberto(texto_bruto: str) -> Dict[str, Any]:
             }
             
         # 2. Linha de Total do Bloco (Define o bloco atual)
-        match_total_bloco = re.search(REGEX_LINHA_TOTAL_BLOCO, linha_limpa)
-        if match_total_bloco:
-            valor_total = vizei_utils.str_br_to_float(match_total_bloco.group(1))
+        if nome_padrao == "cotas_total_bloco":
+            match_total_bloco = match
+            valor_total = vizei_utils.str_br_to_centavos(match_total_bloco.group(1))
             nome_bloco = match_total_bloco.group(2)
 
             bloco_atual['valor_total'] = valor_total
@@ -1327,9 +1673,9 @@ def parsear_cotas_em_aberto(texto_bruto: str) -> Dict[str, Any]:
             continue
             
         # 1. Linha de Total Geral
-        match_total_geral = re.search(REGEX_LINHA_TOTAL_GERAL, linha_limpa)
-        if match_total_geral:
-            cotas_em_aberto['total'] = vizei_utils.str_br_to_float(match_total_geral.group(1))
+        if nome_padrao == "cotas_total_geral":
+            match_total_geral = match
+            cotas_em_aberto['total'] = vizei_utils.str_br_to_centavos(match_total_geral.group(1))
 
             # arruma bloco:
             for bloco in lista_blocos:
@@ -1338,9 +1684,257 @@ def parsear_cotas_em_aberto(texto_bruto: str) -> Dict[str, Any]:
             dentro_bloco = False
             continue        
 
+    if isinstance(texto_bruto, VisaoLinhas):
+        return (cotas_em_aberto, texto_bruto.manter(indices_filtrados))
     return (cotas_em_aberto, texto_filtrado)
 
 
+#
+# Segmentação do documento em seções
+#
+
+# Ordem em que as seções aparecem na prestação de contas
+SECOES = (
+    "saldos",
+    "despesas_ordinarias",
+    "resumo_emissoes",
+    "posicao_financeira",
+    "fundo_de_reserva",
+    "sabesp_comgas",
+    "salao_de_festas",
+    "cotas_em_aberto",
+)
+
+def segmentar_secoes(linhas: List[str]) -> Dict[str, Tuple[int, int]]:
+    """
+    Percorre o documento uma única vez e devolve o intervalo de linhas
+    [inicio, fim) de cada seção encontrada. Cada seção vai do seu marcador de
+    início até o início da seção seguinte (ou o fim do documento).
+
+    Os marcadores são os mesmos usados por cada parsear_*; vale a primeira
+    ocorrência de cada um.
+    """
+    inicios: Dict[str, int] = {}
+    total_linhas = len(linhas)
+
+    for i, linha in enumerate(linhas):
+        linha_limpa = linha.strip()
+        if not linha_limpa:
+            continue
+
+        if "saldos" not in inicios and "Resumo Financeiro Contábil" in linha_limpa:
+            inicios["saldos"] = i
+
+        elif "despesas_ordinarias" not in inicios and "ORDINÁRIA (CONTA CORRENTE)" in linha_limpa:
+            if i + 1 < total_linhas and "Demonstrativo de Despesas" in linhas[i + 1]:
+                inicios["despesas_ordinarias"] = i
+
+        elif "resumo_emissoes" not in inicios and linha_limpa.startswith("Resumo de Emissões Colunado RealizadoPrevisto"):
+            inicios["resumo_emissoes"] = i
+
+        elif "posicao_financeira" not in inicios and linha_limpa.startswith("Posição Financeira CréditoDébito"):
+            inicios["posicao_financeira"] = i
+
+        elif linha_limpa.startswith("FUNDO DE RESERVA"):
+            if "fundo_de_reserva" not in inicios and i + 1 < total_linhas and linhas[i + 1].strip().startswith("Posição Financeira CréditoDébito"):
+                inicios["fundo_de_reserva"] = i
+
+        elif linha_limpa.startswith("SABESP/COMGAS (CONTA CORRENTE)"):
+            if "sabesp_comgas" not in inicios and i + 1 < total_linhas and linhas[i + 1].strip().startswith("Resumo de Emissões Colunado"):
+                inicios["sabesp_comgas"] = i
+
+        elif linha_limpa.startswith("SALÃO DE FESTAS"):
+            if "salao_de_festas" not in inicios and i + 1 < total_linhas and linhas[i + 1].strip().startswith("Resumo de Emissões Colunado"):
+                inicios["salao_de_festas"] = i
+
+        elif "cotas_em_aberto" not in inicios and linha_limpa.startswith("RELAÇÃO DE COTAS EM ABERTO"):
+            inicios["cotas_em_aberto"] = i
+
+    ordenadas = sorted(inicios.items(), key=lambda item: item[1])
+    intervalos = {}
+    for idx, (nome, inicio) in enumerate(ordenadas):
+        fim = ordenadas[idx + 1][1] if idx + 1 < len(ordenadas) else total_linhas
+        intervalos[nome] = (inicio, fim)
+    return intervalos
+
+PARSERS_SECOES = {
+    "saldos": parsear_bloco_saldos,
+    "despesas_ordinarias": parsear_despesas_ordinarias,
+    "resumo_emissoes": parsear_resumo_emissoes_colunado,
+    "posicao_financeira": parsear_posicao_financeira,
+    "fundo_de_reserva": parsear_fundo_de_reserva,
+    "sabesp_comgas": parsear_sabesp_comgas,
+    "salao_de_festas": parsear_salao_de_festas,
+    "cotas_em_aberto": parsear_cotas_em_aberto,
+}
+
+# Versão manual de cada parser de seção. O código do parsear_* e de tudo que
+# ele usa deste módulo e de vizei_utils (funções, classes, PADROES e demais
+# constantes) já entra em versao_parser(); incremente aqui só por mudanças
+# fora disso (outra biblioteca, por exemplo), para que o reprocessamento
+# incremental refaça a seção.
+VERSOES_PARSERS = {
+    "saldos": 1,
+    "despesas_ordinarias": 1,
+    "resumo_emissoes": 1,
+    "posicao_financeira": 1,
+    "fundo_de_reserva": 1,
+    "sabesp_comgas": 1,
+    "salao_de_festas": 1,
+    "cotas_em_aberto": 1,
+}
+
+# Globais que mudam durante a execução: não fazem parte da versão de um parser
+_ESTADO_EXECUCAO = frozenset({"ESTATISTICAS_DESPACHO", "_MODELOS_CABECALHO", "_READER_WORKER", "BACKENDS"})
+
+def _nomes_usados(codigo) -> set:
+    """Nomes globais e atributos referenciados pelo código, incluindo funções aninhadas."""
+    nomes = set(codigo.co_names)
+    for constante in codigo.co_consts:
+        if isinstance(constante, types.CodeType):
+            nomes |= _nomes_usados(constante)
+    return nomes
+
+def _canonico(valor):
+    """Representação estável (independente de PYTHONHASHSEED) de uma constante, ou None se não for uma."""
+    if isinstance(valor, re.Pattern):
+        return f"re({valor.pattern!r}, {valor.flags})"
+    if valor is None or isinstance(valor, (str, bytes, int, float)):
+        return repr(valor)
+    if isinstance(valor, (tuple, list)):
+        itens = [_canonico(v) for v in valor]
+        return None if None in itens else f"[{', '.join(itens)}]"
+    if isinstance(valor, (set, frozenset)):
+        itens = [_canonico(v) for v in valor]
+        return None if None in itens else f"{{{', '.join(sorted(itens))}}}"
+    if isinstance(valor, dict):
+        itens = [(_canonico(k), _canonico(v)) for k, v in valor.items()]
+        if any(k is None or v is None for k, v in itens):
+            return None
+        return f"{{{', '.join(sorted(f'{k}: {v}' for k, v in itens))}}}"
+    return None
+
+@functools.lru_cache(maxsize=None)
+def _fonte(objeto) -> str:
+    import inspect
+
+    # getsource tokeniza (e, para classes, reanalisa o módulo) a cada chamada
+    return inspect.getsource(objeto)
+
+def _fontes_dependencias(funcao) -> List[str]:
+    """
+    Código-fonte da função e, transitivamente, de cada função e classe deste
+    módulo ou de vizei_utils que ela referencia, mais o valor das constantes
+    (PADROES, DESPACHO_*, marcadores...). Referências por atributo (por exemplo
+    vizei_utils.str_br_to_centavos) também contam.
+    """
+    import inspect
+
+    escopos = (("linea_parser", vars(sys.modules[__name__])), ("vizei_utils", vars(vizei_utils)))
+    fontes = {}
+    pendentes = [funcao]
+    while pendentes:
+        atual = inspect.unwrap(pendentes.pop())
+        if inspect.isclass(atual):
+            codigos = [m.__code__ for m in vars(atual).values() if inspect.isfunction(m)]
+        else:
+            codigos = [atual.__code__]
+
+        for nome in sorted(set().union(*map(_nomes_usados, codigos))):
+            for modulo, escopo in escopos:
+                if nome not in escopo or nome in _ESTADO_EXECUCAO or (modulo, nome) in fontes:
+                    continue
+                valor = escopo[nome]
+                if inspect.isfunction(inspect.unwrap(valor)) or inspect.isclass(valor):
+                    if inspect.getmodule(valor) is sys.modules[__name__] or inspect.getmodule(valor) is vizei_utils:
+                        fontes[(modulo, nome)] = _fonte(inspect.unwrap(valor))
+                        pendentes.append(valor)
+                else:
+                    canonico = _canonico(valor)
+                    if canonico is not None:
+                        fontes[(modulo, nome)] = f"{nome} = {canonico}"
+
+    return [_fonte(funcao)] + [fontes[chave] for chave in sorted(fontes)]
+
+@functools.lru_cache(maxsize=None)
+def versao_parser(nome: str) -> str:
+    """
+    Versão efetiva do parser da seção: versão manual + hash do código-fonte do
+    parsear_* e de todas as suas dependências neste módulo e em vizei_utils.
+    """
+    fontes = "\n".join(_fontes_dependencias(PARSERS_SECOES[nome]))
+    return hashlib.sha256(f"{VERSOES_PARSERS[nome]}\n{fontes}".encode()).hexdigest()[:16]
+
+def _hash_trecho(linhas: List[str]) -> str:
+    return hashlib.sha256("\n".join(linhas).encode()).hexdigest()
+
+def parsear_secoes(texto_bruto) -> Tuple[Dict[str, Any], str]:
+    """
+    Segmenta o texto (já sem cabeçalhos) uma vez e executa cada parsear_*
+    apenas sobre o intervalo da sua seção, em vez de cada parser varrer e
+    remontar o documento inteiro.
+
+    Retorna ({nome da seção: resultado do parser}, texto não consumido).
+    Seções ausentes recebem o mesmo resultado que o parser dá quando não
+    encontra o seu marcador.
+    """
+    parsers = PARSERS_SECOES
+
+    linhas = _lista_linhas(texto_bruto)
+    with linea_metricas.etapa("segmentar_secoes", len(linhas)):
+        intervalos = segmentar_secoes(linhas)
+
+    # Linhas antes da primeira seção não pertencem a nenhum parser
+    primeiro_inicio = min((inicio for inicio, _ in intervalos.values()), default=len(linhas))
+    restantes = [linha for linha in linhas[:primeiro_inicio] if linha]
+
+    resultados = {}
+    for nome in SECOES:
+        inicio, fim = intervalos.get(nome, (0, 0))
+        with linea_metricas.etapa(parsers[nome].__name__, fim - inicio):
+            resultado, visao_secao = parsers[nome](VisaoLinhas(linhas[inicio:fim]))
+        resultados[nome] = resultado
+        if fim > inicio:
+            restantes.extend(linha for linha in visao_secao.restantes() if linha)
+
+    return (resultados, "\n".join(restantes))
+
+def parsear_secoes_incremental(texto_bruto, anteriores: Dict[str, dict] = None) -> Tuple[Dict[str, Any], Dict[str, dict]]:
+    """
+    Como parsear_secoes, mas reaproveita o resultado das seções cujo trecho
+    de entrada e versão do parser não mudaram. `anteriores` é
+    {nome: {"versao", "entrada", "resultado"}} de uma execução anterior.
+
+    Retorna ({nome: resultado}, {nome: {"versao", "entrada", "reaproveitado"}}).
+    Não monta o texto não consumido.
+    """
+    anteriores = anteriores or {}
+    linhas = _lista_linhas(texto_bruto)
+    with linea_metricas.etapa("segmentar_secoes", len(linhas)):
+        intervalos = segmentar_secoes(linhas)
+
+    resultados = {}
+    manifesto = {}
+    for nome in SECOES:
+        inicio, fim = intervalos.get(nome, (0, 0))
+        trecho = linhas[inicio:fim]
+        versao, entrada = versao_parser(nome), _hash_trecho(trecho)
+
+        anterior = anteriores.get(nome)
+        reaproveitado = (
+            anterior is not None and "resultado" in anterior
+            and anterior.get("versao") == versao and anterior.get("entrada") == entrada
+        )
+        if reaproveitado:
+            resultados[nome] = anterior["resultado"]
+        else:
+            with linea_metricas.etapa(PARSERS_SECOES[nome].__name__, fim - inicio):
+                resultados[nome], _ = PARSERS_SECOES[nome](VisaoLinhas(trecho))
+        manifesto[nome] = {"versao": versao, "entrada": entrada, "reaproveitado": reaproveitado}
+
+    return (resultados, manifesto)
+
+
 
 
 
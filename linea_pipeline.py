@@ -0,0 +1,232 @@
+import gzip
+import hashlib
+import json
+import os
+
+import linea_metricas
+import linea_parser
+import linea_validador
+import vizei_utils
+
+
+def _identificar(texto_bruto: str) -> dict:
+    with linea_metricas.etapa("parsear_identificacao_condominio"):
+        identificacao = linea_parser.parsear_identificacao_condominio(texto_bruto)
+    if identificacao['string_identificadora'] is None:
+        raise ValueError("Identificação do condomínio não encontrada.")
+    return identificacao
+
+
+def processar_texto(texto_bruto: str) -> dict:
+    """
+    Executa identificação, remoção de cabeçalhos, todos os parsers de seção e
+    os validadores correspondentes sobre o texto extraído de uma prestação de contas.
+    """
+    identificacao = _identificar(texto_bruto)
+    with linea_metricas.etapa("remover_headers"):
+        texto = linea_parser.remover_headers(texto_bruto, identificacao['string_identificadora'])
+    return _processar_secoes(identificacao, texto)
+
+
+def processar_paginas(paginas) -> dict:
+    """
+    Igual a processar_texto, mas recebe o texto por página e remove os
+    cabeçalhos página a página com o modelo aprendido para o condomínio.
+    """
+    paginas = [p for p in paginas if p]
+    identificacao = _identificar("\n".join(paginas))
+    string_identificadora = identificacao['string_identificadora']
+
+    with linea_metricas.etapa("remover_headers"):
+        modelo = linea_parser.obter_modelo_cabecalho(identificacao['codigo_condominio'], paginas, string_identificadora)
+        texto = linea_parser.remover_headers_paginas(paginas, string_identificadora, modelo)
+    return _processar_secoes(identificacao, texto)
+
+
+def _processar_secoes(identificacao: dict, texto: str) -> dict:
+    """Parsers de seção e validadores sobre o texto já sem cabeçalhos."""
+    # Uma passada de segmentação; cada parser recebe só a sua seção
+    secoes, _ = linea_parser.parsear_secoes(texto)
+    return _montar_resultado(identificacao, secoes, _validar_secoes(secoes))
+
+
+def _validar_secoes(secoes: dict) -> dict:
+    saldos = secoes["saldos"]
+    despesas = secoes["despesas_ordinarias"]
+    resumo_emissoes = secoes["resumo_emissoes"]
+    posicao_financeira = secoes["posicao_financeira"]
+    fundo_de_reserva = secoes["fundo_de_reserva"]
+    sabesp_comgas = secoes["sabesp_comgas"]
+    salao_de_festas = secoes["salao_de_festas"]
+    cotas_em_aberto = secoes["cotas_em_aberto"]
+
+    validacoes = {}
+    with linea_metricas.etapa("validar_saldos"):
+        validacoes["saldos"] = {"valido": linea_validador.validar_saldos(saldos)}
+    with linea_metricas.etapa("validar_posicao_financeira"):
+        validacoes["posicao_financeira"] = linea_validador.validar_posicao_financeira(
+            posicao_financeira, despesas.get("CATEGORIAS", [])
+        )
+    with linea_metricas.etapa("validar_despesas_ordinarias"):
+        validacoes["despesas_ordinarias"] = linea_validador.validar_despesas_ordinarias(despesas)
+    with linea_metricas.etapa("validar_fundo_de_reserva"):
+        validacoes["fundo_de_reserva"] = linea_validador.validar_fundo_de_reserva(fundo_de_reserva)
+    with linea_metricas.etapa("validar_sabesp_comgas"):
+        validacoes["sabesp_comgas"] = linea_validador.validar_sabesp_comgas(sabesp_comgas)
+    with linea_metricas.etapa("validar_salao_de_festas"):
+        validacoes["salao_de_festas"] = linea_validador.validar_salao_de_festas(salao_de_festas)
+    with linea_metricas.etapa("validar_cotas_em_aberto"):
+        validacoes["cotas_em_aberto"] = linea_validador.validar_cotas_em_aberto(cotas_em_aberto)
+    return validacoes
+
+
+def _montar_resultado(identificacao: dict, secoes: dict, validacoes: dict) -> dict:
+    resultado = {"identificacao": identificacao}
+    resultado.update((nome, secoes[nome]) for nome in linea_parser.SECOES)
+    resultado["validacoes"] = validacoes
+    resultado["valido"] = all(v["valido"] for v in validacoes.values())
+    return resultado
+
+
+def processar_pdf(origem_pdf, cache=None) -> dict:
+    """Extrai o texto do PDF (caminho, bytes ou arquivo) página a página e executa processar_paginas."""
+    try:
+        with linea_metricas.etapa("extracao"):
+            if cache is not None:
+                paginas = vizei_utils.extrair_paginas_pdf_com_cache(origem_pdf, cache)
+            else:
+                paginas = vizei_utils.extrair_paginas_pdf(origem_pdf)
+    except Exception as e:
+        raise ValueError("Não foi possível extrair o texto do PDF.") from e
+    return processar_paginas(paginas)
+
+
+#
+# Reprocessamento incremental
+#
+
+# Qualquer mudança em linea_validador refaz todas as validações (são baratas).
+# O arquivo é lido direto, em modo texto como o inspect.getsource: importar o
+# inspect custaria mais que o resto da inicialização do pipeline
+def _hash_fonte(modulo) -> str:
+    with open(modulo.__file__, encoding="utf-8") as f:
+        return hashlib.sha256(f.read().encode()).hexdigest()[:16]
+
+VERSAO_VALIDADORES = _hash_fonte(linea_validador)
+
+
+def hash_resultado(resultado) -> str:
+    """Hash da saída de uma etapa, sobre o mesmo JSON gravado pelo lote."""
+    serializado = json.dumps(resultado, ensure_ascii=False, default=linea_validador.serializar_diagnosticos)
+    return hashlib.sha256(serializado.encode()).hexdigest()
+
+
+def hash_paginas(paginas) -> str:
+    """Hash do texto extraído (páginas não vazias), o campo "texto" do manifesto."""
+    return hashlib.sha256("\f".join(paginas).encode()).hexdigest()
+
+
+def ler_paginas(caminho, hash_texto):
+    """Páginas gravadas por gravar_paginas, ou None se faltam ou não batem com `hash_texto`."""
+    try:
+        with gzip.open(caminho, "rt", encoding="utf-8") as f:
+            paginas = json.load(f)
+    except (OSError, ValueError, EOFError):
+        return None
+    return paginas if hash_paginas(paginas) == hash_texto else None
+
+
+def gravar_paginas(caminho, paginas):
+    """Grava o texto por página (JSON com gzip), com substituição atômica."""
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with gzip.open(temporario, "wt", encoding="utf-8") as f:
+        json.dump(paginas, f, ensure_ascii=False)
+    os.replace(temporario, caminho)
+
+
+def manifesto_atualizado(manifesto) -> bool:
+    """True se o manifesto foi gerado com o extrator, os parsers e os validadores atuais."""
+    if not manifesto or set(manifesto.get("secoes", {})) != set(linea_parser.SECOES):
+        return False
+    return (
+        manifesto.get("extrator") == vizei_utils.versao_extrator()
+        and manifesto.get("validadores") == VERSAO_VALIDADORES
+        and all(manifesto["secoes"][nome]["versao"] == linea_parser.versao_parser(nome) for nome in linea_parser.SECOES)
+    )
+
+
+def processar_pdf_incremental(origem_pdf, cache=None, anterior=None, caminho_paginas=None) -> tuple:
+    """
+    Como processar_pdf, mas devolve (resultado, manifesto), com o manifesto
+    ligando hash do PDF -> hash do texto extraído -> versão do parser e hashes
+    de entrada/saída de cada seção.
+
+    `anterior` ({"manifesto": ..., "resultado": ...} de uma execução anterior)
+    faz refazer só o que mudou: mesmo PDF com tudo atualizado devolve o
+    resultado anterior sem extrair; senão o texto vem de `caminho_paginas`
+    (o texto por página gravado ali na execução anterior, conferido com o
+    hash "texto" do manifesto) ou do `cache`, e só é re-extraído se o
+    PDF/extrator mudou ou se nenhum dos dois o tem. Cada seção cujo trecho e
+    parser não mudaram reaproveita o resultado anterior e as validações só
+    rodam de novo se alguma saída de seção ou os validadores mudaram.
+    """
+    manifesto_anterior = (anterior or {}).get("manifesto") or {}
+    resultado_anterior = (anterior or {}).get("resultado")
+    # Lido uma vez para o hash e a extração: streams sem seek não podem ser lidos de novo
+    origem_pdf = vizei_utils._dados_pdf(vizei_utils._origem_reutilizavel(origem_pdf))
+    hash_pdf = vizei_utils.sha256_pdf(origem_pdf)
+
+    if resultado_anterior is not None and manifesto_anterior.get("pdf") == hash_pdf and manifesto_atualizado(manifesto_anterior):
+        secoes = {nome: dict(registro, reaproveitado=True) for nome, registro in manifesto_anterior["secoes"].items()}
+        return resultado_anterior, dict(manifesto_anterior, secoes=secoes, validacoes_reaproveitadas=True)
+
+    paginas = None
+    if (caminho_paginas is not None and manifesto_anterior.get("pdf") == hash_pdf
+            and manifesto_anterior.get("extrator") == vizei_utils.versao_extrator()):
+        paginas = ler_paginas(caminho_paginas, manifesto_anterior.get("texto"))
+
+    if paginas is None:
+        try:
+            with linea_metricas.etapa("extracao"):
+                if cache is not None:
+                    paginas = vizei_utils.extrair_paginas_pdf_com_cache(origem_pdf, cache)
+                else:
+                    paginas = vizei_utils.extrair_paginas_pdf(origem_pdf)
+        except Exception as e:
+            raise ValueError("Não foi possível extrair o texto do PDF.") from e
+        paginas = [p for p in paginas if p]
+        if caminho_paginas is not None:
+            gravar_paginas(caminho_paginas, paginas)
+
+    identificacao = _identificar("\n".join(paginas))
+    string_identificadora = identificacao['string_identificadora']
+    with linea_metricas.etapa("remover_headers"):
+        modelo = linea_parser.obter_modelo_cabecalho(identificacao['codigo_condominio'], paginas, string_identificadora)
+        texto = linea_parser.remover_headers_paginas(paginas, string_identificadora, modelo)
+
+    anteriores = {}
+    if resultado_anterior is not None:
+        for nome, registro in manifesto_anterior.get("secoes", {}).items():
+            if nome in resultado_anterior:
+                anteriores[nome] = dict(registro, resultado=resultado_anterior[nome])
+    secoes, manifesto_secoes = linea_parser.parsear_secoes_incremental(texto, anteriores)
+
+    for nome, registro in manifesto_secoes.items():
+        registro["saida"] = hash_resultado(secoes[nome])
+    saidas_iguais = resultado_anterior is not None and all(
+        registro["saida"] == manifesto_anterior.get("secoes", {}).get(nome, {}).get("saida")
+        for nome, registro in manifesto_secoes.items()
+    )
+    reaproveitar_validacoes = saidas_iguais and manifesto_anterior.get("validadores") == VERSAO_VALIDADORES
+    validacoes = resultado_anterior["validacoes"] if reaproveitar_validacoes else _validar_secoes(secoes)
+
+    manifesto = {
+        "pdf": hash_pdf,
+        "extrator": vizei_utils.versao_extrator(),
+        "texto": hash_paginas(paginas),
+        "secoes": manifesto_secoes,
+        "validadores": VERSAO_VALIDADORES,
+        "validacoes_reaproveitadas": reaproveitar_validacoes,
+    }
+    return _montar_resultado(identificacao, secoes, validacoes), manifesto
@@ -0,0 +1,328 @@
+"""
+Serviço local de ingestão de prestações de contas Linea (HTTP sobre asyncio,
+só biblioteca padrão), para o portal não precisar subir um processo Python
+por upload.
+
+Uso:
+    python linea_servico.py [--host 127.0.0.1] [--porta 8750] [--workers N]
+                            [--fila 32] [--cache cache.db] [--verbosidade erros]
+
+Rotas:
+    POST /processar   corpo: os bytes do PDF (Content-Length obrigatório).
+                      Responde 200 em JSON lines (chunked): {"evento": "aceito"}
+                      assim que o upload entra na fila e, ao terminar,
+                      {"evento": "resultado", "resultado": {...}} ou
+                      {"evento": "erro", "erro": "..."}.
+                      429 (com Retry-After) se a fila estiver cheia, sem guardar
+                      o corpo; 413 se o corpo passar de --tamanho-maximo.
+    GET /saude        ocupação da fila e contadores.
+
+Extração, parsers e validadores rodam num pool de `workers` processos; o
+laço de eventos só lê uploads e escreve respostas. Há uma tarefa consumidora
+por processo do pool, de modo que no máximo `workers` documentos estão em
+processamento e no máximo `fila` esperam; além disso o serviço responde 429
+sem guardar o upload.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import linea_pipeline
+import linea_validador
+
+PORTA_PADRAO = 8750
+TAMANHO_FILA_PADRAO = 32
+TAMANHO_MAXIMO_PADRAO = 50 * 1024 * 1024
+# Segundos sugeridos no Retry-After de um 429
+ESPERA_SUGERIDA = 1
+# Tamanho dos pedaços (chunked) em que o JSON do resultado é enviado
+TAMANHO_PEDACO = 64 * 1024
+
+_STATUS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+}
+
+
+# Cache de texto de cada processo do pool (aberto uma vez por processo)
+_CACHE_WORKER = None
+
+def _inicializar_worker(caminho_cache, verbosidade):
+    global _CACHE_WORKER
+    linea_validador.definir_verbosidade(verbosidade)
+    if caminho_cache:
+        import vizei_cache
+        _CACHE_WORKER = vizei_cache.CacheTextoPdf(caminho_cache)
+
+
+def _processar_upload(dados: bytes):
+    """Executado no pool: pipeline completo. Retorna (sucesso, linha JSON final já serializada)."""
+    try:
+        resultado = linea_pipeline.processar_pdf(dados, cache=_CACHE_WORKER)
+        sucesso, evento = True, {"evento": "resultado", "resultado": resultado}
+    except Exception as e:
+        sucesso, evento = False, {"evento": "erro", "erro": f"{type(e).__name__}: {e}"}
+    linha = json.dumps(evento, ensure_ascii=False, default=linea_validador.serializar_diagnosticos) + "\n"
+    return sucesso, linha.encode("utf-8")
+
+
+class RequisicaoInvalida(Exception):
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+async def _ler_cabecalho(reader):
+    """(método, caminho, cabeçalhos em minúsculas) da requisição."""
+    try:
+        bruto = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.LimitOverrunError:
+        raise RequisicaoInvalida(400, "Cabeçalho grande demais.")
+    linhas = bruto.decode("latin-1").split("\r\n")
+    try:
+        metodo, caminho, _ = linhas[0].split(" ", 2)
+    except ValueError:
+        raise RequisicaoInvalida(400, "Linha de requisição inválida.")
+
+    cabecalhos = {}
+    for linha in linhas[1:]:
+        if linha:
+            nome, _, valor = linha.partition(":")
+            cabecalhos[nome.strip().lower()] = valor.strip()
+    return metodo, caminho.split("?", 1)[0], cabecalhos
+
+
+def _linha_status(status, cabecalhos):
+    linhas = [f"HTTP/1.1 {status} {_STATUS[status]}"]
+    linhas += [f"{nome}: {valor}" for nome, valor in cabecalhos.items()]
+    return ("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1")
+
+
+async def _responder_json(writer, status, corpo, **cabecalhos):
+    dados = json.dumps(corpo, ensure_ascii=False).encode("utf-8")
+    writer.write(_linha_status(status, {
+        "Content-Type": "application/json; charset=utf-8",
+        "Content-Length": len(dados),
+        "Connection": "close",
+        **cabecalhos,
+    }) + dados)
+    await writer.drain()
+
+
+async def _descartar(reader, tamanho):
+    """
+    Lê e descarta o corpo não aceito. Fechar o socket com dados ainda não
+    lidos faz o kernel mandar RST, e o cliente perde a resposta já enviada.
+    """
+    while tamanho > 0:
+        pedaco = await reader.read(min(tamanho, TAMANHO_PEDACO))
+        if not pedaco:
+            break
+        tamanho -= len(pedaco)
+
+
+async def _enviar_pedaco(writer, dados):
+    writer.write(b"%x\r\n%s\r\n" % (len(dados), dados))
+    await writer.drain()
+
+
+class ServicoIngestao:
+    """Servidor HTTP local com fila limitada na frente de um pool de processos."""
+
+    def __init__(self, workers=None, tamanho_fila=TAMANHO_FILA_PADRAO, caminho_cache=None,
+                 verbosidade="completo", tamanho_maximo=TAMANHO_MAXIMO_PADRAO):
+        self.workers = workers or os.cpu_count() or 1
+        self.tamanho_fila = tamanho_fila
+        self.caminho_cache = caminho_cache
+        self.verbosidade = verbosidade
+        self.tamanho_maximo = tamanho_maximo
+        self.contadores = {"aceitos": 0, "recusados": 0, "processados": 0, "erros": 0, "pools_recriados": 0}
+        self.em_processamento = 0
+        self._fila = None
+        self._pool = None
+        self._consumidores = []
+        self._servidor = None
+
+    async def iniciar(self, host="127.0.0.1", porta=PORTA_PADRAO):
+        """Sobe o pool e o servidor. Retorna a porta efetiva (útil com porta=0)."""
+        self._fila = asyncio.Queue(maxsize=self.tamanho_fila)
+        self._pool = self._criar_pool()
+        self._consumidores = [asyncio.create_task(self._consumir()) for _ in range(self.workers)]
+        self._servidor = await asyncio.start_server(self._atender, host, porta)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    def _criar_pool(self):
+        # Processos criados com fork herdariam os sockets das conexões abertas naquele
+        # momento, e o cliente não veria o fechamento da conexão até o worker terminar
+        metodos = multiprocessing.get_all_start_methods()
+        contexto = multiprocessing.get_context("forkserver" if "forkserver" in metodos else "spawn")
+        return ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=contexto, initializer=_inicializar_worker,
+            initargs=(self.caminho_cache, self.verbosidade),
+        )
+
+    def _recriar_pool(self, quebrado):
+        """Troca um pool quebrado (worker morto) por um novo; só o primeiro consumidor a notar troca."""
+        if self._pool is quebrado:
+            self.contadores["pools_recriados"] += 1
+            quebrado.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._criar_pool()
+
+    async def servir(self):
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    async def encerrar(self):
+        self._servidor.close()
+        await self._servidor.wait_closed()
+        for consumidor in self._consumidores:
+            consumidor.cancel()
+        await asyncio.gather(*self._consumidores, return_exceptions=True)
+        self._pool.shutdown(cancel_futures=True)
+
+    async def _consumir(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            dados, futuro = await self._fila.get()
+            self.em_processamento += 1
+            pool = self._pool
+            try:
+                resposta = await loop.run_in_executor(pool, _processar_upload, dados)
+                if not futuro.done():
+                    futuro.set_result(resposta)
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    # Sem isso todo upload seguinte falharia no pool quebrado
+                    self._recriar_pool(pool)
+                if not futuro.done():
+                    futuro.set_exception(e)
+            finally:
+                self.em_processamento -= 1
+                self._fila.task_done()
+
+    def estado(self):
+        return {
+            "fila": self._fila.qsize(),
+            "capacidade_fila": self.tamanho_fila,
+            "em_processamento": self.em_processamento,
+            "workers": self.workers,
+            **self.contadores,
+        }
+
+    async def _atender(self, reader, writer):
+        try:
+            metodo, caminho, cabecalhos = await _ler_cabecalho(reader)
+            if caminho == "/saude":
+                await _responder_json(writer, 200, self.estado())
+            elif caminho != "/processar":
+                raise RequisicaoInvalida(404, "Rota desconhecida.")
+            elif metodo != "POST":
+                raise RequisicaoInvalida(405, "Use POST.")
+            else:
+                await self._processar(reader, writer, cabecalhos)
+        except RequisicaoInvalida as e:
+            await _responder_json(writer, e.status, {"erro": str(e)})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # cliente desconectou
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _recusar(self, reader, writer, restante):
+        self.contadores["recusados"] += 1
+        await _responder_json(writer, 429, {"erro": "Fila cheia.", **self.estado()},
+                              **{"Retry-After": ESPERA_SUGERIDA})
+        await _descartar(reader, restante)
+
+    async def _processar(self, reader, writer, cabecalhos):
+        if "content-length" not in cabecalhos:
+            raise RequisicaoInvalida(411, "Content-Length obrigatório.")
+        try:
+            tamanho = int(cabecalhos["content-length"])
+        except ValueError:
+            raise RequisicaoInvalida(400, "Content-Length inválido.")
+        if tamanho < 0:
+            raise RequisicaoInvalida(400, "Content-Length inválido.")
+        if tamanho > self.tamanho_maximo:
+            raise RequisicaoInvalida(413, f"PDF maior que {self.tamanho_maximo} bytes.")
+
+        # Recusa antes de ler o corpo: com a fila cheia o upload é descartado sem ser guardado
+        if self._fila.full():
+            await self._recusar(reader, writer, tamanho)
+            return
+        dados = await reader.readexactly(tamanho)
+
+        futuro = asyncio.get_running_loop().create_future()
+        try:
+            self._fila.put_nowait((dados, futuro))
+        except asyncio.QueueFull:
+            await self._recusar(reader, writer, 0)
+            return
+        self.contadores["aceitos"] += 1
+
+        writer.write(_linha_status(200, {
+            "Content-Type": "application/x-ndjson; charset=utf-8",
+            "Transfer-Encoding": "chunked",
+            "Connection": "close",
+        }))
+        await _enviar_pedaco(writer, (json.dumps({"evento": "aceito", "posicao": self._fila.qsize()}) + "\n").encode())
+
+        try:
+            sucesso, linha = await futuro
+        except Exception as e:
+            # Falha do pool (ex.: worker morto), não do documento
+            sucesso = False
+            linha = (json.dumps({"evento": "erro", "erro": f"{type(e).__name__}: {e}"}, ensure_ascii=False) + "\n").encode("utf-8")
+        self.contadores["processados" if sucesso else "erros"] += 1
+        for inicio in range(0, len(linha), TAMANHO_PEDACO):
+            await _enviar_pedaco(writer, linha[inicio:inicio + TAMANHO_PEDACO])
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+async def _executar(args):
+    servico = ServicoIngestao(
+        workers=args.workers, tamanho_fila=args.fila, caminho_cache=args.cache,
+        verbosidade=args.verbosidade, tamanho_maximo=args.tamanho_maximo,
+    )
+    porta = await servico.iniciar(args.host, args.porta)
+    print(f"Servindo em http://{args.host}:{porta} ({servico.workers} workers, fila {servico.tamanho_fila})", file=sys.stderr)
+    try:
+        await servico.servir()
+    finally:
+        await servico.encerrar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP local de ingestão de prestações de contas Linea.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--workers", type=int, default=None, help="processos no pool (padrão: núcleos da máquina)")
+    parser.add_argument("--fila", type=int, default=TAMANHO_FILA_PADRAO, help="uploads aguardando além dos em processamento")
+    parser.add_argument("--cache", default=None, help="banco SQLite do cache de texto extraído (vizei_cache)")
+    parser.add_argument("--verbosidade", choices=linea_validador.VERBOSIDADES, default="completo")
+    parser.add_argument("--tamanho-maximo", type=int, default=TAMANHO_MAXIMO_PADRAO, help="bytes por upload")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(_executar(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
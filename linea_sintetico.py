@@ -0,0 +1,308 @@
+"""
+Gerador de prestações de contas Linea sintéticas.
+
+Produz o texto como sai da extração do PDF (uma string por página, com o
+cabeçalho repetido em cada uma) para todas as seções que linea_parser
+conhece. Os valores são coerentes entre si, de modo que todos os
+validar_* de linea_validador passam, e o resultado é determinístico para
+uma mesma semente. Usado pelos benchmarks em lugar dos PDFs reais.
+
+Uso:
+    prestacao = gerar_prestacao(contas=6, despesas=200, unidades=80)
+    linea_pipeline.processar_paginas(prestacao["paginas"])
+"""
+import calendar
+import random
+from datetime import date
+
+# Contas que têm seção própria no documento; as demais só aparecem nos saldos
+CONTAS_BASE = ("ORDINÁRIA", "FUNDO DE RESERVA", "SABESP/COMGAS", "SALÃO DE FESTAS")
+
+CATEGORIAS_DESPESAS = (
+    "DESPESAS COM PESSOAL",
+    "MANUTENÇÃO",
+    "CONSUMOS",
+    "DESPESAS ADMINISTRATIVAS",
+    "DESPESAS DE CONSERVAÇÃO",
+)
+
+HISTORICOS_DESPESAS = (
+    "SALARIOS",
+    "ENCARGOS SOCIAIS",
+    "ELEVADORES",
+    "ENERGIA ELETRICA",
+    "AGUA E ESGOTO",
+    "MATERIAL DE LIMPEZA",
+    "HONORARIOS ADMINISTRACAO",
+    "SEGURO PREDIAL",
+    "JARDINAGEM",
+    "PORTARIA TERCEIRIZADA",
+)
+
+BLOCOS_UNIDADES = ("BLANC", "GRIS", "NOIR", "ROUGE", "VERT", "BLEU")
+
+
+def nome_sequencial(prefixo: str, n: int) -> str:
+    """'PREFIXO A', 'PREFIXO B', ..., 'PREFIXO AA': nomes só com letras (sem dígitos)."""
+    letras = ""
+    n += 1
+    while n:
+        n, resto = divmod(n - 1, 26)
+        letras = chr(ord('A') + resto) + letras
+    return f"{prefixo} {letras}"
+
+def formatar_centavos(centavos: int) -> str:
+    """Centavos no formato brasileiro do relatório (1.234,56)."""
+    reais, resto = divmod(centavos, 100)
+    return f"{reais:,}".replace(",", ".") + f",{resto:02d}"
+
+def _fim_do_mes(ano: int, mes: int) -> str:
+    return date(ano, mes, calendar.monthrange(ano, mes)[1]).strftime("%d/%m/%Y")
+
+def _percentual(parte: int, total: int) -> str:
+    centesimos = round(parte * 10000 / total) if total else 0
+    return f"{centesimos // 100},{centesimos % 100:02d}%"
+
+def _distribuir(rng: random.Random, quantidade: int, partes: int):
+    """Divide `quantidade` itens em `partes` grupos não vazios (quando possível)."""
+    partes = max(1, min(partes, quantidade)) if quantidade else 1
+    cortes = sorted(rng.sample(range(1, quantidade), partes - 1)) if partes > 1 else []
+    limites = [0] + cortes + [quantidade]
+    return [limites[k + 1] - limites[k] for k in range(partes)]
+
+
+def gerar_prestacao(contas: int = 4, despesas: int = 30, unidades: int = 20, categorias: int = None,
+                    linhas_por_pagina: int = 50, ano: int = 2024, mes: int = 12,
+                    codigo_condominio: str = "123", semente: int = 0) -> dict:
+    """
+    Gera uma prestação de contas sintética.
+
+    - contas: linhas do Resumo Financeiro Contábil (mínimo 4, as contas com seção própria)
+    - despesas: lançamentos na seção ORDINÁRIA (CONTA CORRENTE)
+    - unidades: unidades na RELAÇÃO DE COTAS EM ABERTO
+    - categorias: categorias de despesa (padrão: uma a cada ~10 lançamentos)
+
+    Retorna um dict com "paginas" (texto por página), "texto" (páginas
+    concatenadas), "string_identificadora" e "esperado" (os totais gerados,
+    em centavos, para conferência).
+    """
+    rng = random.Random(semente)
+    contas = max(contas, len(CONTAS_BASE))
+    despesas = max(despesas, 1)
+    if categorias is None:
+        categorias = max(1, despesas // 10)
+
+    mes_anterior, ano_anterior = (mes - 1, ano) if mes > 1 else (12, ano - 1)
+    data_anterior = _fim_do_mes(ano_anterior, mes_anterior)
+    data_atual = _fim_do_mes(ano, mes)
+    inicio_mes = date(ano, mes, 1).strftime("%d/%m/%Y")
+
+    def valor(minimo=100, maximo=500000):
+        return rng.randint(minimo, maximo)
+
+    saldos = {}
+
+    # ORDINÁRIA (CONTA CORRENTE): despesas por categoria
+    nomes_categorias = [
+        CATEGORIAS_DESPESAS[k] if k < len(CATEGORIAS_DESPESAS) else nome_sequencial("DESPESAS DIVERSAS", k)
+        for k in range(categorias)
+    ]
+    grupos = []
+    for nome, quantidade in zip(nomes_categorias, _distribuir(rng, despesas, categorias)):
+        itens = [(rng.choice(HISTORICOS_DESPESAS), valor()) for _ in range(quantidade)]
+        grupos.append((nome, itens, sum(v for _, v in itens)))
+    total_despesas = sum(subtotal for _, _, subtotal in grupos)
+
+    linhas_despesas = ["ORDINÁRIA (CONTA CORRENTE)", "Demonstrativo de Despesas", "HISTÓRICO TOTALVALOR"]
+    for nome, itens, subtotal in grupos:
+        linhas_despesas.append(nome)
+        for k, (historico, v) in enumerate(itens):
+            if k == len(itens) - 1:
+                linhas_despesas.append(
+                    f"{formatar_centavos(v)} {formatar_centavos(subtotal)} {_percentual(subtotal, total_despesas)}{historico}"
+                )
+            else:
+                linhas_despesas.append(f"{formatar_centavos(v)}{historico}")
+    linhas_despesas.append(f"TOTAL DAS DESPESAS {formatar_centavos(total_despesas)}")
+
+    # Resumo de emissões e posição financeira da ordinária
+    previsto = valor(total_despesas, total_despesas * 2)
+    arrecadado = valor(previsto // 2, previsto)
+    juros = valor(0, 20000)
+    a_receber = previsto - arrecadado
+    anterior = valor(total_despesas, total_despesas * 3)
+    creditos = arrecadado + juros
+    saldos["ORDINÁRIA"] = (anterior, creditos, total_despesas)
+
+    linhas_resumo = [
+        "Resumo de Emissões Colunado RealizadoPrevisto",
+        f"COTAS REC. DE COBRANÇA EM {data_anterior} {formatar_centavos(arrecadado)}{formatar_centavos(previsto)}",
+        f"{formatar_centavos(arrecadado)}{formatar_centavos(previsto)}",
+        f"COTAS REC. DE COBRANÇA EM {data_atual} {formatar_centavos(a_receber)}",
+    ]
+
+    linhas_posicao = [
+        "Posição Financeira CréditoDébito",
+        f"SALDO ANTERIOR CREDOR EM {data_anterior} {formatar_centavos(anterior)}",
+        f"COTAS REC. DE COBRANÇA {formatar_centavos(arrecadado)}",
+        f"JUROS {formatar_centavos(juros)}",
+    ]
+    linhas_posicao += [f"{nome} {formatar_centavos(subtotal)}" for nome, _, subtotal in grupos]
+    linhas_posicao += [
+        f"TOTAIS {formatar_centavos(anterior + creditos)}{formatar_centavos(total_despesas)}",
+        f"SALDO ATUAL CREDOR {formatar_centavos(anterior + creditos - total_despesas)}",
+    ]
+
+    # FUNDO DE RESERVA (os totais incluem o saldo anterior)
+    anterior = valor(100000, 5000000)
+    rendimentos = valor(100, anterior // 50)
+    irrf = rendimentos // 5
+    saldos["FUNDO DE RESERVA"] = (anterior, rendimentos, irrf)
+    linhas_fundo = [
+        "FUNDO DE RESERVA",
+        "Posição Financeira CréditoDébito",
+        f"SALDO ANTERIOR CREDOR EM {data_anterior} {formatar_centavos(anterior)}",
+        f"RENDIMENTOS {formatar_centavos(rendimentos)}",
+        f"I.R.R.F. {formatar_centavos(irrf)}",
+        f"TOTAIS {formatar_centavos(anterior + rendimentos)}{formatar_centavos(irrf)}",
+        f"SALDO ATUAL CREDOR {formatar_centavos(anterior + rendimentos - irrf)}",
+    ]
+
+    # SABESP/COMGAS (os totais não incluem o saldo anterior)
+    anterior = valor()
+    previsto = valor()
+    arrecadado = valor(previsto // 2, previsto)
+    transferencia = valor(0, anterior + arrecadado)
+    saldos["SABESP/COMGAS"] = (anterior, arrecadado, transferencia)
+    linhas_sabesp = [
+        "SABESP/COMGAS (CONTA CORRENTE)",
+        "Resumo de Emissões Colunado RealizadoPrevisto",
+        f"COTAS REC. DE COBRANÇA EM {data_anterior} {formatar_centavos(arrecadado)}{formatar_centavos(previsto)}",
+        f"{formatar_centavos(arrecadado)}{formatar_centavos(previsto)}",
+        f"COTAS REC. DE COBRANÇA EM {data_atual} {formatar_centavos(previsto - arrecadado)}",
+        "Posição Financeira CréditoDébito",
+        f"SALDO ANTERIOR CREDOR EM {data_anterior} {formatar_centavos(anterior)}",
+        f"COTAS REC. DE COBRANÇA {formatar_centavos(arrecadado)}",
+        f"TRANSFERENCIA ENTRE CONTAS {formatar_centavos(transferencia)}",
+        f"TOTAIS {formatar_centavos(arrecadado)}{formatar_centavos(transferencia)}",
+        f"SALDO ATUAL CREDOR {formatar_centavos(anterior + arrecadado - transferencia)}",
+    ]
+
+    # SALÃO DE FESTAS (sem saldo anterior na posição: o saldo é o próprio crédito)
+    devedores = valor(0, 50000)
+    taxa = valor(1000, 200000)
+    saldos["SALÃO DE FESTAS"] = (0, taxa, 0)
+    linhas_salao = [
+        "SALÃO DE FESTAS",
+        "Resumo de Emissões Colunado RealizadoPrevisto",
+        f"DEVEDORES EM {data_anterior} {formatar_centavos(devedores)}",
+        f"TAXA SALAO DE FESTAS {formatar_centavos(taxa)}{formatar_centavos(taxa)}",
+        f"{formatar_centavos(taxa)}{formatar_centavos(taxa + devedores)}",
+        f"DEVEDORES EM {data_atual}",
+        formatar_centavos(devedores),
+        "Posição Financeira CréditoDébito",
+        f"TAXA SALAO DE FESTAS {formatar_centavos(taxa)}",
+        f"TOTAIS {formatar_centavos(taxa)}{formatar_centavos(0)}",
+        f"SALDO ATUAL CREDOR {formatar_centavos(taxa)}",
+    ]
+
+    # Demais contas, só no Resumo Financeiro Contábil
+    for k in range(contas - len(CONTAS_BASE)):
+        anterior = valor()
+        debito = valor(0, anterior)
+        saldos[nome_sequencial("FUNDO DE OBRAS", k)] = (anterior, valor(0, 100000), debito)
+
+    linhas_saldos = ["Resumo Financeiro Contábil"]
+    soma = [0, 0, 0, 0]
+    for nome, (anterior, credito, debito) in saldos.items():
+        valores = (anterior, credito, debito, anterior + credito - debito)
+        soma = [s + v for s, v in zip(soma, valores)]
+        linhas_saldos.append(f"{nome} " + " ".join(formatar_centavos(v) for v in valores))
+    linhas_saldos.append("TOTAL " + " ".join(formatar_centavos(v) for v in soma))
+
+    # RELAÇÃO DE COTAS EM ABERTO
+    linhas_cotas = ["RELAÇÃO DE COTAS EM ABERTO", "Unidade Período Total"]
+    total_cotas = 0
+    blocos = min(len(BLOCOS_UNIDADES), max(1, unidades // 10)) if unidades else 0
+    for b, quantidade in enumerate(_distribuir(rng, unidades, blocos) if unidades else []):
+        total_bloco = 0
+        for u in range(quantidade):
+            v = valor(10000, 300000)
+            total_bloco += v
+            status = rng.choice(("", "", "A", "J", "P"))
+            linhas_cotas.append(
+                f"{formatar_centavos(v)} {b + 1:02d} {u + 1:03d} {inicio_mes} a {data_atual}{status}"
+            )
+        linhas_cotas.append(f"{formatar_centavos(total_bloco)} Total do Bloco: {BLOCOS_UNIDADES[b]}")
+        total_cotas += total_bloco
+    linhas_cotas.append(f"{formatar_centavos(total_cotas)} Total geral:")
+
+    corpo = (linhas_saldos + linhas_despesas + linhas_resumo + linhas_posicao + linhas_fundo
+             + linhas_sabesp + linhas_salao + linhas_cotas)
+
+    string_identificadora = f"Condomínio: {codigo_condominio} - CONDOMINIO RESIDENCIAL SINTETICO"
+    cabecalho = [
+        "RelatDemonCroAntes",
+        f"PRESTAÇÃO DE CONTAS {mes:02d}/{ano}",
+        string_identificadora,
+    ]
+    paginas = [
+        "\n".join(cabecalho + corpo[inicio:inicio + linhas_por_pagina])
+        for inicio in range(0, len(corpo), linhas_por_pagina)
+    ]
+
+    return {
+        "paginas": paginas,
+        "texto": "\n".join(paginas),
+        "string_identificadora": string_identificadora,
+        "esperado": {
+            "contas": len(saldos),
+            "despesas": despesas,
+            "categorias": len(grupos),
+            "unidades": unidades,
+            "total_despesas": total_despesas,
+            "total_cotas": total_cotas,
+            "saldo_total": soma[3],
+        },
+    }
+
+
+def gerar_pdf(paginas) -> bytes:
+    """
+    PDF mínimo (Helvetica, WinAnsiEncoding) com uma página por texto de
+    `paginas`, uma linha do PDF por linha do texto. Sem dependências: serve
+    para exercitar a extração e o serviço com uploads de verdade.
+    """
+    objetos = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # /Pages, montado depois que os números das páginas são conhecidos
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for texto in paginas:
+        comandos = ["BT", "/F1 8 Tf", "10 TL", "20 820 Td"]
+        for linha in texto.split("\n"):
+            escapada = linha.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+            comandos.append(f"({escapada}) Tj T*")
+        comandos.append("ET")
+        conteudo = "\n".join(comandos).encode("cp1252", errors="replace")
+
+        objetos.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(conteudo), conteudo))
+        objetos.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objetos))
+        )
+        kids.append(b"%d 0 R" % len(objetos))
+    objetos[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(kids))
+
+    saida = bytearray(b"%PDF-1.4\n")
+    deslocamentos = []
+    for numero, objeto in enumerate(objetos, start=1):
+        deslocamentos.append(len(saida))
+        saida += b"%d 0 obj\n%s\nendobj\n" % (numero, objeto)
+    inicio_xref = len(saida)
+    saida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for deslocamento in deslocamentos:
+        saida += b"%010d 00000 n \n" % deslocamento
+    saida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+    return bytes(saida)
@@ -1,6 +1,100 @@
+import functools
+import re
+from array import array
 import vizei_utils
 
-def validar_saldos(saldos, tolerancia=1e-6):
+@functools.lru_cache(maxsize=None)
+def _numpy():
+    """
+    NumPy é importado só na primeira validação em lote: o import custa mais que
+    o resto do pipeline e os workers que não validam em lote não o pagam.
+    Opcional: sem ele (None) validar_saldos_lote usa um laço em Python.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+#
+# Diagnósticos dos validadores
+#
+
+# "nenhum": não guarda nada; "erros": só os eventos de erro; "completo": tudo
+VERBOSIDADES = ("nenhum", "erros", "completo")
+VERBOSIDADE = "completo"
+
+def _saida_padrao(nivel, mensagem):
+    print(mensagem)
+
+# Destino das mensagens que os validadores emitiam com print: callable(nivel, mensagem)
+SAIDA = _saida_padrao
+
+def definir_verbosidade(verbosidade: str):
+    """Verbosidade padrão dos validadores (cada chamada também aceita `verbosidade`)."""
+    global VERBOSIDADE
+    if verbosidade not in VERBOSIDADES:
+        raise ValueError(f"Verbosidade inválida: {verbosidade!r} (use {', '.join(VERBOSIDADES)}).")
+    VERBOSIDADE = verbosidade
+
+def definir_saida(saida):
+    """Troca o destino das mensagens; None as descarta."""
+    global SAIDA
+    SAIDA = saida
+
+
+class Diagnosticos:
+    """
+    Eventos de diagnóstico de um validador, guardados como tuplas
+    (nivel, modelo, args) e formatados (modelo.format(*args)) só quando
+    lidos. Itera, indexa e compara como a lista de strings de antes.
+    """
+    __slots__ = ("eventos", "_info", "_erro")
+
+    def __init__(self, verbosidade=None):
+        verbosidade = verbosidade or VERBOSIDADE
+        if verbosidade not in VERBOSIDADES:
+            raise ValueError(f"Verbosidade inválida: {verbosidade!r} (use {', '.join(VERBOSIDADES)}).")
+        self.eventos = []
+        self._erro = verbosidade != "nenhum"
+        self._info = verbosidade == "completo"
+
+    def info(self, modelo, *args):
+        if self._info:
+            self.eventos.append(("info", modelo, args))
+
+    def erro(self, modelo, *args):
+        if self._erro:
+            self.eventos.append(("erro", modelo, args))
+
+    def formatar(self, nivel=None):
+        return [modelo.format(*args) for n, modelo, args in self.eventos if nivel is None or n == nivel]
+
+    def __iter__(self):
+        return iter(self.formatar())
+
+    def __len__(self):
+        return len(self.eventos)
+
+    def __getitem__(self, indice):
+        return self.formatar()[indice]
+
+    def __eq__(self, outro):
+        if isinstance(outro, Diagnosticos):
+            outro = outro.formatar()
+        return self.formatar() == outro
+
+    def __repr__(self):
+        return repr(self.formatar())
+
+def serializar_diagnosticos(objeto):
+    """`default` para json.dump dos resultados dos validadores."""
+    if isinstance(objeto, Diagnosticos):
+        return objeto.formatar()
+    raise TypeError(f"Object of type {type(objeto).__name__} is not JSON serializable")
+
+
+def validar_saldos(saldos, tolerancia=0, verbosidade=None):
     for item in saldos['contas']:
         # Cada item é um dict com apenas 1 chave (nome da conta)
         nome_conta = vizei_utils.normalize(item)
@@ -13,101 +107,237 @@ def validar_saldos(saldos, tolerancia=1e-6):
 
         calculado = anterior + credito - debito
 
-        # Verificação com tolerância
+        # Valores em centavos: comparação exata (tolerancia > 0 só para dados legados em float)
         if abs(calculado - atual) > tolerancia:
-            print(f"❌ Divergência na conta '{nome_conta}': calculado={calculado}, atual={atual}")
+            if SAIDA is not None and (verbosidade or VERBOSIDADE) != "nenhum":
+                SAIDA("erro", f"❌ Divergência na conta '{nome_conta}': calculado={calculado}, atual={atual}")
             return False
 
     return True
 
 
-def validar_posicao_financeira(data, categorias):
-
-    pf = data.get("posicao_financeira", {})
-    total_oficial = pf.get("total", {})
-    total_credito_oficial = total_oficial.get("credito", 0)
-    total_debito_oficial = total_oficial.get("debito", 0)
+#
+# Validação de saldos em lote
+#
+
+class SaldosColunares:
+    """
+    Saldos de muitos documentos em colunas: uma linha por (documento, conta),
+    com os valores em centavos em arrays int64 (NumPy, quando instalado) ou
+    array('q').
+    """
+    __slots__ = ("documentos", "indice_documento", "contas", "anterior", "credito", "debito", "atual")
+
+    def __len__(self):
+        return len(self.contas)
+
+def empacotar_saldos(documentos) -> SaldosColunares:
+    """
+    Empacota resultados de parsear_bloco_saldos: `documentos` é um dict
+    {identificador: saldos} ou um iterável de pares (identificador, saldos).
+    Documentos sem a lista 'contas' (bloco não encontrado) não geram linhas.
+    """
+    if hasattr(documentos, "items"):
+        documentos = documentos.items()
+
+    colunas = SaldosColunares()
+    colunas.documentos = []
+    colunas.contas = []
+    indice_documento = array('q')
+    anterior, credito, debito, atual = (array('q') for _ in range(4))
+
+    for indice, (documento, saldos) in enumerate(documentos):
+        colunas.documentos.append(documento)
+        nomes = vizei_utils.normalize_many(saldos.get('contas', ()))
+        linhas = [saldos[nome_conta] for nome_conta in nomes]
+        colunas.contas.extend(nomes)
+        indice_documento.extend([indice] * len(nomes))
+        anterior.extend([valores.get("anterior", 0) for valores in linhas])
+        credito.extend([valores.get("credito", 0) for valores in linhas])
+        debito.extend([valores.get("debito", 0) for valores in linhas])
+        atual.extend([valores.get("atual", 0) for valores in linhas])
+
+    np = _numpy()
+    if np is not None:
+        # array('q') e int64 têm o mesmo layout: sem cópia
+        indice_documento, anterior, credito, debito, atual = (
+            np.frombuffer(coluna, dtype=np.int64) for coluna in (indice_documento, anterior, credito, debito, atual)
+        )
 
-    # Palavras que indicam débito (ajustada — removido FUNDO DE RESERVA)
-    palavras_debito = [
-        "APLICAÇÃO",
-        "APLICACAO",
-        "DESPESA",
-        "PESSOAL",
-        "CONSUMO",
-        "CONSUMOS",
-        "MANUTENÇÃO",
-        "MANUTENCAO",
-        "BLOQUEIO JUDICIAL",
-        "ADMINISTRATIVA"
+    colunas.indice_documento = indice_documento
+    colunas.anterior = anterior
+    colunas.credito = credito
+    colunas.debito = debito
+    colunas.atual = atual
+    return colunas
+
+def validar_saldos_lote(documentos, tolerancia=0) -> list:
+    """
+    Confere anterior + credito - debito == atual em todas as contas de todos
+    os documentos de uma vez (vetorizado com NumPy, se disponível).
+
+    Aceita o mesmo que empacotar_saldos ou um SaldosColunares já montado.
+    Retorna todas as divergências, não só a primeira: uma lista de dicts com
+    documento, conta, calculado e atual (vazia se tudo confere).
+    """
+    colunas = documentos if isinstance(documentos, SaldosColunares) else empacotar_saldos(documentos)
+
+    np = _numpy()
+    if np is not None:
+        calculado = colunas.anterior + colunas.credito - colunas.debito
+        divergentes = np.flatnonzero(np.abs(calculado - colunas.atual) > tolerancia).tolist()
+    else:
+        calculado = [a + c - d for a, c, d in zip(colunas.anterior, colunas.credito, colunas.debito)]
+        divergentes = [i for i, (calc, atual) in enumerate(zip(calculado, colunas.atual)) if abs(calc - atual) > tolerancia]
+
+    return [
+        {
+            "documento": colunas.documentos[colunas.indice_documento[i]],
+            "conta": colunas.contas[i],
+            "calculado": int(calculado[i]),
+            "atual": int(colunas.atual[i]),
+        }
+        for i in divergentes
     ]
-    palavras_debito.extend(categorias)
 
-    total_credito_calc = 0
-    total_debito_calc = 0
-
-    classificacao = {}
-    logs = []
-
-    for nome, info in pf.items():
-        if nome == "total":
-            continue
 
+# Palavras que indicam débito (ajustada — removido FUNDO DE RESERVA)
+PALAVRAS_DEBITO = (
+    "APLICAÇÃO",
+    "APLICACAO",
+    "DESPESA",
+    "PESSOAL",
+    "CONSUMO",
+    "CONSUMOS",
+    "MANUTENÇÃO",
+    "MANUTENCAO",
+    "BLOQUEIO JUDICIAL",
+    "ADMINISTRATIVA"
+)
+
+# Decisões memorizadas por classificador antes de a memória ser esvaziada
+TAMANHO_MEMO_CLASSIFICACAO = 4096
+
+ESTATISTICAS_CLASSIFICACAO = {"consultas": 0, "acertos_memo": 0, "classificadores_compilados": 0}
+
+
+class ClassificadorPosicao:
+    """
+    Classifica os itens da posição financeira em credito/debito/saldo_final
+    com as regras de validar_posicao_financeira.
+
+    As palavras de débito (PALAVRAS_DEBITO + categorias de despesa) viram uma
+    única alternação compilada, e a decisão de cada nome fica memorizada: num
+    lote os mesmos nomes se repetem em todos os documentos.
+    """
+
+    def __init__(self, categorias):
+        palavras = sorted(set(PALAVRAS_DEBITO) | set(categorias), key=len, reverse=True)
+        self._regex_debito = re.compile("|".join(map(re.escape, palavras)))
+        self._memo = {}
+        ESTATISTICAS_CLASSIFICACAO["classificadores_compilados"] += 1
+
+    def classificar(self, nome):
+        """Retorna (categoria, modelo, args) do evento de log para o nome do item."""
+        ESTATISTICAS_CLASSIFICACAO["consultas"] += 1
+        decisao = self._memo.get(nome)
+        if decisao is not None:
+            ESTATISTICAS_CLASSIFICACAO["acertos_memo"] += 1
+            return decisao
+
+        decisao = self._classificar(nome)
+        if len(self._memo) >= TAMANHO_MEMO_CLASSIFICACAO:
+            self._memo.clear()
+        self._memo[nome] = decisao
+        return decisao
+
+    def _classificar(self, nome):
         nome_up = vizei_utils.normalize(nome.upper())
 
-        # normaliza 
-        if isinstance(info, list):
-            itens = info
-        else:
-            itens = [info]
-            
         # 1. REGRAS FIXAS PARA SALDOS --------------------------------
         if "SALDO ANTERIOR" in nome_up:
             categoria = "credito" if "CREDOR" in nome_up else "debito"
-            logs.append(f"[SALDO] {nome} ⇒ {categoria}")
+            return (categoria, "[SALDO] {} ⇒ {}", (nome, categoria))
 
         elif "SALDO ATUAL" in nome_up:
-            categoria = "saldo_final"
-            logs.append(f"[SALDO] {nome} ⇒ saldo_final")
+            return ("saldo_final", "[SALDO] {} ⇒ saldo_final", (nome,))
 
         # 2. REGRAS ESPECÍFICAS PARA: FUNDO DE RESERVA, CONSUMO DE AGUA E GAS, FUNDO DE MANUTENCAO ----------------
         elif nome_up.startswith("APLICAÇÃO FUNDO DE RESERVA"):
-            categoria = "debito"
-            logs.append(f"[REGRA ESPECÍFICA] {nome} ⇒ DÉBITO")
+            return ("debito", "[REGRA ESPECÍFICA] {} ⇒ DÉBITO", (nome,))
 
         elif nome_up == "FUNDO DE RESERVA":
-            categoria = "credito"
-            logs.append(f"[REGRA ESPECÍFICA] {nome} ⇒ CRÉDITO")
+            return ("credito", "[REGRA ESPECÍFICA] {} ⇒ CRÉDITO", (nome,))
 
         elif nome_up.startswith("CONSUMO DE"):
-            categoria = "credito"
-            logs.append(f"[REGRA ESPECÍFICA] {nome} ⇒ CRÉDITO")
+            return ("credito", "[REGRA ESPECÍFICA] {} ⇒ CRÉDITO", (nome,))
 
         # elif nome_up.startswith("DIVERSOS/EVENTUAIS/TERCEIROS"):
-            # categoria = "debito"
-            # logs.append(f"[REGRA ESPECÍFICA] {nome} ⇒ DÉBITO")
-
+            # return ("debito", "[REGRA ESPECÍFICA] {} ⇒ DÉBITO", (nome,))
 
         elif nome_up.startswith("FUNDO MANUTENÇÃO") or nome_up.startswith("FUNDO MANUTENCAO"):
-            categoria = "credito"
-            logs.append(f"[REGRA ESPECÍFICA] {nome} ⇒ CRÉDITO")
-        
+            return ("credito", "[REGRA ESPECÍFICA] {} ⇒ CRÉDITO", (nome,))
+
         # 3. HEURÍSTICA DE DÉBITO POR PALAVRA-CHAVE -----------------
-        elif any(p in nome_up for p in palavras_debito):
-            categoria = "debito"
-            logs.append(f"[HEURÍSTICA] {nome} ⇒ DÉBITO")
+        elif self._regex_debito.search(nome_up):
+            return ("debito", "[HEURÍSTICA] {} ⇒ DÉBITO", (nome,))
 
         # 4. REGRA GERAL --------------------------------------------
+        return ("credito", "[REGRA GERAL] {} ⇒ CRÉDITO", (nome,))
+
+
+@functools.lru_cache(maxsize=64)
+def _classificador_posicao(categorias: frozenset) -> ClassificadorPosicao:
+    return ClassificadorPosicao(categorias)
+
+def obter_classificador_posicao(categorias) -> ClassificadorPosicao:
+    """Classificador compilado uma vez por conjunto de categorias de despesa."""
+    return _classificador_posicao(frozenset(categorias))
+
+def taxa_acerto_classificacao() -> float:
+    """Fração das classificações respondidas pela memória."""
+    consultas = ESTATISTICAS_CLASSIFICACAO["consultas"]
+    return ESTATISTICAS_CLASSIFICACAO["acertos_memo"] / consultas if consultas else 0.0
+
+def zerar_estatisticas_classificacao():
+    for chave in ESTATISTICAS_CLASSIFICACAO:
+        ESTATISTICAS_CLASSIFICACAO[chave] = 0
+
+
+def validar_posicao_financeira(data, categorias, verbosidade=None):
+
+    pf = data.get("posicao_financeira", {})
+    total_oficial = pf.get("total", {})
+    total_credito_oficial = total_oficial.get("credito", 0)
+    total_debito_oficial = total_oficial.get("debito", 0)
+
+    classificador = obter_classificador_posicao(categorias)
+
+    total_credito_calc = 0
+    total_debito_calc = 0
+
+    classificacao = {}
+    logs = Diagnosticos(verbosidade)
+
+    for nome, info in pf.items():
+        if nome == "total":
+            continue
+
+        # normaliza 
+        if isinstance(info, list):
+            itens = info
         else:
-            categoria = "credito"
-            logs.append(f"[REGRA GERAL] {nome} ⇒ CRÉDITO")
+            itens = [info]
+
+        categoria, modelo, args = classificador.classificar(nome)
+        logs.info(modelo, *args)
 
         classificacao[nome] = categoria
 
         # Soma final
         for item in itens:
             valor = item.get("valor", 0)
-            logs.append(f"    - item '{nome}': valor={valor}")
+            logs.info("    - item '{}': valor={}", nome, valor)
             
             if categoria == "credito":
                 total_credito_calc += valor
@@ -116,12 +346,12 @@ def validar_posicao_financeira(data, categorias):
 
     # 5. Comparações finais -----------------------------------------
     divergencias = []
-    if abs(total_credito_calc - total_credito_oficial) > 1e-6:
+    if total_credito_calc != total_credito_oficial:
         divergencias.append(
             f"Crédito divergente: calculado {total_credito_calc}, oficial {total_credito_oficial}"
         )
 
-    if abs(total_debito_calc - total_debito_oficial) > 1e-6:
+    if total_debito_calc != total_debito_oficial:
         divergencias.append(
             f"Débito divergente: calculado {total_debito_calc}, oficial {total_debito_oficial}"
         )
@@ -138,8 +368,8 @@ def validar_posicao_financeira(data, categorias):
     }
 
 
-def validar_despesas_ordinarias(data):
-    logs = []
+def validar_despesas_ordinarias(data, verbosidade=None):
+    logs = Diagnosticos(verbosidade)
     valido = True
 
     # 1 — Total oficial
@@ -162,27 +392,31 @@ def validar_despesas_ordinarias(data):
         soma_categorias += subtotal_calculado
 
         # Valida subtotal
-        if abs(subtotal_calculado - subtotal_oficial) > 1e-6:
+        if subtotal_calculado != subtotal_oficial:
             valido = False
-            logs.append(
-                f"[ERRO SUBTOTAL] Categoria '{categoria}': subtotal oficial {subtotal_oficial} "
-                f"≠ calculado {subtotal_calculado}"
+            logs.erro(
+                "[ERRO SUBTOTAL] Categoria '{}': subtotal oficial {} "
+                "≠ calculado {}",
+                categoria, subtotal_oficial, subtotal_calculado
             )
         else:
-            logs.append(
-                f"[OK SUBTOTAL] Categoria '{categoria}' confere: {subtotal_calculado}"
+            logs.info(
+                "[OK SUBTOTAL] Categoria '{}' confere: {}",
+                categoria, subtotal_calculado
             )
 
     # 2 — Valida soma dos subtotais vs total geral
-    if abs(soma_categorias - total_oficial) > 1e-6:
+    if soma_categorias != total_oficial:
         valido = False
-        logs.append(
-            f"[ERRO TOTAL] Soma dos subtotais {soma_categorias} "
-            f"≠ TOTAL_DESPESAS oficial {total_oficial}"
+        logs.erro(
+            "[ERRO TOTAL] Soma dos subtotais {} "
+            "≠ TOTAL_DESPESAS oficial {}",
+            soma_categorias, total_oficial
         )
     else:
-        logs.append(
-            f"[OK TOTAL] Soma dos subtotais confere com TOTAL_DESPESAS: {total_oficial}"
+        logs.info(
+            "[OK TOTAL] Soma dos subtotais confere com TOTAL_DESPESAS: {}",
+            total_oficial
         )
 
     return {
@@ -192,8 +426,8 @@ def validar_despesas_ordinarias(data):
         "logs": logs
     }
 
-def validar_fundo_de_reserva(data):
-    logs = []
+def validar_fundo_de_reserva(data, verbosidade=None):
+    logs = Diagnosticos(verbosidade)
     valido = True
 
     fr = data.get("fundo_de_reserva", {})
@@ -243,59 +477,63 @@ def validar_fundo_de_reserva(data):
             else:
                 natureza ="debito"
                 debito_calc += valor
-            logs.append(f"[SALDO] {chave} ⇒ {natureza}")
+            logs.info("[SALDO] {} ⇒ {}", chave, natureza)
 
         elif "SALDO ATUAL" in nome_up:
             natureza = "saldo_final"
-            logs.append(f"[SALDO] {chave} ⇒ {natureza}")
+            logs.info("[SALDO] {} ⇒ {}", chave, natureza)
 
         elif chave in CREDITOS:
             natureza = 'credito'
             credito_calc += valor
-            logs.append(f"[CREDITO] {chave}: +{valor}")
+            logs.info("[CREDITO] {}: +{}", chave, valor)
 
         elif chave in DEBITOS:
             natureza = 'debito'
             debito_calc += valor
-            logs.append(f"[DEBITO] {chave}: -{valor}")
+            logs.info("[DEBITO] {}: -{}", chave, valor)
 
         else:
             natureza = None
-            logs.append(f"[IGNORADO] {chave}: não classificado")
+            logs.info("[IGNORADO] {}: não classificado", chave)
 
         classificacao[chave] = natureza
 
     # Validação dos totais de créditos e débitos
-    if abs(credito_calc - total_oficial_credito) > 1e-6:
+    if credito_calc != total_oficial_credito:
         valido = False
-        logs.append(
-            f"[ERRO TOTAL CREDITO] Calculado {credito_calc} "
-            f"≠ Oficial {total_oficial_credito}"
+        logs.erro(
+            "[ERRO TOTAL CREDITO] Calculado {} "
+            "≠ Oficial {}",
+            credito_calc, total_oficial_credito
         )
     else:
-        logs.append(f"[OK TOTAL CREDITO] {credito_calc}")
+        logs.info("[OK TOTAL CREDITO] {}", credito_calc)
 
-    if abs(debito_calc - total_oficial_debito) > 1e-6:
+    if debito_calc != total_oficial_debito:
         valido = False
-        logs.append(
-            f"[ERRO TOTAL DEBITO] Calculado {debito_calc} "
-            f"≠ Oficial {total_oficial_debito}"
+        logs.erro(
+            "[ERRO TOTAL DEBITO] Calculado {} "
+            "≠ Oficial {}",
+            debito_calc, total_oficial_debito
         )
     else:
-        logs.append(f"[OK TOTAL DEBITO] {debito_calc}")
+        logs.info("[OK TOTAL DEBITO] {}", debito_calc)
 
     # Valida saldo final
     saldo_calculado = saldo_anterior + credito_calc - debito_calc
 
-    if abs(saldo_calculado - saldo_atual_oficial) > 1e-6:
+    if saldo_calculado != saldo_atual_oficial:
         valido = False
-        logs.append(
-            f"[ERRO SALDO] Saldo final calculado {saldo_calculado} "
-            f"≠ Saldo oficial {saldo_atual_oficial}"
+        logs.erro(
+            "[ERRO SALDO] Saldo final calculado {} "
+            "≠ Saldo oficial {}",
+            saldo_calculado, saldo_atual_oficial
         )
     else:
-        logs.append(
-            f"[OK SALDO] Saldo final confere: {saldo_calculado}"
+        logs.info(
+            "[OK SALDO] Saldo final confere: {}",
+            saldo_calculado
         )
 
     return {
@@ -310,8 +548,8 @@ def validar_fundo_de_reserva(data):
 
 
 
-def validar_sabesp_comgas(data):
-    logs = []
+def validar_sabesp_comgas(data, verbosidade=None):
+    logs = Diagnosticos(verbosidade)
     valido = True
 
     bloco = data.get("sabesp_comgas", {})
@@ -339,22 +577,24 @@ def validar_sabesp_comgas(data):
             break
 
     # Valida previsto
-    if abs(detalhe_previsto - total_previsto) > 1e-6:
+    if detalhe_previsto != total_previsto:
         valido = False
-        logs.append(
-            f"[ERRO RESUMO PREVISTO] '{chave_detalhada}': {detalhe_previsto} ≠ total {total_previsto}"
+        logs.erro(
+            "[ERRO RESUMO PREVISTO] '{}': {} ≠ total {}",
+            chave_detalhada, detalhe_previsto, total_previsto
         )
     else:
-        logs.append(f"[OK RESUMO PREVISTO] {detalhe_previsto}")
+        logs.info("[OK RESUMO PREVISTO] {}", detalhe_previsto)
 
     # Valida realizado
-    if abs(detalhe_realizado - total_realizado) > 1e-6:
+    if detalhe_realizado != total_realizado:
         valido = False
-        logs.append(
-            f"[ERRO RESUMO REALIZADO] '{chave_detalhada}': {detalhe_realizado} ≠ total {total_realizado}"
+        logs.erro(
+            "[ERRO RESUMO REALIZADO] '{}': {} ≠ total {}",
+            chave_detalhada, detalhe_realizado, total_realizado
         )
     else:
-        logs.append(f"[OK RESUMO REALIZADO] {detalhe_realizado}")
+        logs.info("[OK RESUMO REALIZADO] {}", detalhe_realizado)
 
     # ============================================
     # 2) Validação da POSIÇÃO FINANCEIRA
@@ -375,7 +615,7 @@ def validar_sabesp_comgas(data):
         if "SALDO ANTERIOR" in chave.upper():
             chave_saldo_anterior = chave
             saldo_anterior = item.get("valor", 0)
-            logs.append(f"[INFO] Saldo anterior detectado: {chave} = {saldo_anterior}")
+            logs.info("[INFO] Saldo anterior detectado: {} = {}", chave, saldo_anterior)
             break
 
     # -------------------------
@@ -388,7 +628,7 @@ def validar_sabesp_comgas(data):
         if "SALDO ATUAL" in chave.upper():
             chave_saldo_atual = chave
             saldo_atual = item.get("valor", 0)
-            logs.append(f"[INFO] Saldo atual detectado: {chave} = {saldo_atual}")
+            logs.info("[INFO] Saldo atual detectado: {} = {}", chave, saldo_atual)
             break
 
     # -------------------------
@@ -419,48 +659,51 @@ def validar_sabesp_comgas(data):
         if normalized_chave in CREDITOS:
             categorias[chave] = 'credito'
             credito_calc += valor
-            logs.append(f"[CREDITO] {chave}: +{valor}")
+            logs.info("[CREDITO] {}: +{}", chave, valor)
 
         elif normalized_chave in DEBITOS:
             categorias[chave] = 'debito'
             debito_calc += valor
-            logs.append(f"[DEBITO] {chave}: -{valor}")
+            logs.info("[DEBITO] {}: -{}", chave, valor)
 
         else:
-            logs.append(f"[IGNORADO] {chave}: não classificado")
+            logs.info("[IGNORADO] {}: não classificado", chave)
 
     # -------------------------
     # Validação dos totais
     # -------------------------
 
-    if abs(credito_calc - total_credito) > 1e-6:
+    if credito_calc != total_credito:
         valido = False
-        logs.append(
-            f"[ERRO TOTAL CREDITO] {credito_calc} ≠ oficial {total_credito}"
+        logs.erro(
+            "[ERRO TOTAL CREDITO] {} ≠ oficial {}",
+            credito_calc, total_credito
         )
     else:
-        logs.append(f"[OK TOTAL CREDITO] {credito_calc}")
+        logs.info("[OK TOTAL CREDITO] {}", credito_calc)
 
-    if abs(debito_calc - total_debito) > 1e-6:
+    if debito_calc != total_debito:
         valido = False
-        logs.append(
-            f"[ERRO TOTAL DEBITO] {debito_calc} ≠ oficial {total_debito}"
+        logs.erro(
+            "[ERRO TOTAL DEBITO] {} ≠ oficial {}",
+            debito_calc, total_debito
         )
     else:
-        logs.append(f"[OK TOTAL DEBITO] {debito_calc}")
+        logs.info("[OK TOTAL DEBITO] {}", debito_calc)
 
     # -------------------------
     # Validação do saldo final
     # -------------------------
     saldo_calculado = saldo_anterior + credito_calc - debito_calc
 
-    if abs(saldo_calculado - saldo_atual) > 1e-6:
+    if saldo_calculado != saldo_atual:
         valido = False
-        logs.append(
-            f"[ERRO SALDO FINAL] calculado {saldo_calculado} ≠ oficial {saldo_atual}"
+        logs.erro(
+            "[ERRO SALDO FINAL] calculado {} ≠ oficial {}",
+            saldo_calculado, saldo_atual
         )
     else:
-        logs.append(f"[OK SALDO FINAL] {saldo_calculado}")
+        logs.info("[OK SALDO FINAL] {}", saldo_calculado)
 
     return {
         "valido": valido,
@@ -473,8 +716,8 @@ def validar_sabesp_comgas(data):
     }
 
 
-def validar_salao_de_festas(data):
-    logs = []
+def validar_salao_de_festas(data, verbosidade=None):
+    logs = Diagnosticos(verbosidade)
     valido = True
     classificacao_resumo = {}
 
@@ -512,22 +755,24 @@ def validar_salao_de_festas(data):
             classificacao_resumo[chave] = "credito"  # tudo aqui é crédito
 
     # Validação previsto
-    if abs(soma_previsto - total_previsto) > 1e-6:
+    if soma_previsto != total_previsto:
         valido = False
-        logs.append(
-            f"[ERRO RESUMO PREVISTO] somado {soma_previsto} ≠ total {total_previsto}"
+        logs.erro(
+            "[ERRO RESUMO PREVISTO] somado {} ≠ total {}",
+            soma_previsto, total_previsto
         )
     else:
-        logs.append(f"[OK RESUMO PREVISTO] {soma_previsto}")
+        logs.info("[OK RESUMO PREVISTO] {}", soma_previsto)
 
     # Validação realizado
-    if abs(soma_realizado - total_realizado) > 1e-6:
+    if soma_realizado != total_realizado:
         valido = False
-        logs.append(
-            f"[ERRO RESUMO REALIZADO] somado {soma_realizado} ≠ total {total_realizado}"
+        logs.erro(
+            "[ERRO RESUMO REALIZADO] somado {} ≠ total {}",
+            soma_realizado, total_realizado
         )
     else:
-        logs.append(f"[OK RESUMO REALIZADO] {soma_realizado}")
+        logs.info("[OK RESUMO REALIZADO] {}", soma_realizado)
 
     # =====================================================
     # 2) VALIDAR POSIÇÃO FINANCEIRA
@@ -549,7 +794,7 @@ def validar_salao_de_festas(data):
         if "SALDO ANTERIOR" in chave.upper():
             saldo_anterior = item.get("valor", 0)
             chave_saldo_anterior = vizei_utils.normalize(chave)
-            logs.append(f"[INFO] Saldo anterior detectado: {chave} = {saldo_anterior}")
+            logs.info("[INFO] Saldo anterior detectado: {} = {}", chave, saldo_anterior)
             break
 
     saldo_atual = 0
@@ -559,7 +804,7 @@ def validar_salao_de_festas(data):
         if "SALDO ATUAL" in chave.upper():
             saldo_atual = item.get("valor", 0)
             chave_saldo_atual = chave
-            logs.append(f"[INFO] Saldo atual detectado: {chave} = {saldo_atual}")
+            logs.info("[INFO] Saldo atual detectado: {} = {}", chave, saldo_atual)
             break
 
     # -----------------------------------------
@@ -596,34 +841,36 @@ def validar_salao_de_festas(data):
         
         if normalized_name in CREDITOS:
             credito_calc += valor
-            logs.append(f"[CREDITO] {chave}: +{valor}")
+            logs.info("[CREDITO] {}: +{}", chave, valor)
 
         elif normalized_name in DEBITOS:
             debito_calc += valor
-            logs.append(f"[DEBITO] {chave}: -{valor}")
+            logs.info("[DEBITO] {}: -{}", chave, valor)
 
         else:
-            logs.append(f"[IGNORADO] {chave}: não classificado")
+            logs.info("[IGNORADO] {}: não classificado", chave)
 
     # -----------------------------------------
     # Validar totais oficiais
     # -----------------------------------------
 
-    if abs(credito_calc - total_credito_oficial) > 1e-6:
+    if credito_calc != total_credito_oficial:
         valido = False
-        logs.append(
-            f"[ERRO TOTAL CREDITO] calculado {credito_calc} ≠ oficial {total_credito_oficial}"
+        logs.erro(
+            "[ERRO TOTAL CREDITO] calculado {} ≠ oficial {}",
+            credito_calc, total_credito_oficial
         )
     else:
-        logs.append(f"[OK TOTAL CREDITO] {credito_calc}")
+        logs.info("[OK TOTAL CREDITO] {}", credito_calc)
 
-    if abs(debito_calc - total_debito_oficial) > 1e-6:
+    if debito_calc != total_debito_oficial:
         valido = False
-        logs.append(
-            f"[ERRO TOTAL DEBITO] calculado {debito_calc} ≠ oficial {total_debito_oficial}"
+        logs.erro(
+            "[ERRO TOTAL DEBITO] calculado {} ≠ oficial {}",
+            debito_calc, total_debito_oficial
         )
     else:
-        logs.append(f"[OK TOTAL DEBITO] {debito_calc}")
+        logs.info("[OK TOTAL DEBITO] {}", debito_calc)
 
     # -----------------------------------------
     # Validar saldo final
@@ -631,13 +878,14 @@ def validar_salao_de_festas(data):
 
     saldo_final_calc = credito_calc - debito_calc
 
-    if abs(saldo_final_calc - saldo_atual) > 1e-6:
+    if saldo_final_calc != saldo_atual:
         valido = False
-        logs.append(
-            f"[ERRO SALDO FINAL] calculado {saldo_final_calc} ≠ oficial {saldo_atual}"
+        logs.erro(
+            "[ERRO SALDO FINAL] calculado {} ≠ oficial {}",
+            saldo_final_calc, saldo_atual
         )
     else:
-        logs.append(f"[OK SALDO FINAL] {saldo_final_calc}")
+        logs.info("[OK SALDO FINAL] {}", saldo_final_calc)
 
     # =====================================================
     # SAÍDA FINAL
@@ -680,13 +928,13 @@ def validar_cotas_em_aberto(data):
         total_geral_calculado += soma_torre
 
         # valida soma da torre
-        if abs(soma_torre - total_informado_torre) > 0.01:
+        if soma_torre != total_informado_torre:
             erros.setdefault(torre, []).append(
                 f"Somatório das unidades ({soma_torre}) diferente do valor_total informado ({total_informado_torre})"
             )
 
     # valida total geral
-    if abs(total_geral_calculado - total_informado) > 0.01:
+    if total_geral_calculado != total_informado:
         erros.setdefault("GERAL", []).append(
             f"Total geral calculado ({total_geral_calculado}) diferente do total informado ({total_informado})"
         )
@@ -0,0 +1,149 @@
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+
+# Limite padrão do cache em disco (bytes comprimidos)
+TAMANHO_MAXIMO_PADRAO = 512 * 1024 * 1024
+# Um acerto só regrava ultimo_acesso se o valor guardado for mais antigo que
+# isso (segundos): leituras repetidas não disputam o lock de escrita
+INTERVALO_ACESSO = 60
+
+def chave_pdf(dados_pdf: bytes, versao_extrator: str) -> str:
+    """Chave de conteúdo: SHA-256 dos bytes do PDF + versão do extrator."""
+    return f"{hashlib.sha256(dados_pdf).hexdigest()}:{versao_extrator}"
+
+
+class CacheTextoPdf:
+    """
+    Cache persistente do texto extraído de PDFs, endereçado por conteúdo.
+
+    Cada documento é guardado página a página (zlib) num banco SQLite em modo
+    WAL, o que permite que vários processos leiam e gravem ao mesmo tempo.
+    Quando o total comprimido passa de `tamanho_maximo`, os documentos usados
+    há mais tempo são removidos (LRU). Um documento que sozinho passa do
+    limite não é guardado.
+    """
+
+    def __init__(self, caminho_db, tamanho_maximo=TAMANHO_MAXIMO_PADRAO, nivel_compressao=6):
+        self.caminho_db = caminho_db
+        self.tamanho_maximo = tamanho_maximo
+        self.nivel_compressao = nivel_compressao
+        self._conn = None
+        self._pid = None
+
+    def _conexao(self):
+        # Conexões SQLite não sobrevivem a um fork: cada processo abre a sua
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.caminho_db, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS documentos (
+                    chave TEXT PRIMARY KEY,
+                    num_paginas INTEGER NOT NULL,
+                    tamanho INTEGER NOT NULL,
+                    ultimo_acesso REAL NOT NULL
+                )""")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS paginas (
+                    chave TEXT NOT NULL,
+                    indice INTEGER NOT NULL,
+                    texto BLOB NOT NULL,
+                    PRIMARY KEY (chave, indice)
+                )""")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_documentos_acesso ON documentos(ultimo_acesso)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def obter(self, chave):
+        """Retorna a lista de textos por página, ou None se não estiver em cache."""
+        try:
+            conn = self._conexao()
+            linha = conn.execute("SELECT num_paginas, ultimo_acesso FROM documentos WHERE chave = ?", (chave,)).fetchone()
+            if linha is None:
+                return None
+
+            registros = conn.execute(
+                "SELECT texto FROM paginas WHERE chave = ? ORDER BY indice", (chave,)
+            ).fetchall()
+            if len(registros) != linha[0]:
+                # Entrada removida por outro processo no meio da leitura
+                return None
+
+            agora = time.time()
+            # Decidido aqui, não no WHERE: um UPDATE pega o lock de escrita mesmo sem alterar linhas
+            if linha[1] < agora - INTERVALO_ACESSO:
+                try:
+                    conn.execute(
+                        "UPDATE documentos SET ultimo_acesso = ? WHERE chave = ? AND ultimo_acesso < ?",
+                        (agora, chave, agora - INTERVALO_ACESSO)
+                    )
+                except sqlite3.OperationalError:
+                    pass  # só a recência para o LRU: o texto já lido continua valendo
+            return [zlib.decompress(r[0]).decode('utf-8') for r in registros]
+        except sqlite3.Error as e:
+            print(f"Aviso: falha ao ler o cache '{self.caminho_db}': {e}")
+            return None
+
+    def gravar(self, chave, paginas):
+        """Grava os textos por página de um documento e aplica a política LRU."""
+        comprimidas = [zlib.compress((p or "").encode('utf-8'), self.nivel_compressao) for p in paginas]
+        tamanho = sum(len(c) for c in comprimidas)
+        if tamanho > self.tamanho_maximo:
+            # Não caberia nem sozinho: gravar só esvaziaria o cache
+            return
+
+        try:
+            conn = self._conexao()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM paginas WHERE chave = ?", (chave,))
+                conn.executemany(
+                    "INSERT INTO paginas (chave, indice, texto) VALUES (?, ?, ?)",
+                    [(chave, i, c) for i, c in enumerate(comprimidas)]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO documentos (chave, num_paginas, tamanho, ultimo_acesso) VALUES (?, ?, ?, ?)",
+                    (chave, len(comprimidas), tamanho, time.time())
+                )
+                self._evictar(conn, chave)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            print(f"Aviso: falha ao gravar no cache '{self.caminho_db}': {e}")
+
+    def _evictar(self, conn, preservar):
+        """Remove os documentos menos usados até caber em tamanho_maximo, exceto `preservar` (o recém-gravado)."""
+        total = conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM documentos").fetchone()[0]
+        if total <= self.tamanho_maximo:
+            return
+
+        remover = []
+        for chave, tamanho in conn.execute(
+            "SELECT chave, tamanho FROM documentos WHERE chave != ? ORDER BY ultimo_acesso", (preservar,)
+        ):
+            if total <= self.tamanho_maximo:
+                break
+            remover.append((chave,))
+            total -= tamanho
+
+        conn.executemany("DELETE FROM paginas WHERE chave = ?", remover)
+        conn.executemany("DELETE FROM documentos WHERE chave = ?", remover)
+
+    def estatisticas(self):
+        conn = self._conexao()
+        documentos, tamanho = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM documentos"
+        ).fetchone()
+        return {"documentos": documentos, "tamanho": tamanho, "tamanho_maximo": self.tamanho_maximo}
+
+    def fechar(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
+        self._pid = None
@@ -1,21 +1,55 @@
-import pypdf
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import io
+import mmap
+import os
 import re
+import sys
 import unicodedata
 
-def normalize(text):
-    if not text:
-        return ""
-    text = text.upper().strip()
-
-    # Remove acentos
-    text = ''.join(
+def _remover_acentos_nfd(text):
+    """Remove acentos decompondo em NFD e descartando as marcas combinantes (Mn)."""
+    return ''.join(
         c for c in unicodedata.normalize('NFD', text)
         if unicodedata.category(c) != 'Mn'
     )
 
-    # Normaliza espaços múltiplos
+# Latin-1 e Latin Extended-A/B já sem acento, e marcas combinantes removidas:
+# cobre o texto dos PDFs sem precisar da decomposição NFD caractere a caractere
+_TABELA_ACENTOS = {
+    codigo: _remover_acentos_nfd(chr(codigo)) or None
+    for codigo in (*range(0x80, 0x250), *range(0x300, 0x370))
+    if _remover_acentos_nfd(chr(codigo)) != chr(codigo)
+}
+
+# Linhas de contas e chaves se repetem muito entre documentos de um lote
+TAMANHO_CACHE_NORMALIZE = 8192
+
+@functools.lru_cache(maxsize=TAMANHO_CACHE_NORMALIZE)
+def _normalize(text):
+    text = text.upper()
+
+    # Remove acentos (texto só ASCII não tem o que remover)
+    if not text.isascii():
+        text = text.translate(_TABELA_ACENTOS)
+        if not text.isascii():
+            # Caracteres fora da tabela: decomposição completa
+            text = _remover_acentos_nfd(text)
+
+    # Normaliza espaços múltiplos (e as pontas)
     return " ".join(text.split())
 
+def normalize(text):
+    if not text:
+        return ""
+    return _normalize(text)
+
+def normalize_many(textos):
+    """normalize aplicado a uma sequência de textos, na mesma ordem."""
+    return [_normalize(t) if t else "" for t in textos]
+
 # Função auxiliar para conversão
 def str_br_to_float(valor_str: str) -> float:
     """Converte string no formato brasileiro (1.000,00 ou -1.000,00) para float."""
@@ -34,18 +68,385 @@ def str_br_to_float(valor_str: str) -> float:
         # Retorna 0.0 ou levanta erro, dependendo da necessidade.
         return 0.0
 
+# Sinal, parte inteira e até duas casas decimais, já com ponto decimal (ver str_br_to_centavos)
+_NUMERO_CENTAVOS = re.compile(r'([-+]?)(\d*)(?:\.(\d{0,2}))?')
+
+def str_br_to_centavos(valor_str: str) -> int:
+    """
+    Converte string no formato brasileiro (1.234.567,89 ou -1.822,42) direto
+    para centavos inteiros, sem passar por float. Aceita as mesmas entradas que
+    str_br_to_float, com o mesmo resultado que round(str_br_to_float(s) * 100).
+    Entrada inválida retorna 0.
+    """
+    if not valor_str:
+        return 0
+
+    limpo = valor_str.replace('.', '')
+
+    # Caminho rápido: só dígitos, exatamente duas casas decimais e sinal opcional ("-1234567,89")
+    if limpo[-3:-2] == ',':
+        digitos = limpo[1:] if limpo[0] == '-' else limpo
+        if digitos[:-3].isdecimal() and digitos[-2:].isdecimal():
+            return int(limpo.replace(',', ''))
+
+    # Mesmo pré-processamento de str_br_to_float: só o espaço depois do '-' é descartado
+    valor = re.sub(r'-\s*', '-', limpo.strip().replace(',', '.'))
+    numero = _NUMERO_CENTAVOS.fullmatch(valor)
+    if numero is None or not (numero[2] or numero[3]):
+        # Demais formas que float() aceita (mais de duas casas, expoente, '_'):
+        # arredonda para o centavo mais próximo; inválidas já saem como 0.0
+        try:
+            return round(str_br_to_float(valor_str) * 100)
+        except (OverflowError, ValueError):
+            # inf e nan
+            return 0
+
+    sinal, inteiro, decimais = numero.groups('')
+    centavos = int(inteiro or 0) * 100 + int(decimais.ljust(2, '0'))
+    return -centavos if sinal == '-' else centavos
+
+def str_br_to_centavos_lote(valores) -> list:
+    """Converte uma sequência de valores no formato brasileiro para centavos."""
+    return list(map(str_br_to_centavos, valores))
+
 # utils: extrai texto de pdf
-def extrair_texto_pdf(caminho_pdf):
-    """Extrai o texto de todas as páginas do PDF."""
-    texto_completo = []
+
+@functools.lru_cache(maxsize=None)
+def _pypdf():
+    """pypdf é importado só na primeira extração: processos que só tratam texto não pagam o import."""
+    import pypdf
+    return pypdf
+
+# Backend usado quando nenhum é informado (ver BACKENDS)
+BACKEND_PADRAO = os.environ.get("VIZEI_EXTRATOR", "pypdf")
+
+# Abaixo disso o custo de subir o pool de processos supera o ganho do paralelismo
+PAGINAS_MINIMAS_PARALELO = 16
+
+class _LeitorBuffer(io.RawIOBase):
+    """Stream somente leitura sobre um buffer (bytearray, memoryview, mmap), sem copiá-lo."""
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer).cast('B')
+        self._posicao = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._posicao
+
+    def seek(self, deslocamento, referencia=io.SEEK_SET):
+        if referencia == io.SEEK_CUR:
+            deslocamento += self._posicao
+        elif referencia == io.SEEK_END:
+            deslocamento += len(self._buffer)
+        self._posicao = max(0, deslocamento)
+        return self._posicao
+
+    def read(self, tamanho=-1):
+        fim = len(self._buffer) if tamanho is None or tamanho < 0 else self._posicao + tamanho
+        trecho = self._buffer[self._posicao:fim]
+        self._posicao += len(trecho)
+        return trecho.tobytes()
+
+    def readall(self):
+        return self.read()
+
+    def readinto(self, destino):
+        trecho = self._buffer[self._posicao:self._posicao + len(destino)]
+        destino[:len(trecho)] = trecho
+        self._posicao += len(trecho)
+        return len(trecho)
+
+def _origem_reutilizavel(origem):
+    """
+    Streams sem seek (ou de seek lento, como membros de zip) são lidos uma vez
+    para a memória, já que o pypdf navega pelo arquivo de trás para frente.
+    """
+    if isinstance(origem, (str, os.PathLike, bytes, bytearray, memoryview, mmap.mmap)):
+        return origem
+    # zipfile só é importado se o chamador o usa: sem ele não há ZipExtFile
+    zipfile = sys.modules.get("zipfile")
+    if (zipfile is not None and isinstance(origem, zipfile.ZipExtFile)) or not origem.seekable():
+        return origem.read()
+    return origem
+
+@contextlib.contextmanager
+def _abrir_pdf(origem):
+    """Abre a origem do PDF (caminho, bytes, memoryview, mmap ou arquivo binário) como stream."""
+    if isinstance(origem, (str, os.PathLike)):
+        with open(origem, 'rb') as arquivo:
+            yield arquivo
+    elif isinstance(origem, bytes):
+        # BytesIO compartilha o buffer de bytes imutáveis até a primeira escrita
+        yield io.BytesIO(origem)
+    elif isinstance(origem, (bytearray, memoryview, mmap.mmap)):
+        yield _LeitorBuffer(origem)
+    else:
+        # Arquivo do chamador: não fecha e devolve na posição original
+        posicao = origem.tell()
+        try:
+            yield origem
+        finally:
+            origem.seek(posicao)
+
+def _dados_pdf(origem):
+    """Conteúdo binário da origem, para o hash do cache (sem cópia para buffers)."""
+    if isinstance(origem, (bytes, bytearray, memoryview, mmap.mmap)):
+        return memoryview(origem)
+    with _abrir_pdf(origem) as stream:
+        return stream.read()
+
+def _chave_cache(origem, backend=None):
+    import vizei_cache
+
+    return vizei_cache.chave_pdf(_dados_pdf(origem), versao_extrator(backend))
+
+def sha256_pdf(caminho_pdf) -> str:
+    """SHA-256 do conteúdo do PDF (caminho, bytes, buffer ou arquivo com seek), o mesmo da chave do cache."""
+    return hashlib.sha256(_dados_pdf(caminho_pdf)).hexdigest()
+
+# Estado de cada processo do pool de extração paralela
+_READER_WORKER = None
+
+def _inicializar_worker(origem):
+    """Abre o PDF uma única vez por worker."""
+    global _READER_WORKER
+    if isinstance(origem, (str, os.PathLike)):
+        _READER_WORKER = _pypdf().PdfReader(origem)
+    else:
+        _READER_WORKER = _pypdf().PdfReader(io.BytesIO(origem))
+
+def _extrair_intervalo_paginas(inicio, fim):
+    """Extrai o texto das páginas [inicio, fim). Executado dentro de cada worker."""
+    return [_READER_WORKER.pages[i].extract_text() for i in range(inicio, fim)]
+
+def _extrair_paginas_paralelo(origem, total_paginas, workers):
+    """Distribui faixas contíguas de páginas num pool de processos, preservando a ordem."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    if not isinstance(origem, (str, os.PathLike)):
+        # Cada worker recebe uma cópia do documento (memória não é compartilhada entre processos)
+        origem = bytes(_dados_pdf(origem))
+
+    # Algumas faixas por worker para equilibrar páginas mais pesadas (tabelas, imagens)
+    tamanho_faixa = max(1, -(-total_paginas // (workers * 4)))
+    faixas = [(i, min(i + tamanho_faixa, total_paginas)) for i in range(0, total_paginas, tamanho_faixa)]
+
+    textos = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_inicializar_worker, initargs=(origem,)) as executor:
+        futuros = [executor.submit(_extrair_intervalo_paginas, inicio, fim) for inicio, fim in faixas]
+        for futuro in futuros:
+            textos.extend(futuro.result())
+    return textos
+
+def _extrair_paginas_pypdf(caminho_pdf, paralelo=False, workers=None, min_paginas_paralelo=PAGINAS_MINIMAS_PARALELO):
+    with _abrir_pdf(caminho_pdf) as arquivo:
+        reader = _pypdf().PdfReader(arquivo)
+        total_paginas = len(reader.pages)
+        workers = workers or os.cpu_count() or 1
+
+        if paralelo and workers > 1 and total_paginas >= min_paginas_paralelo:
+            textos_paginas = _extrair_paginas_paralelo(caminho_pdf, total_paginas, workers)
+        else:
+            textos_paginas = [pagina.extract_text() for pagina in reader.pages]
+
+    return [texto_pagina or "" for texto_pagina in textos_paginas]
+
+
+#
+# Backends de extração
+#
+
+class BackendPypdf:
+    """pypdf, em Python puro. É o padrão; os parsers foram escritos sobre o texto que ele produz."""
+    nome = "pypdf"
+    _versao = None
+
+    def disponivel(self):
+        return importlib.util.find_spec("pypdf") is not None
+
+    def versao(self):
+        # Lida do pypdf/_version.py sem importar o pacote: a chave do cache não deve
+        # custar o import do pypdf (nem o do importlib.metadata, quase tão caro)
+        if BackendPypdf._versao is None:
+            versao = None
+            if "pypdf" in sys.modules:
+                versao = sys.modules["pypdf"].__version__
+            else:
+                spec = importlib.util.find_spec("pypdf")
+                try:
+                    with open(os.path.join(spec.submodule_search_locations[0], "_version.py"), encoding="utf-8") as f:
+                        encontrado = re.search(r'__version__\s*=\s*["\']([^"\']+)["\']', f.read())
+                    versao = encontrado.group(1) if encontrado else None
+                except (AttributeError, TypeError, OSError):
+                    pass
+            BackendPypdf._versao = f"pypdf-{versao or _pypdf().__version__}"
+        return BackendPypdf._versao
+
+    def extrair_paginas(self, caminho_pdf, **opcoes):
+        return _extrair_paginas_pypdf(caminho_pdf, **opcoes)
+
+class BackendPdftotext:
+    """
+    Ferramenta de linha de comando pdftotext (poppler), se estiver no PATH.
+    O texto difere do do pypdf em espaçamento e ordem de colunas: confira os
+    parsers antes de usá-lo em produção.
+    """
+    nome = "pdftotext"
+    _versao = None
+
+    def disponivel(self):
+        import shutil
+
+        return shutil.which("pdftotext") is not None
+
+    def versao(self):
+        if BackendPdftotext._versao is None:
+            import subprocess
+
+            saida = subprocess.run(["pdftotext", "-v"], capture_output=True, text=True)
+            # "pdftotext version 22.02.0" (no stderr, em versões antigas)
+            primeira = (saida.stdout or saida.stderr).strip().splitlines()[0]
+            BackendPdftotext._versao = f"pdftotext-{primeira.split()[-1]}"
+        return BackendPdftotext._versao
+
+    def extrair_paginas(self, caminho_pdf, **opcoes):
+        import subprocess
+
+        # Sem equivalente ao modo paralelo: as opções do pypdf são ignoradas
+        saida = subprocess.run(
+            ["pdftotext", "-enc", "UTF-8", "-", "-"],
+            input=bytes(_dados_pdf(caminho_pdf)), capture_output=True, check=True,
+        )
+        # Uma quebra de página (\f) depois de cada página, inclusive a última
+        return saida.stdout.decode("utf-8").split("\f")[:-1]
+
+# Nome -> backend. registrar_backend() acrescenta outros (ex.: um OCR)
+BACKENDS = {}
+
+def registrar_backend(backend):
+    """Registra um backend: objeto com nome, disponivel(), versao() e extrair_paginas(origem, **opcoes)."""
+    BACKENDS[backend.nome] = backend
+    return backend
+
+registrar_backend(BackendPypdf())
+registrar_backend(BackendPdftotext())
+
+def obter_backend(nome=None):
+    """Backend pelo nome (padrão: BACKEND_PADRAO, ou a variável de ambiente VIZEI_EXTRATOR)."""
+    nome = nome or BACKEND_PADRAO
+    backend = BACKENDS.get(nome)
+    if backend is None:
+        raise ValueError(f"Backend de extração desconhecido: {nome}. Opções: {', '.join(BACKENDS)}.")
+    if not backend.disponivel():
+        raise ValueError(f"Backend de extração '{nome}' não está instalado.")
+    return backend
+
+def versao_extrator(backend=None) -> str:
+    """Entra na chave do cache de texto: mudar o extrator invalida o que já foi extraído."""
+    return obter_backend(backend).versao()
+
+def __getattr__(nome):
+    # Compatibilidade: VERSAO_EXTRATOR era uma constante calculada no import do pypdf
+    if nome == "VERSAO_EXTRATOR":
+        return versao_extrator()
+    raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+
+
+def extrair_paginas_pdf(caminho_pdf, paralelo=False, workers=None, min_paginas_paralelo=PAGINAS_MINIMAS_PARALELO,
+                        backend=None):
+    """
+    Extrai o texto de cada página do PDF, na ordem. Páginas sem texto retornam ''.
+    `backend` escolhe o extrator em BACKENDS (padrão: BACKEND_PADRAO).
+    """
+    caminho_pdf = _origem_reutilizavel(caminho_pdf)
+    return obter_backend(backend).extrair_paginas(
+        caminho_pdf, paralelo=paralelo, workers=workers, min_paginas_paralelo=min_paginas_paralelo
+    )
+
+def extrair_paginas_pdf_com_cache(caminho_pdf, cache, **opcoes):
+    """
+    Igual a extrair_paginas_pdf, mas consulta antes o cache (vizei_cache.CacheTextoPdf),
+    endereçado pelo SHA-256 do PDF e pela versão do backend. Num acerto o extrator não é usado.
+    """
+    caminho_pdf = _origem_reutilizavel(caminho_pdf)
+    chave = _chave_cache(caminho_pdf, opcoes.get("backend"))
+
+    paginas = cache.obter(chave)
+    if paginas is None:
+        paginas = extrair_paginas_pdf(caminho_pdf, **opcoes)
+        cache.gravar(chave, paginas)
+    return paginas
+
+def iterar_paginas_pdf(caminho_pdf, cache=None, backend=None):
+    """
+    Gera o texto de cada página não vazia à medida que é extraída, para que o
+    parsing comece antes do fim da extração. Erros de leitura são propagados.
+    Só o pypdf extrai página a página; os outros backends entregam tudo de uma vez.
+    """
+    caminho_pdf = _origem_reutilizavel(caminho_pdf)
+
+    if obter_backend(backend).nome != "pypdf":
+        if cache is not None:
+            paginas = extrair_paginas_pdf_com_cache(caminho_pdf, cache, backend=backend)
+        else:
+            paginas = extrair_paginas_pdf(caminho_pdf, backend=backend)
+        yield from (p for p in paginas if p)
+        return
+
+    if cache is not None:
+        chave = _chave_cache(caminho_pdf, backend)
+        paginas = cache.obter(chave)
+        if paginas is not None:
+            yield from (p for p in paginas if p)
+            return
+
+    extraidas = []
+    with _abrir_pdf(caminho_pdf) as arquivo:
+        reader = _pypdf().PdfReader(arquivo)
+        for pagina in reader.pages:
+            texto_pagina = pagina.extract_text() or ""
+            extraidas.append(texto_pagina)
+            if texto_pagina:
+                yield texto_pagina
+
+    if cache is not None:
+        cache.gravar(chave, extraidas)
+
+def iterar_linhas_pdf(caminho_pdf, cache=None, backend=None):
+    """Gera as linhas do PDF na mesma sequência de extrair_texto_pdf(...).split('\\n')."""
+    for texto_pagina in iterar_paginas_pdf(caminho_pdf, cache=cache, backend=backend):
+        yield from texto_pagina.split('\n')
+
+def extrair_texto_pdf(caminho_pdf, paralelo=False, workers=None, min_paginas_paralelo=PAGINAS_MINIMAS_PARALELO, cache=None,
+                      backend=None):
+    """
+    Extrai o texto de todas as páginas do PDF.
+
+    `caminho_pdf` pode ser um caminho, bytes, bytearray, memoryview, mmap ou
+    qualquer arquivo binário aberto; buffers em memória são lidos sem cópia.
+
+    Com paralelo=True as páginas são extraídas num pool de `workers` processos
+    (padrão: os.cpu_count()). Documentos com menos de `min_paginas_paralelo`
+    páginas seguem o caminho serial. O texto retornado é idêntico nos dois modos.
+
+    Se `cache` (vizei_cache.CacheTextoPdf) for informado, o texto é reaproveitado
+    entre execuções para o mesmo conteúdo de PDF.
+
+    `backend` escolhe o extrator (ver BACKENDS); o padrão é pypdf.
+    """
+    opcoes = dict(paralelo=paralelo, workers=workers, min_paginas_paralelo=min_paginas_paralelo, backend=backend)
     try:
-        with open(caminho_pdf, 'rb') as arquivo:
-            reader = pypdf.PdfReader(arquivo)
-            for pagina in reader.pages:
-                texto_pagina = pagina.extract_text()
-                if texto_pagina:
-                    texto_completo.append(texto_pagina)
-        return "\n".join(texto_completo)
+        if cache is not None:
+            paginas = extrair_paginas_pdf_com_cache(caminho_pdf, cache, **opcoes)
+        else:
+            paginas = extrair_paginas_pdf(caminho_pdf, **opcoes)
+        return "\n".join(p for p in paginas if p)
     except FileNotFoundError:
         print(f"Erro: Arquivo '{caminho_pdf}' não encontrado.")
         return None